@@ -6,7 +6,7 @@ import logging
 import subprocess
 import tkinter as tk
 from tkinter import ttk
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 
 import psutil
 from ttkthemes import ThemedTk
@@ -16,8 +16,20 @@ from utils.constants.app import APP_NAME
 import utils.config as cfg
 import utils.constants.events as ev
 import utils.constants.ui as const
-from yamusic import YaPlayer, YaPlayerError, YaTrack, STATE_ERR, STATE_PAUSED, STATE_PLAYING
+from yamusic import (
+    PlayerProxy,
+    PlayerWorker,
+    YaPlayerError,
+    YaTrack,
+    STATE_BUFFERING,
+    STATE_ERR,
+    STATE_PAUSED,
+    STATE_PLAYING,
+    STATE_RECOVERING,
+    )
 
+from .__utils.clock import FrameClock
+from .__utils.controls import CoverLabel
 from .__utils.styling import build_styles
 from ._main_frame import MainFrame
 from ._main_frame.display_frame import  DisplayFrame
@@ -41,16 +53,25 @@ class _UI(ThemedTk):
         super().__init__(*args, className=APP_NAME, **kwargs)
         self._ui_events: AioQueue = AioQueue()
         self._status_queue: asyncio.Queue = asyncio.Queue()
-        self._player: YaPlayer = None
+        # Player, controllers and API client run on the worker loop, UI talks to them via proxy
+        self._worker: PlayerWorker = PlayerWorker()
+        self._player: PlayerProxy = None
         self._visualizer: subprocess.Popen = None
-        self._progress_task: asyncio.Task = None
         self._status_task: asyncio.Task = None
+        self._cover_task: asyncio.Task = None
 
         # self.geometry(f'{APP_WIDTH}x{APP_HEIGHT}')
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(0, weight=1)
 
         build_styles(ttk.Style(self))
+        # Drives spinner, title marquee and progress, see get_frame_clock()
+        self.frame_clock: FrameClock = FrameClock(self)
+        # Layout is recalculated once per idle cycle, see _schedule_layout()
+        self._layout_job: Optional[str] = None
+        self._layout_size: Optional[Tuple[int, int]] = None
+        self._layout_requests: int = 0
+        self.layout_stats: Dict[str, int] = {'requests': 0, 'passes': 0, 'resizes': 0, 'max_coalesced': 0}
         self.main: MainFrame = MainFrame(self, style='MainFrame.TFrame')
         # Controls shortcuts
         self._display_frame: DisplayFrame = self.main.display_frame
@@ -59,6 +80,7 @@ class _UI(ThemedTk):
         self._progress: ProgressLabel = self._progress_frame.progress
         self._volume:VolumeLabel = self._progress_frame.volume
         self._mode_source = self.main.display_frame.mode_source
+        self._cover: CoverLabel = self.main.display_frame.cover
 
         self._spinner.stop()
         self._progress.clean()
@@ -74,8 +96,9 @@ class _UI(ThemedTk):
         Create and start YaMusic player, poll and handle UI events
         """
         self._status_task = asyncio.create_task(self._show_status_task())
+        self._worker.start()
         try:
-            self._player = await YaPlayer(self._ui_events).init()
+            self._player = await PlayerProxy.create(self._worker, self._ui_events)
         except YaPlayerError as exc:
             msg: str = f'Cannot start player: {str(exc)}. Shutting down.'
             await self._to_status(msg)
@@ -104,7 +127,7 @@ class _UI(ThemedTk):
             await self._shutdown()
 
     @property
-    def player(self) -> Optional[YaPlayer]:
+    def player(self) -> Optional[PlayerProxy]:
         """Accessor for player instance"""
         if hasattr(self, '_player'):
             return self._player
@@ -119,22 +142,51 @@ class _UI(ThemedTk):
 
     async def _shutdown(self):
         await self._to_status('Shutting down UI...')
-        if self._progress_task:
-            self._progress_task.cancel()
-            await self._progress_task
+        self._stop_progress()
+        _LOGGER.debug('Frame clock stats: %s', self.frame_clock.stats())
+        _LOGGER.debug('Layout stats: %s', self.layout_stats)
         if self._status_task:
             self._status_task.cancel()
             await self._status_task
+        if self._cover_task:
+            self._cover_task.cancel()
         if self._visualizer:
             self._kill_visualizer()
         if self._player:
             await self._player.shutdown()
+        await self._worker.stop()
         self._ui_events = None
         self._status_queue = None
         _LOGGER.debug('UI Loop exit')
 
-    def _resize_event(self, _) -> None:
-        self.geometry(f'{self.main.winfo_reqwidth()}x{self.main.winfo_reqheight()}')
+    def _resize_event(self, event: tk.Event) -> None:
+        # <Configure> of the root is also delivered for every child widget
+        if event.widget is self and (event.width, event.height) != self._layout_size:
+            # Window was resized outside of _layout(), e.g. by window manager
+            self._layout_size = None
+        self._schedule_layout()
+
+    def _schedule_layout(self) -> None:
+        """Request window size recalculation, all requests of one idle cycle share one pass"""
+        self._layout_requests += 1
+        self.layout_stats['requests'] += 1
+        if self._layout_job is None:
+            self._layout_job = self.after_idle(self._layout)
+
+    def _layout(self) -> None:
+        self._layout_job = None
+        self.layout_stats['passes'] += 1
+        self.layout_stats['max_coalesced'] = max(
+            self.layout_stats['max_coalesced'], self._layout_requests)
+        self._layout_requests = 0
+        # Let pending geometry propagation finish, so that requested size is final
+        self.update_idletasks()
+        size: Tuple[int, int] = (self.main.winfo_reqwidth(), self.main.winfo_reqheight())
+        if size == self._layout_size:
+            return
+        self._layout_size = size
+        self.layout_stats['resizes'] += 1
+        self.geometry(f'{size[0]}x{size[1]}')
 
     def _keypress_event(self, event: tk.Event) -> None:
         self._ui_events.put({"type": ev.TYPE_KEY, "keycode": event.keycode})         #pylint: disable=no-member
@@ -142,23 +194,20 @@ class _UI(ThemedTk):
     async def _mode_playlist(self) -> None:
         if self.player.mode == const.MODE_PLAYLIST:
             self.main.toggle_playlist()
-            self.update_idletasks()
-            self._resize_event(False)
+            self._schedule_layout()
             return
         await self._player.switch_mode(const.MODE_PLAYLIST)
         self._mode_source.update_sources()
         self._mode_source.set_mode(self._player_mode())
         self.main.show_playlist()
-        self.update_idletasks()
-        self._resize_event(False)
+        self._schedule_layout()
 
     async def _mode_radio(self) -> None:
         await self._player.switch_mode(const.MODE_RADIO)
         self._mode_source.update_sources()
         self._mode_source.set_mode(self._player_mode())
         self.main.hide_playlist()
-        self.update_idletasks()
-        self._resize_event(False)
+        self._schedule_layout()
 
     async def _mode_artist(self) -> None:
         await self._player.switch_mode(const.MODE_ARTIST)
@@ -166,13 +215,11 @@ class _UI(ThemedTk):
         self._mode_source.set_mode(self._player_mode())
         self.main.show_playlist()
         self.main.show_settings()
-        self.update_idletasks()
-        self._resize_event(False)
+        self._schedule_layout()
 
     def _toggle_settings(self) -> None:
         self.main.toggle_settings()
-        self.update_idletasks()
-        self._resize_event(False)
+        self._schedule_layout()
 
     def _kill_visualizer(self) -> None:
         _vis = psutil.Process(self._visualizer)
@@ -203,6 +250,20 @@ class _UI(ThemedTk):
         self.title(f'{APP_NAME} {title}')
         self._progress_frame.set_title(title)
 
+    def _update_cover(self) -> None:
+        if self._cover_task:
+            self._cover_task.cancel()
+        self._cover_task = asyncio.create_task(self._show_cover(self._player.current_track))
+
+    async def _show_cover(self, track: YaTrack) -> None:
+        """Download and decode cover off the UI thread, only PhotoImage is built here"""
+        data: Optional[bytes] = None
+        path: Optional[str] = await self._player.get_cover(track)
+        if path:
+            data = await asyncio.get_running_loop().run_in_executor(None, CoverLabel.decode, path)
+        if track is self._player.current_track:
+            self._cover.set_image(data)
+
     def _player_mode(self) -> str:
         """Get current player mode."""
         mode: str = const.MODE_ICONS[self._player.mode]
@@ -246,12 +307,21 @@ class _UI(ThemedTk):
             await self._handle_keypress(event['keycode'])
         elif event_type == ev.TYPE_TAGS:
             self._set_title(track=self._player.current_track)
+            self._update_cover()
         elif event_type == ev.TYPE_ATF:
-            await self._player.get_next_track()
+            await self._player.prefetch_next_track()
+        elif event_type == ev.TYPE_TRACK_START:
+            await self._player.track_started(event.get('track_id'))
+        elif event_type == ev.TYPE_SKIP_NEXT:
+            await self._player.skip()
         elif event_type == ev.TYPE_SKIP_POS:
             await self._player.skip_to_playlist_position(event.get('position'))
         elif event_type == ev.TYPE_REPEAT:
             self._mode_source.set_mode(self._player_mode())
+        elif event_type == ev.TYPE_RECOVER:
+            await self._player.recover(event.get('position', 0))
+        elif event_type == ev.TYPE_BUFFERING:
+            self._show_buffering(event.get('percent', 100))
         elif event_type == ev.TYPE_STATUS:
             await self._to_status(event.get('status', 'Unknown'))
         elif event_type in [ev.TYPE_QUERY_ALBUMS, ev.TYPE_QUERY_ARTISTS, ev.TYPE_QUERY_TRACKS]:
@@ -292,7 +362,7 @@ class _UI(ThemedTk):
             state: str = self._player.state
             if state in [STATE_PAUSED]:
                 await self._player.play()
-            elif state == STATE_PLAYING:
+            elif state in [STATE_PLAYING, STATE_BUFFERING]:
                 await self._player.pause()
         elif keycode == const.KEY_PLAYLIST:
             await self._mode_playlist()
@@ -302,6 +372,8 @@ class _UI(ThemedTk):
             await self._mode_radio()
         elif keycode == const.KEY_SETTINGS:
             self._toggle_settings()
+        elif keycode == const.KEY_FIND:
+            self.main.focus_playlist_filter()
         elif keycode == const.KEY_VIS:
             self._toggle_visualizer()
         elif keycode == const.KEY_EXIT:
@@ -311,18 +383,25 @@ class _UI(ThemedTk):
         state: str = self._player.state
         if state == STATE_ERR:
             await self._to_status(f'Player error: {self._player.error}')
-            if self._progress_task:
-                self._progress_task.cancel()
+            self._stop_progress()
         elif state == STATE_PLAYING:
             self._spinner.start()
-            if self._progress_task:
-                self._progress_task.cancel()
-            self._progress_task = asyncio.create_task(self._update_progress())
+            self._start_progress()
             self.main.update_playlist_position()
         elif state == STATE_PAUSED:
             self._spinner.pause()
-            if self._progress_task:
-                self._progress_task.cancel()
+            self._stop_progress()
+        elif state == STATE_BUFFERING:
+            self._spinner.pause()
+        elif state == STATE_RECOVERING:
+            self._spinner.pause()
+            await self._to_status(f'Recovering from: {self._player.error}')
+
+    def _show_buffering(self, percent: int) -> None:
+        if percent < 100:
+            self._set_status(f'Buffering: {percent}%')
+        else:
+            self._set_status()
 
     async def _to_status(self, status: str):
         await self._status_queue.put(status)
@@ -337,23 +416,24 @@ class _UI(ThemedTk):
         except asyncio.CancelledError:
             _LOGGER.debug('Status task cancelled.')
 
-    async def _update_progress(self) -> None:
-        _LOGGER.debug('Progress task started.')
-        self._progress.clean()
-        try:
-            while True:
-                duration: int = (self._player.duration or 0)
-                position: int = self._player.position
-                fac: float = 0
-                if duration > 0:
-                    fac = position/duration
-                self._progress.set_position(fac)
-                await asyncio.sleep(0.5)
-        except asyncio.CancelledError:
-            _LOGGER.debug('Progress task cancelled.')
-            if self._player.state != STATE_PAUSED:
-                self._progress.clean()
-            return
+    def _start_progress(self) -> None:
+        _LOGGER.debug('Progress updates started.')
+        self._update_progress()
+        self.frame_clock.subscribe(self._update_progress)
+
+    def _stop_progress(self) -> None:
+        self.frame_clock.unsubscribe(self._update_progress)
+        _LOGGER.debug('Progress updates stopped.')
+        if self._player and self._player.state != STATE_PAUSED:
+            self._progress.clean()
+
+    def _update_progress(self) -> None:
+        duration: int = (self._player.duration or 0)
+        position: int = self._player.position or 0
+        fac: float = 0
+        if duration > 0:
+            fac = position/duration
+        self._progress.set_position(fac)
 
 
 
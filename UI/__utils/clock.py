@@ -0,0 +1,107 @@
+"""Single timer for all animated UI widgets"""
+import logging
+from typing import Callable, Dict, Optional
+
+from tkinter import Misc, Event
+
+_LOGGER = logging.getLogger(__name__)
+
+TICK_MS             : int = 400
+_OBSCURED           : str = 'VisibilityFullyObscured'
+
+
+class FrameClock:
+    """
+    Drives animations of all widgets of a window with one after() timer.
+    Subscribers are called on every n-th tick, so all redraws are aligned to the same wakeup.
+    Timer runs only while there are subscribers and the window is visible:
+    withdrawn, iconified or fully obscured window costs no wakeups.
+    """
+    def __init__(self, root: Misc, tick_ms: int = TICK_MS):
+        self._root: Misc = root
+        self._tick_ms: int = tick_ms
+        self._subscribers: Dict[Callable[[], None], int] = {}
+        self._job: Optional[str] = None
+        self._mapped: bool = True
+        self._obscured: bool = False
+        self.ticks: int = 0
+        self.redraws: int = 0
+        root.bind('<Map>',        self._on_map, add='+')
+        root.bind('<Unmap>',      self._on_unmap, add='+')
+        root.bind('<Visibility>', self._on_visibility, add='+')
+
+    @property
+    def running(self) -> bool:
+        """Is timer scheduled"""
+        return self._job is not None
+
+    def subscribe(self, callback: Callable[[], None], every: int = 1) -> None:
+        """Call callback on every n-th tick, callback returns nothing"""
+        self._subscribers[callback] = max(every, 1)
+        self._schedule()
+
+    def unsubscribe(self, callback: Callable[[], None]) -> None:
+        """Stop calling callback, timer stops with the last subscriber"""
+        self._subscribers.pop(callback, None)
+        if not self._subscribers:
+            self._cancel()
+
+    def drawn(self) -> None:
+        """Subscriber reports that it actually changed widget content"""
+        self.redraws += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Number of wakeups and redraws since start"""
+        return {'ticks': self.ticks, 'redraws': self.redraws, 'subscribers': len(self._subscribers)}
+
+    @property
+    def _visible(self) -> bool:
+        return self._mapped and not self._obscured
+
+    def _schedule(self) -> None:
+        if self._job is None and self._subscribers and self._visible:
+            self._job = self._root.after(self._tick_ms, self._tick)
+
+    def _cancel(self) -> None:
+        if self._job is not None:
+            self._root.after_cancel(self._job)
+            self._job = None
+
+    def _tick(self) -> None:
+        self._job = None
+        self.ticks += 1
+        for callback, every in list(self._subscribers.items()):
+            if self.ticks % every == 0:
+                callback()
+        self._schedule()
+
+    def _on_map(self, event: Event) -> None:
+        if event.widget is self._root:
+            self._mapped = True
+            _LOGGER.debug('Window mapped, frame clock resumed.')
+            self._schedule()
+
+    def _on_unmap(self, event: Event) -> None:
+        if event.widget is self._root:
+            self._mapped = False
+            _LOGGER.debug('Window unmapped, frame clock stopped.')
+            self._cancel()
+
+    def _on_visibility(self, event: Event) -> None:
+        if event.widget is not self._root:
+            return
+        self._obscured = str(event.state) == _OBSCURED
+        if self._obscured:
+            self._cancel()
+        else:
+            self._schedule()
+
+
+def get_frame_clock(widget: Misc) -> FrameClock:
+    """Frame clock of widget's window, created on the first request"""
+    root: Misc = widget.winfo_toplevel()
+    clock: Optional[FrameClock] = getattr(root, 'frame_clock', None)
+    if clock is None:
+        clock = FrameClock(root)
+        root.frame_clock = clock
+    return clock
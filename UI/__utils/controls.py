@@ -1,15 +1,34 @@
 """Custom controls used in UI"""
 import logging
-from typing import Any, Dict, Optional, List, Union
-from tkinter import Listbox, MULTIPLE, Variable
-from tkinter.ttk import Button, Combobox, Label
+from io import BytesIO
+from typing import Any, Callable, Dict, Hashable, Optional, List, Tuple, Union
+from tkinter import END, Listbox, MULTIPLE, PhotoImage, Variable, VERTICAL, Widget
+from tkinter.ttk import Button, Combobox, Frame, Label, Scrollbar
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
 
 from yandex_music import Value
 
-from UI.__utils.styling import main_font, padding
+from UI.__utils.clock import get_frame_clock
+from UI.__utils.styling import main_font, main_font_linespace, measure_main_font, padding
 
 _LOGGER = logging.getLogger(__name__)
 
+def set_text(widget: Widget, text: str) -> bool:
+    """
+    Change widget text only when it differs from the last one set here,
+    returns True when widget was redrawn
+    """
+    if getattr(widget, '_shown_text', None) == text:
+        return False
+    widget['text'] = text
+    widget._shown_text = text                                                                       # pylint: disable=protected-access
+    get_frame_clock(widget).drawn()
+    return True
+
 class SettingsButton(Button):
     """
     Ordinary button, but may be pressed by hitting Enter key
@@ -28,6 +47,7 @@ class ColonLabel(Label):
 class SpinnerLabel(Label):
     """
     Spinner widget: one-character label with ability to automatically change its value.
+    Spinning is driven by the window's frame clock.
     """
     def __init__(self, master, phases:str='⢿⣻⣽⣾⣷⣯⣟⡿', **kwargs):
         super().__init__(master, **kwargs)
@@ -36,27 +56,24 @@ class SpinnerLabel(Label):
         self._pause: str = '⏸'
         self._stop: str = '⏹'
         self._phase: int = 0
-        self._job: str = None
         self.grid(row=0, column=0, pady=padding)
 
     def _cancel(self) -> None:
-        if self._job is not None:
-            self.after_cancel(self._job)
-            self._job = None
+        get_frame_clock(self).unsubscribe(self._step)
 
     def stop(self) -> None:
         """Stop spinning and draw a stop symbol"""
         self._cancel()
         self._running = False
         self._phase = 0
-        self['text'] = self._stop
+        set_text(self, self._stop)
 
     def pause(self) -> None:
         """Stop spinning and draw a pause symbol"""
         self._cancel()
         self._running = False
         self._phase = 0
-        self['text'] = self._pause
+        set_text(self, self._pause)
 
     def start(self) -> None:
         """Start spinning"""
@@ -64,14 +81,14 @@ class SpinnerLabel(Label):
             return
         self._running = True
         self._step()
+        get_frame_clock(self).subscribe(self._step)
 
     def _step(self) -> None:
         if self._running:
-            self['text'] = self.phases[self._phase]
+            set_text(self, self.phases[self._phase])
             self._phase += 1
             if self._phase > len(self.phases) - 1:
                 self._phase = 0
-            self._job = self.after(400, self._step)
 
 class ProgressLabel(Label):
     """Label to display progress"""
@@ -80,6 +97,7 @@ class ProgressLabel(Label):
         self._passed: str = '░'
         self._to_go: str = '🞌'
         self.position: int = 0
+        self._drawn: Optional[int] = None
         self.grid(row=0, column=1, pady=padding, sticky='NSEW')
         self._update()
 
@@ -94,8 +112,11 @@ class ProgressLabel(Label):
         self._update()
 
     def _update(self) -> None:
+        if self.position == self._drawn:
+            return
         to_go: int = self["width"] - self.position
-        self['text'] = f'{self._passed * self.position}{self._to_go * to_go}'
+        set_text(self, f'{self._passed * self.position}{self._to_go * to_go}')
+        self._drawn = self.position
 
 class VolumeLabel(Label):
     """
@@ -131,6 +152,34 @@ class VolumeLabel(Label):
     def _update(self) -> None:
         self['text'] = self._scale[self.volume]
 
+class CoverLabel(Label):
+    """
+    Label to display cover of current track.
+    Images are decoded by decode() off the UI thread, label only wraps ready pixel data.
+    """
+    def __init__(self, master, **kwargs):
+        super().__init__(master, **kwargs)
+        self._image: PhotoImage = None
+
+    @staticmethod
+    def decode(path: str) -> Optional[bytes]:
+        """Decode JPEG cover into PPM data, which Tk can display without extensions"""
+        if Image is None:
+            return None
+        try:
+            with Image.open(path) as image:
+                out: BytesIO = BytesIO()
+                image.convert('RGB').save(out, format='PPM')
+                return out.getvalue()
+        except OSError as exc:
+            _LOGGER.debug('CoverLabel: Cannot decode %s: %s', path, exc)
+            return None
+
+    def set_image(self, data: Optional[bytes]) -> None:
+        """Show decoded cover, or clear the label when there is no cover"""
+        self._image = PhotoImage(data=data) if data else None
+        self['image'] = self._image or ''
+
 class ModeLabel(Label):
     """
     Ordinary label, but with custom style
@@ -198,3 +247,178 @@ class ValListbox(Listbox):
         if self['selectmode'] == MULTIPLE:
             return [ self._dict.get(idx) for idx in indices]
         return self._dict.get(indices[0])
+
+class VirtualListbox(Frame):
+    """
+    Listbox for large lists: Tk widget holds only visible rows, the items stay in Python list.
+    Rows are formatted by format_row(item, width) when they first become visible,
+    and cached per width in characters. Items are identified by key(item),
+    so that set_items() re-formats only the changed range.
+    Indices in public methods are absolute item indices.
+    """
+    _WIDTHS_CACHED: int = 2
+
+    def __init__(
+            self, master,
+            format_row: Callable[[Any, int], str],
+            key: Callable[[Any], Hashable] = id,
+            **kwargs):
+        super().__init__(master, style='PlaylistFrame.TLabelframe')
+        self._format_row: Callable[[Any, int], str] = format_row
+        self._key: Callable[[Any], Hashable] = key
+        self._items: List[Any] = []
+        self._keys: List[Hashable] = []
+        self._rows: Dict[int, List[Optional[str]]] = {}
+        self._rendered: Tuple[str, ...] = ()
+        self._top: int = 0
+        self._visible: int = 1
+        self._width: int = 0
+        self.selected: Optional[int] = None
+        self.active: int = 0
+
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_columnconfigure(1, weight=0)
+        self.listbox: Listbox = Listbox(self, **kwargs)
+        self._scrollbar: Scrollbar = Scrollbar(
+            self, orient=VERTICAL, style='Vertical.TScrollbar', command=self.yview)
+        self._scrollbar.grid(row=0, column=1, padx=0, pady=0, sticky='NSEW')
+        self.listbox.grid(row=0, column=0, padx=0, pady=0, sticky='NSEW')
+
+        self.listbox.bind('<Configure>', self._on_configure)
+        self.listbox.bind('<Button-4>',   lambda _: self._scroll(-3))
+        self.listbox.bind('<Button-5>',   lambda _: self._scroll(3))
+        self.listbox.bind('<MouseWheel>', lambda e: self._scroll(-3 if e.delta > 0 else 3))
+        self.listbox.bind('<Up>',         lambda _: self._move(-1))
+        self.listbox.bind('<Down>',       lambda _: self._move(1))
+        self.listbox.bind('<Prior>',      lambda _: self._move(-self._visible))
+        self.listbox.bind('<Next>',       lambda _: self._move(self._visible))
+        self.listbox.bind('<Home>',       lambda _: self._move(-len(self._items)))
+        self.listbox.bind('<End>',        lambda _: self._move(len(self._items)))
+
+    def size(self) -> int:
+        """Number of items"""
+        return len(self._items)
+
+    def set_items(self, items: List[Any]) -> None:
+        """Replace content, keeping formatted rows of items outside of the changed range"""
+        keys: List[Hashable] = [self._key(i) for i in items]
+        start, old_end, new_end = _diff_range(self._keys, keys)
+        for rows in self._rows.values():
+            rows[start:old_end] = [None] * (new_end - start)
+        self._items = list(items)
+        self._keys = keys
+        if self.selected is not None and self.selected >= len(self._items):
+            self.selected = None
+        self.active = min(self.active, max(len(self._items) - 1, 0))
+        self._top = self._clamp_top(self._top)
+        self._render()
+
+    def index(self, y: int) -> int:
+        """Absolute index of the row at given y coordinate"""
+        return min(self._top + self.listbox.nearest(y), max(len(self._items) - 1, 0))
+
+    def select(self, index: Optional[int]) -> None:
+        """Select row, None clears selection"""
+        self.selected = index
+        self._render_marks()
+
+    def activate(self, index: int) -> None:
+        """Move keyboard cursor to row"""
+        self.active = max(0, min(index, len(self._items) - 1))
+        self._render_marks()
+
+    def see(self, index: int) -> None:
+        """Scroll so that row is visible"""
+        if index < self._top:
+            self._set_top(index)
+        elif index >= self._top + self._visible:
+            self._set_top(index - self._visible + 1)
+
+    def yview(self, *args) -> None:
+        """Scrollbar command"""
+        if not args:
+            return
+        if args[0] == 'moveto':
+            self._set_top(round(float(args[1]) * len(self._items)))
+        elif args[0] == 'scroll':
+            step: int = int(args[1])
+            self._scroll(step * self._visible if args[2] == 'pages' else step)
+
+    def _scroll(self, rows: int) -> str:
+        self._set_top(self._top + rows)
+        return 'break'
+
+    def _move(self, rows: int) -> str:
+        if self._items:
+            self.activate(self.active + rows)
+            self.see(self.active)
+        return 'break'
+
+    def _set_top(self, top: int) -> None:
+        top = self._clamp_top(top)
+        if top != self._top:
+            self._top = top
+            self._render()
+
+    def _clamp_top(self, top: int) -> int:
+        return max(0, min(top, len(self._items) - self._visible))
+
+    def _on_configure(self, event) -> None:
+        visible: int = max(1, (event.height - 2 * int(self.listbox['highlightthickness']))
+                           // (main_font_linespace() + 1))
+        width: int = event.width // measure_main_font()
+        if (visible, width) == (self._visible, self._width):
+            return
+        self._visible = visible
+        if width != self._width:
+            self._width = width
+            if width not in self._rows:
+                if len(self._rows) >= self._WIDTHS_CACHED:
+                    self._rows.pop(next(iter(self._rows)))
+                self._rows[width] = [None] * len(self._items)
+        self._top = self._clamp_top(self._top)
+        self._render()
+
+    def _render(self) -> None:
+        """Put visible rows into Tk widget, it costs the same for any list length"""
+        rows: Optional[List[Optional[str]]] = self._rows.get(self._width)
+        end: int = min(self._top + self._visible, len(self._items))
+        if rows is not None:
+            for idx in range(self._top, end):
+                if rows[idx] is None:
+                    rows[idx] = self._format_row(self._items[idx], self._width)
+            visible: Tuple[str, ...] = tuple(rows[self._top:end])
+        else:
+            visible = ()
+        if visible != self._rendered:
+            self.listbox.delete(0, END)
+            if visible:
+                self.listbox.insert(END, *visible)
+            self._rendered = visible
+        if self._items:
+            self._scrollbar.set(self._top / len(self._items), end / len(self._items))
+        else:
+            self._scrollbar.set(0, 1)
+        self._render_marks()
+
+    def _render_marks(self) -> None:
+        self.listbox.select_clear(0, END)
+        if self.selected is not None and 0 <= self.selected - self._top < len(self._rendered):
+            self.listbox.select_set(self.selected - self._top)
+        if 0 <= self.active - self._top < len(self._rendered):
+            self.listbox.activate(self.active - self._top)
+
+def _diff_range(old: List[Hashable], new: List[Hashable]) -> Tuple[int, int, int]:
+    """
+    Find the range which differs between two lists after stripping common prefix and suffix.
+    Returns start of the range and its ends in old and new lists.
+    """
+    limit: int = min(len(old), len(new))
+    start: int = 0
+    while start < limit and old[start] == new[start]:
+        start += 1
+    suffix: int = 0
+    while suffix < limit - start and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    return start, len(old) - suffix, len(new) - suffix
@@ -1,4 +1,5 @@
 """UI styling helpers"""
+from functools import lru_cache
 from tkinter import SOLID, SINGLE, BROWSE
 from tkinter.font import Font
 from tkinter.ttk import Style
@@ -21,10 +22,19 @@ mode_font       :Tuple[str, int] = (MAIN_FONT,      fontsize + 4)
 status_font     :Tuple[str, int] = (MAIN_FONT,      fontsize - 2)
 progress_font   :Tuple[str, int] = (PROGRESS_FONT,  fontsize + 2)
 
+@lru_cache(maxsize=None)
+def _get_main_font() -> Font:
+    return Font(family=main_font[0], size=main_font[1])
+
+@lru_cache(maxsize=None)
 def measure_main_font() -> int:
     """Returns width of one character in pixels"""
-    font: Font = Font(family=main_font[0], size=main_font[1])
-    return font.measure(' ')
+    return _get_main_font().measure(' ')
+
+@lru_cache(maxsize=None)
+def main_font_linespace() -> int:
+    """Returns height of one line in pixels"""
+    return _get_main_font().metrics('linespace')
 
 def build_styles(style: Style) -> None:
     """Build custom styles used in application UI"""
@@ -128,6 +138,9 @@ def build_styles(style: Style) -> None:
         foreground=fgcolor,
         font=main_font,
         )
+    style.configure('CoverLabel.TLabel',
+        background=bgcolor,
+        )
 
     style.configure('SettingsLabel.TLabel',
         background=bgcolor,
@@ -72,6 +72,13 @@ class MainFrame(Frame):
         if self.playlist_frame:
             self.playlist_frame.update_position()
 
+    def focus_playlist_filter(self) -> None:
+        """
+        Move focus to the filter box of the PlaylistFrame
+        """
+        if self.playlist_frame:
+            self.playlist_frame.filter_input.focus_force()
+
     def update_playlist_content(self) -> None:
         """
         Update playlist content
@@ -6,6 +6,7 @@ from aioprocessing import AioQueue
 
 from yamusic.player import YaPlayer
 
+from ...__utils.controls import CoverLabel
 from ...__utils.styling import padding
 
 from .mode_source import ModeSourceState
@@ -23,6 +24,8 @@ class DisplayFrame(LabelFrame):
         self.mode_source: ModeSourceState = ModeSourceState(self)
         self.config(labelwidget=self.mode_source)
         self.progress_frame = ProgressPane(self, padding=padding)
+        self.cover = CoverLabel(self, style='CoverLabel.TLabel')
+        self.cover.grid(row=0, column=1, padx=padding, pady=padding, sticky='NE')
         self.grid(row=0, column=0, padx=padding, pady=padding, sticky='NEWS')
 
     @property
@@ -2,19 +2,20 @@
 from tkinter.ttk import LabelFrame
 
 
-from ...__utils.controls import SpinnerLabel, ProgressLabel, VolumeLabel
+from ...__utils.clock import get_frame_clock
+from ...__utils.controls import SpinnerLabel, ProgressLabel, VolumeLabel, set_text
 from ...__utils.styling import progress_chars, padding
 
 class ProgressPane(LabelFrame):
     """Container for Spinner, Progress and Volume widgets, also displays current track nam"""
-    def __init__(self, master, scroll_delay_ms :int=400, **kwargs):
+    def __init__(self, master, hold_ticks :int=3, **kwargs):
         super().__init__(master, style='ProgressFrame.TLabelframe', **kwargs)
         self._window: int  = progress_chars - 5
         self._title: str = None
         self._window_pos: int = 0
-        self._job: str = None
         self._scroll_direction: int = 1
-        self._delay_ms: int = scroll_delay_ms
+        self._hold_ticks: int = hold_ticks
+        self._hold: int = 0
         self.grid_columnconfigure(0, weight=0)
         self.grid_columnconfigure(1, weight=0)
         self.grid_columnconfigure(0, weight=0)
@@ -31,26 +32,29 @@ class ProgressPane(LabelFrame):
         if len(title) > self._window:
             self._title = f' {title} '
             self._step()
+            get_frame_clock(self).subscribe(self._step)
         else:
-            self['text'] = f' {title} '
+            set_text(self, f' {title} ')
 
     def _step(self) -> None:
-        delay: int = self._delay_ms
+        """Scroll title by one character per clock tick, hold it for a while at both ends"""
+        if self._hold > 0:
+            self._hold -= 1
+            return
         end: int = self._window_pos + self._window
-        self['text'] = self._title[self._window_pos: end]
+        set_text(self, self._title[self._window_pos: end])
         if self._scroll_direction > 0:
             if end == len(self._title):
-                delay = self._delay_ms * 3
+                self._hold = self._hold_ticks - 1
                 self._scroll_direction = -1
         elif self._scroll_direction < 0:
             if self._window_pos == 0:
-                delay = self._delay_ms * 3
+                self._hold = self._hold_ticks - 1
                 self._scroll_direction = 1
         self._window_pos += self._scroll_direction
-        self._job = self.after(delay, self._step)
 
     def _cancel(self) -> None:
-        if self._job is not None:
-            self.after_cancel(self._job)
-            self._job = None
-            self._window_pos = 0
+        get_frame_clock(self).unsubscribe(self._step)
+        self._window_pos = 0
+        self._scroll_direction = 1
+        self._hold = 0
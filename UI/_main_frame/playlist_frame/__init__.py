@@ -1,15 +1,16 @@
 """STUB"""
-from tkinter.ttk import Frame, Scrollbar
-from tkinter import ACTIVE, Listbox, Variable, VERTICAL
+from tkinter import END
+from tkinter.ttk import Entry, Frame
 from typing import List
 
 import utils.constants.events as ev
 from yamusic import YaTrack
 
+from ...__utils.controls import VirtualListbox
 from ...__utils.styling import (
     bgcolor,
     focuscolor,
-    measure_main_font,
+    main_font,
     padding,
     ListBoxStyle,
 )
@@ -20,43 +21,86 @@ class PlaylistFrame(Frame):
         super().__init__(
             *args, style='PlaylistFrame.TLabelframe', **kwargs)
         self.grid_rowconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=0)
         self.grid_columnconfigure(0, weight=1)
-        self.grid_columnconfigure(1, weight=0)
-
-        self._list_var = Variable()
-        self.list: Listbox = Listbox(self,listvariable=self._list_var, **ListBoxStyle)
-        scrollbar: Scrollbar = Scrollbar(
-            self, orient=VERTICAL, style='Vertical.TScrollbar', command=self.list.yview)
-        self.list['yscrollcommand'] = scrollbar.set
-        scrollbar.grid(row=0, column=1, padx=0, pady=0, sticky='NSEW')
+        self._matches: List[int] = []
+        self._match: int = 0
+
+        self.list: VirtualListbox = VirtualListbox(
+            self,
+            format_row=lambda track, width: track.fixed_width(width),
+            key=lambda track: track.track_id,
+            **ListBoxStyle)
         self.list.grid(row=0, column=0, padx=0, pady=0, sticky='NSEW')
 
-        self.list.bind('<FocusIn>',  self._on_enter)
-        self.list.bind('<FocusOut>', self._on_leave)
-        self.list.bind('<Escape>',   self._on_leave)
-        self.list.bind('<space>',    self._on_select)
-        self.list.bind('<Return>',   self._on_select)
-        self.list.bind('<Double-1>', self._on_select)
-        self.list.bind('<Motion>',   self._on_mouseover)
+        self.list.listbox.bind('<FocusIn>',  self._on_enter)
+        self.list.listbox.bind('<FocusOut>', self._on_leave)
+        self.list.listbox.bind('<Escape>',   self._on_leave)
+        self.list.listbox.bind('<space>',    self._on_select)
+        self.list.listbox.bind('<Return>',   self._on_select)
+        self.list.listbox.bind('<Double-1>', self._on_select)
+        self.list.listbox.bind('<Motion>',   self._on_mouseover)
+
+        self.filter_input: Entry = Entry(self, style='Search.TEntry', font=main_font)
+        self.filter_input.grid(row=1, column=0, padx=0, pady=(padding / 2, 0), sticky='NSEW')
+        self.filter_input.bind('<KeyRelease>', self._on_filter)
+        self.filter_input.bind('<Return>',     self._on_filter_select)
+        self.filter_input.bind('<Down>',       lambda _: self._next_match(1))
+        self.filter_input.bind('<Up>',         lambda _: self._next_match(-1))
+        self.filter_input.bind('<Escape>',     self._on_filter_leave)
 
     def _on_select(self, _):
-        self.list.select_clear(self.list.curselection()[0])
-        self.list.select_set(self.list.index(ACTIVE))
+        if not self.list.size():
+            return 'break'
+        self.list.select(self.list.active)
         self.master.ui_queue.put(
-            {'type': ev.TYPE_SKIP_POS, 'position': self.list.curselection()[0]})
+            {'type': ev.TYPE_SKIP_POS, 'position': self.list.active})
+        # Keep Listbox from selecting by itself: selection is rendered by VirtualListbox
+        return 'break'
 
     def _on_enter(self, _):
-        self.list.config(selectforeground=focuscolor)
-        self.list.focus_force()
+        self.list.listbox.config(selectforeground=focuscolor)
+        self.list.listbox.focus_force()
 
     def _on_leave(self, _):
-        self.list.config(selectforeground=bgcolor)
+        self.list.listbox.config(selectforeground=bgcolor)
         self.update_position()
         self.master.focus_force()
 
     def _on_mouseover(self, event):
-        index = self.list.index(f'@{event.x},{event.y}')
-        self.list.activate(index)
+        self.list.activate(self.list.index(event.y))
+
+    def _on_filter(self, event):
+        if event.keysym in ('Return', 'Up', 'Down', 'Escape'):
+            return
+        self._matches = self.master.player.search_playlist(self.filter_input.get())
+        self._match = 0
+        self._show_match()
+
+    def _next_match(self, step: int):
+        if self._matches:
+            self._match = (self._match + step) % len(self._matches)
+            self._show_match()
+        return 'break'
+
+    def _show_match(self):
+        if self._matches:
+            self.list.activate(self._matches[self._match])
+            self.list.see(self._matches[self._match])
+
+    def _on_filter_select(self, _):
+        """Play found track"""
+        if self._matches:
+            position: int = self._matches[self._match]
+            self.list.select(position)
+            self.master.ui_queue.put({'type': ev.TYPE_SKIP_POS, 'position': position})
+        return 'break'
+
+    def _on_filter_leave(self, _):
+        self.filter_input.delete(0, END)
+        self._matches = []
+        self.update_position()
+        self.master.focus_force()
 
     def show(self) -> None:
         """Show the frame"""
@@ -70,16 +114,15 @@ class PlaylistFrame(Frame):
     def update_position(self):
         """Set cursor to current playlist position"""
         position: int = self.master.player.get_playlist_position()
-        if self.list.curselection():
-            self.list.select_clear(self.list.curselection()[0])
-        self.list.select_set(position)
+        self.list.select(position)
         self.list.activate(position)
         self.list.see(position)
 
     def fill_playlist(self):
-        """Set playlist content"""
-        self.update_idletasks()
+        """
+        Set playlist content.
+        Only changed rows are re-formatted, only visible rows are passed to Tk.
+        """
         tracks: List[YaTrack] = self.master.player.get_short_playlist()
-        list_char_width = self.list.winfo_width() // measure_main_font()
-        self._list_var.set([t.fixed_width(list_char_width) for t in tracks])
+        self.list.set_items(tracks)
         self.update_position()
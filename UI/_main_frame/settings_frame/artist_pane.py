@@ -16,6 +16,9 @@ MODE_CANDIDATES : int = 0
 MODE_ALBUMS     : int = 1
 MODE_TRACKS     : int = 2
 
+SEARCH_DEBOUNCE_MS  : int = 350
+SEARCH_MIN_CHARS    : int = 2
+
 MOD_ICONS       : Dict[int,str] = {
     MODE_CANDIDATES: ARTIST_ICON,
     MODE_ALBUMS: ALBUM_ICON,
@@ -28,6 +31,9 @@ class ArtistPane(Frame):
         super().__init__(*args, style='CFrame.TFrame', **kwargs)
         self.result_mode: str = ''
         self.artist_id: str = None
+        self._search_job: str = None
+        self._last_query: str = None
+        self._focus_results: bool = False
         self.grid_columnconfigure(0, weight=1)
         self.grid_columnconfigure(1, weight=0)
         self.grid_rowconfigure(0, weight=1)
@@ -37,7 +43,8 @@ class ArtistPane(Frame):
             self, style='Search.TEntry', font=main_font, width=40)
         self.search_input.grid(row=0, column=0, padx=(0, padding / 2), pady=0, sticky='nsew')
         self.search_input.focus_force()
-        self.search_input.bind('<Return>', lambda _ : self._query_candidates())
+        self.search_input.bind('<Return>', lambda _ : self._query_candidates(focus=True))
+        self.search_input.bind('<KeyRelease>', self._on_typing)
         self.search_input.bind('<Escape>', lambda _ : self._close())
 
         SettingsButton(
@@ -55,11 +62,25 @@ class ArtistPane(Frame):
     def _close(self):
         self.master.ui_queue.put({'type': TYPE_KEY, 'keycode': KEY_SETTINGS})
 
-    def _query_candidates(self):
+    def _on_typing(self, _):
+        """Search after user pauses typing, every keystroke restarts the delay"""
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(SEARCH_DEBOUNCE_MS, self._query_candidates)
+
+    def _query_candidates(self, focus: bool = False):
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+            self._search_job = None
+        query: str = ' '.join(self.search_input.get().split())
+        if not focus and (len(query) < SEARCH_MIN_CHARS or query.casefold() == self._last_query):
+            return
+        self._last_query = query.casefold()
+        self._focus_results = focus
         self.result_mode = MODE_CANDIDATES
         self.master.ui_queue.put({
             'type': TYPE_QUERY_ARTISTS,
-            'query': self.search_input.get()})
+            'query': query})
 
     def _query_albums(self):
         self.result_mode = MODE_ALBUMS
@@ -77,12 +98,14 @@ class ArtistPane(Frame):
     def fill_results_list(self, values: List[Value]):
         self.results_list.set_values(values, MOD_ICONS[self.result_mode])
         self.results_list.activate(0)
-        self.results_list.focus_force()
+        if self.result_mode != MODE_CANDIDATES or self._focus_results:
+            self.results_list.focus_force()
         if self.result_mode == MODE_CANDIDATES:
             self.results_list.select_set(0)
             self.results_list.bind('<Return>', lambda _ : self._query_albums())
         elif self.result_mode == MODE_ALBUMS:
             self.search_input.delete(0, END)
+            self._last_query = None
             self.results_list['selectmode'] = MULTIPLE
             self.results_list.bind('<Return>', lambda _ : self._query_tracks())
         elif self.result_mode == MODE_TRACKS:
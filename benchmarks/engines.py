@@ -0,0 +1,119 @@
+"""
+Compare playbin and playbin3 engines of GstPlayer:
+gaps between consecutive tracks, time to first audio and CPU time of Gstreamer process.
+
+Usage: python -m benchmarks.engines [tracks] [seconds per track]
+Requires session D-Bus, because GstPlayer exports MPRIS service.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+from json import loads
+from statistics import mean
+from typing import Dict, List, Optional
+
+import psutil
+from aioprocessing import AioManager, AioProcess, AioQueue
+
+from utils.constants.events import TYPE_ATF
+from utils.log_handlers import qos_handler
+from yamusic.controllers import YaTrack
+from yamusic.gstreamer import gst
+from gi.repository import Gst                                                                       # pylint: disable=import-error,wrong-import-order
+
+_RATE           : int = 44100
+_SAMPLES        : int = 1024
+
+
+def make_track(path: str, seconds: float) -> None:
+    """Render a sine wave of given length into WAV file"""
+    buffers: int = int(seconds * _RATE / _SAMPLES)
+    pipeline: Gst.Element = Gst.parse_launch(
+        f'audiotestsrc num-buffers={buffers} samplesperbuffer={_SAMPLES} '
+        f'! audio/x-raw,rate={_RATE} ! wavenc ! filesink location={path}')
+    pipeline.set_state(Gst.State.PLAYING)
+    pipeline.get_bus().timed_pop_filtered(
+        Gst.CLOCK_TIME_NONE, Gst.MessageType.EOS | Gst.MessageType.ERROR)
+    pipeline.set_state(Gst.State.NULL)
+
+
+async def _run_engine(engine: str, tracks: List[str], seconds: float) -> Dict[str, float]:
+    dashboard = AioManager().dict(gst.DASHBOARD)
+    command_queue: AioQueue = AioQueue()
+    media_queue: AioQueue = AioQueue()
+    ui_event_queue: AioQueue = AioQueue()
+    process: AioProcess = AioProcess(
+        target=gst.run_player,
+        args=(dashboard, command_queue, media_queue, ui_event_queue),
+        kwargs={'engine': engine},
+        )
+    process.start()                                                                                 # pylint: disable=no-member
+    cpu: psutil.Process = psutil.Process(process.pid)                                               # pylint: disable=no-member
+
+    pending: List[str] = list(tracks)
+
+    async def enqueue() -> None:
+        uri: str = f'file://{pending.pop(0)}'
+        track: YaTrack = YaTrack(title=uri, track_id=uri, uri=uri, duration=int(seconds))
+        await media_queue.coro_put(track.to_json_str())                                             # pylint: disable=no-member
+
+    await enqueue()
+    while pending:
+        message: Dict = await ui_event_queue.coro_get()                                             # pylint: disable=no-member
+        if message['type'] == TYPE_ATF:
+            await enqueue()
+    # Let the last track finish
+    await asyncio.sleep(seconds + 1)
+    cpu_times = cpu.cpu_times()
+    await command_queue.coro_put((gst.CMD_SHUTDOWN, {}))                                            # pylint: disable=no-member
+    await process.coro_join()                                                                       # pylint: disable=no-member
+
+    # dashboard keeps the last finished and current records only, so read them from QoS log
+    records: List[Dict] = _read_qos_log(len(tracks))
+    starts: List[float] = [r['stream_started_at'] for r in records if r['stream_started_at']]
+    gaps: List[float] = [
+        (later - earlier - seconds) * 1000 for earlier, later in zip(starts, starts[1:])]
+    return {
+        'gap_ms': mean(gaps) if gaps else float('nan'),
+        'max_gap_ms': max(gaps) if gaps else float('nan'),
+        'first_audio_ms': mean(
+            r['time_to_first_audio'] for r in records if r['time_to_first_audio'] is not None),
+        'cpu_s': cpu_times.user + cpu_times.system,
+    }
+
+
+def _read_qos_log(count: int) -> List[Dict]:
+    with open(qos_handler.baseFilename, 'r', encoding='utf-8') as log:
+        return [loads(line) for line in log.readlines()[-count:]]
+
+
+async def main(count: int, seconds: float) -> None:
+    """Run both engines over the same generated tracks and print comparison"""
+    Gst.init(None)
+    with tempfile.TemporaryDirectory() as tmp:
+        tracks: List[str] = [os.path.join(tmp, f'{idx}.wav') for idx in range(count)]
+        for path in tracks:
+            make_track(path, seconds)
+        results: Dict[str, Optional[Dict[str, float]]] = {}
+        for engine in gst.ENGINES:
+            if not Gst.ElementFactory.find(engine):
+                results[engine] = None
+                continue
+            results[engine] = await _run_engine(engine, tracks, seconds)
+
+    print(f'{count} tracks, {seconds:.0f} s each')
+    print(f'{"engine":<10}{"gap ms":>10}{"max gap":>10}{"1st audio":>11}{"cpu s":>8}')
+    for engine, res in results.items():
+        if res is None:
+            print(f'{engine:<10}{"not available":>30}')
+            continue
+        print(f'{engine:<10}{res["gap_ms"]:>10.1f}{res["max_gap_ms"]:>10.1f}'
+              f'{res["first_audio_ms"]:>11.1f}{res["cpu_s"]:>8.2f}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 5,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 15.0,
+        ))
@@ -0,0 +1,79 @@
+"""
+Compare memory and CPU of GUI client and headless daemon while they play.
+Both run from the same config, so they play the same source.
+
+Usage: python -m benchmarks.footprint [seconds]
+Requires valid token, X display for the GUI and session D-Bus for MPRIS.
+"""
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import psutil
+
+_WARMUP         : float = 15.0
+_SAMPLE_DELAY   : float = 1.0
+_MODES          : Dict[str, List[str]] = {
+    'gui': [sys.executable, 'client.py'],
+    'daemon': [sys.executable, 'daemon.py'],
+}
+
+
+def _tree(proc: psutil.Process) -> List[psutil.Process]:
+    try:
+        return [proc, *proc.children(recursive=True)]
+    except psutil.NoSuchProcess:
+        return []
+
+
+def _sample(proc: psutil.Process) -> Dict[str, float]:
+    rss: int = 0
+    cpu: float = 0.0
+    for child in _tree(proc):
+        try:
+            rss += child.memory_full_info().uss
+            times = child.cpu_times()
+            cpu += times.user + times.system
+        except psutil.NoSuchProcess:
+            continue
+    return {'uss_mb': rss / 1024 / 1024, 'cpu_s': cpu}
+
+
+def _run_mode(command: List[str], seconds: float) -> Dict[str, float]:
+    popen: subprocess.Popen = subprocess.Popen(                                                     # pylint: disable=consider-using-with
+        command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    proc: psutil.Process = psutil.Process(popen.pid)
+    time.sleep(_WARMUP)
+    start: Dict[str, float] = _sample(proc)
+    peak: float = start['uss_mb']
+    deadline: float = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        time.sleep(_SAMPLE_DELAY)
+        peak = max(peak, _sample(proc)['uss_mb'])
+    end: Dict[str, float] = _sample(proc)
+    children: List[psutil.Process] = _tree(proc)[1:]
+    popen.terminate()
+    popen.wait(timeout=30)
+    for child in children:
+        if child.is_running():
+            child.kill()
+    return {
+        'uss_mb': end['uss_mb'],
+        'peak_mb': peak,
+        'cpu_pct': (end['cpu_s'] - start['cpu_s']) / seconds * 100,
+    }
+
+
+def main(seconds: float) -> None:
+    """Run GUI and daemon one after another and print their footprint"""
+    results: Dict[str, Dict[str, float]] = {
+        mode: _run_mode(command, seconds) for mode, command in _MODES.items()}
+    print(f'{seconds:.0f} s of playback after {_WARMUP:.0f} s warmup, process tree totals')
+    print(f'{"mode":<8}{"USS MB":>9}{"peak MB":>9}{"CPU %":>8}')
+    for mode, res in results.items():
+        print(f'{mode:<8}{res["uss_mb"]:>9.1f}{res["peak_mb"]:>9.1f}{res["cpu_pct"]:>8.2f}')
+
+
+if __name__ == '__main__':
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 60.0)
@@ -0,0 +1,106 @@
+"""
+Compare full Listbox refill, which PlaylistFrame used to do, with VirtualListbox:
+initial fill, refill after a few tracks changed, and scrolling.
+
+Usage: python -m benchmarks.playlist_view [rows]
+Requires X display.
+"""
+import sys
+from random import randrange
+from statistics import mean
+from time import perf_counter
+from tkinter import Listbox, Tk, Variable
+from typing import Callable, Dict, List
+
+from UI.__utils.controls import VirtualListbox
+from UI.__utils.styling import ListBoxStyle, measure_main_font
+from yamusic.controllers import YaTrack
+
+_SCROLLS        : int = 1000
+_CHANGED        : int = 10
+_WIDTH          : int = 640
+_HEIGHT         : int = 480
+
+
+def _timed(func: Callable, root: Tk) -> float:
+    started: float = perf_counter()
+    func()
+    root.update()
+    return (perf_counter() - started) * 1000
+
+
+def _make_tracks(count: int) -> List[YaTrack]:
+    return [
+        YaTrack(artist=f'Artist {idx % 997}', title=f'Track number {idx}',
+                track_id=str(idx), duration=180 + idx % 120)
+        for idx in range(count)]
+
+
+def _with_changes(tracks: List[YaTrack]) -> List[YaTrack]:
+    changed: List[YaTrack] = list(tracks)
+    for idx in range(_CHANGED):
+        pos: int = randrange(len(changed))
+        changed[pos] = YaTrack(artist='New', title=f'Replacement {idx}', track_id=f'new{idx}')
+    return changed
+
+
+def _bench_listbox(root: Tk, tracks: List[YaTrack], changed: List[YaTrack]) -> Dict[str, float]:
+    var: Variable = Variable()
+    listbox: Listbox = Listbox(root, listvariable=var, **ListBoxStyle)
+    listbox.place(x=0, y=0, width=_WIDTH, height=_HEIGHT)
+    root.update()
+
+    def fill(items: List[YaTrack]) -> None:
+        width: int = listbox.winfo_width() // measure_main_font()
+        var.set([t.fixed_width(width) for t in items])
+
+    result: Dict[str, float] = {
+        'fill_ms': _timed(lambda: fill(tracks), root),
+        'refill_ms': _timed(lambda: fill(changed), root),
+        'scroll_ms': mean(
+            _timed(lambda: listbox.yview_moveto(randrange(1000) / 1000), root)
+            for _ in range(_SCROLLS)),
+    }
+    listbox.destroy()
+    return result
+
+
+def _bench_virtual(root: Tk, tracks: List[YaTrack], changed: List[YaTrack]) -> Dict[str, float]:
+    view: VirtualListbox = VirtualListbox(
+        root,
+        format_row=lambda track, width: track.fixed_width(width),
+        key=lambda track: track.track_id,
+        **ListBoxStyle)
+    view.place(x=0, y=0, width=_WIDTH, height=_HEIGHT)
+    root.update()
+    result: Dict[str, float] = {
+        'fill_ms': _timed(lambda: view.set_items(tracks), root),
+        'refill_ms': _timed(lambda: view.set_items(changed), root),
+        'scroll_ms': mean(
+            _timed(lambda: view.yview('moveto', randrange(1000) / 1000), root)
+            for _ in range(_SCROLLS)),
+    }
+    view.destroy()
+    return result
+
+
+def main(count: int) -> None:
+    """Run both list implementations over the same tracks and print comparison"""
+    root: Tk = Tk()
+    root.geometry(f'{_WIDTH}x{_HEIGHT}')
+    tracks: List[YaTrack] = _make_tracks(count)
+    changed: List[YaTrack] = _with_changes(tracks)
+    results: Dict[str, Dict[str, float]] = {
+        'Listbox': _bench_listbox(root, tracks, changed),
+        'Virtual': _bench_virtual(root, tracks, changed),
+    }
+    root.destroy()
+
+    print(f'{count} rows, {_CHANGED} changed on refill, {_SCROLLS} scrolls')
+    print(f'{"widget":<10}{"fill ms":>10}{"refill ms":>11}{"scroll ms":>11}')
+    for name, res in results.items():
+        print(f'{name:<10}{res["fill_ms"]:>10.1f}{res["refill_ms"]:>11.1f}{res["scroll_ms"]:>11.3f}')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
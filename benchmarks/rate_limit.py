@@ -0,0 +1,77 @@
+"""
+Simulate an API which answers 429 above its capacity and measure how TokenBucket adapts:
+background sync requests flood it while foreground playback requests come once a second.
+
+Usage: python -m benchmarks.rate_limit [seconds]
+"""
+import asyncio
+import sys
+from collections import deque
+from statistics import median
+from time import monotonic
+from typing import Deque, Dict, List
+
+from utils.ratelimit import PRIORITY_BACKGROUND, PRIORITY_FOREGROUND, TokenBucket
+
+_CAPACITY       : float = 8.0
+_LATENCY        : float = 0.05
+_SYNC_WORKERS   : int = 16
+_FOREGROUND_GAP : float = 1.0
+
+
+class _Api:
+    """Answers 429 when more than _CAPACITY requests came within the last second"""
+    def __init__(self):
+        self._recent: Deque[float] = deque()
+        self.stats: Dict[str, int] = {'ok': 0, '429': 0}
+
+    async def request(self) -> bool:
+        now: float = monotonic()
+        while self._recent and now - self._recent[0] > 1.0:
+            self._recent.popleft()
+        self._recent.append(now)
+        await asyncio.sleep(_LATENCY)
+        if len(self._recent) > _CAPACITY:
+            self.stats['429'] += 1
+            return False
+        self.stats['ok'] += 1
+        return True
+
+
+async def _call(api: _Api, bucket: TokenBucket, priority: int) -> None:
+    while True:
+        await bucket.acquire(priority)
+        started: float = monotonic()
+        if await api.request():
+            bucket.succeeded(monotonic() - started)
+            return
+        bucket.throttled()
+
+
+async def main(seconds: float) -> None:
+    """Run sync flood with and without foreground requests and print the outcome"""
+    api: _Api = _Api()
+    bucket: TokenBucket = TokenBucket(20.0)
+    waits: List[float] = []
+    deadline: float = monotonic() + seconds
+
+    async def sync_worker() -> None:
+        while monotonic() < deadline:
+            await _call(api, bucket, PRIORITY_BACKGROUND)
+
+    async def playback() -> None:
+        while monotonic() < deadline:
+            started: float = monotonic()
+            await _call(api, bucket, PRIORITY_FOREGROUND)
+            waits.append((monotonic() - started - _LATENCY) * 1000)
+            await asyncio.sleep(_FOREGROUND_GAP)
+
+    await asyncio.gather(playback(), *[sync_worker() for _ in range(_SYNC_WORKERS)])
+    print(f'{seconds:.0f} s, API capacity {_CAPACITY:.0f}/s, {_SYNC_WORKERS} sync workers')
+    print(f'{"ok/s":>8}{"429":>8}{"final rate":>12}{"fg wait med ms":>16}{"fg wait max ms":>16}')
+    print(f'{api.stats["ok"] / seconds:>8.1f}{api.stats["429"]:>8}{bucket.rate:>12.1f}'
+          f'{median(waits):>16.0f}{max(waits):>16.0f}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main(float(sys.argv[1]) if len(sys.argv) > 1 else 30.0))
@@ -0,0 +1,66 @@
+"""
+Measure TrackIndex on a synthetic collection:
+initial build, incremental update and query latency for Latin and Cyrillic queries.
+
+Usage: python -m benchmarks.search_index [tracks]
+"""
+import sys
+from random import Random
+from statistics import median
+from time import perf_counter
+from typing import List
+
+from yamusic.controllers import YaTrack
+from yamusic.search_index import TrackIndex
+
+_WORDS          : List[str] = [
+    'love', 'night', 'dance', 'heart', 'fire', 'moon', 'rain', 'Beyoncé', 'Mötley', 'Crüe',
+    'ёлка', 'звезда', 'город', 'Мумий', 'Тролль', 'кино', 'весна', 'дорога', 'небо', 'Земфира',
+]
+_QUERIES        : List[str] = [
+    'love', 'BEYONCE', 'motley crue', 'елка', 'мум тро', 'звёзд', 'ки', 'night fire', 'zzz',
+]
+_REPEATS        : int = 100
+_CHANGED        : int = 100
+
+
+def _make_tracks(count: int, rnd: Random) -> List[YaTrack]:
+    return [
+        YaTrack(
+            title=' '.join(rnd.sample(_WORDS, 3)),
+            artist=rnd.choice(_WORDS).title(),
+            album=f'{rnd.choice(_WORDS)} {idx % 700}',
+            track_id=str(idx))
+        for idx in range(count)]
+
+
+def main(count: int) -> None:
+    """Build index and print timings"""
+    rnd: Random = Random(0)
+    tracks: List[YaTrack] = _make_tracks(count, rnd)
+    index: TrackIndex = TrackIndex()
+
+    started: float = perf_counter()
+    index.update(tracks)
+    print(f'build {count} tracks: {(perf_counter() - started) * 1000:.0f} ms')
+
+    # New likes appear at the top, some old ones are removed
+    changed: List[YaTrack] = _make_tracks(_CHANGED, rnd)
+    for idx, track in enumerate(changed):
+        track.track_id = f'new{idx}'
+    started = perf_counter()
+    index.update(changed + tracks[_CHANGED:])
+    print(f'update {_CHANGED} added/removed: {(perf_counter() - started) * 1000:.1f} ms')
+
+    print(f'{"query":<14}{"hits":>8}{"median ms":>11}{"max ms":>9}')
+    for query in _QUERIES:
+        times: List[float] = []
+        for _ in range(_REPEATS):
+            started = perf_counter()
+            hits: List[int] = index.search(query)
+            times.append((perf_counter() - started) * 1000)
+        print(f'{query:<14}{len(hits):>8}{median(times):>11.2f}{max(times):>9.2f}')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
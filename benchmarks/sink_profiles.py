@@ -0,0 +1,78 @@
+"""
+Compare audio sink profiles of GstPlayer:
+control latency of play, pause, volume and seek commands and wakeups per second.
+
+Usage: python -m benchmarks.sink_profiles [sink]
+sink is one of: auto, pulse, pipewire, alsa, fakesink.
+Requires session D-Bus, because GstPlayer exports MPRIS service.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+from typing import Dict
+
+from aioprocessing import AioManager, AioProcess, AioQueue
+
+from yamusic.controllers import YaTrack
+from yamusic.gstreamer import gst
+from yamusic.gstreamer.sink import PROFILES, SINK_AUTO
+from gi.repository import Gst                                                                       # pylint: disable=import-error,wrong-import-order
+
+from .engines import make_track
+
+_TRACK_SECONDS  : float = 30.0
+_IDLE_SECONDS   : float = 6.0
+_COMMAND_DELAY  : float = 1.0
+
+
+async def _run_profile(sink: str, profile: str, track: str) -> Dict:
+    dashboard = AioManager().dict(gst.DASHBOARD)
+    command_queue: AioQueue = AioQueue()
+    media_queue: AioQueue = AioQueue()
+    process: AioProcess = AioProcess(
+        target=gst.run_player,
+        args=(dashboard, command_queue, media_queue, AioQueue()),
+        kwargs={'sink': {'sink': sink, 'profile': profile}},
+        )
+    process.start()                                                                                 # pylint: disable=no-member
+    uri: str = f'file://{track}'
+    await media_queue.coro_put(                                                                     # pylint: disable=no-member
+        YaTrack(title=uri, track_id=uri, uri=uri, duration=int(_TRACK_SECONDS)).to_json_str())
+    # Uninterrupted playback first, to measure wakeups
+    await asyncio.sleep(_IDLE_SECONDS)
+    for command, args in [
+            (gst.CMD_PAUSE, {}),
+            (gst.CMD_PLAY, {}),
+            (gst.CMD_SET_VOLUME, {'volume': 0.5}),
+            (gst.CMD_SET_POSITION, {'position': 10})]:
+        await command_queue.coro_put((command, args))                                               # pylint: disable=no-member
+        await asyncio.sleep(_COMMAND_DELAY)
+    stats: Dict = dashboard[gst.DASH_SINK] or {}
+    await command_queue.coro_put((gst.CMD_SHUTDOWN, {}))                                            # pylint: disable=no-member
+    await process.coro_join()                                                                       # pylint: disable=no-member
+    return stats
+
+
+async def main(sink: str) -> None:
+    """Run every profile over the same generated track and print comparison"""
+    Gst.init(None)
+    results: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        track: str = os.path.join(tmp, 'track.wav')
+        make_track(track, _TRACK_SECONDS)
+        for profile in PROFILES:
+            results[profile] = await _run_profile(sink, profile, track)
+
+    print(f'sink: {sink}, control latency in ms')
+    print(f'{"profile":<13}{"play":>8}{"pause":>8}{"volume":>8}{"seek":>8}{"wakeups/s":>11}')
+    for profile, res in results.items():
+        latency: Dict[str, float] = res.get('control_latency', {})
+        row: str = ''.join(
+            f'{latency.get(cmd, float("nan")):>8.1f}'
+            for cmd in [gst.CMD_PLAY, gst.CMD_PAUSE, gst.CMD_SET_VOLUME, gst.CMD_SET_POSITION])
+        print(f'{profile:<13}{row}{res.get("wakeups") or float("nan"):>11.1f}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else SINK_AUTO))
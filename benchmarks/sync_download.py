@@ -0,0 +1,72 @@
+"""
+Measure Downloader against a local HTTP server which simulates CDN latency:
+one transfer at a time, as sync.py used to do, versus concurrent transfers.
+
+Usage: python -m benchmarks.sync_download [files]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+from time import perf_counter
+from typing import List
+
+from aiohttp import web
+
+from yamusic.sync.download import Downloader
+
+_FILE_SIZE      : int = 8 * 1024 * 1024
+_CHUNK          : int = 256 * 1024
+_LATENCY        : float = 0.3
+_CHUNK_DELAY    : float = 0.005
+_PORT           : int = 18765
+_CONCURRENCY    : List[int] = [1, 4, 8]
+
+
+async def _serve_file(request: web.Request) -> web.StreamResponse:
+    await asyncio.sleep(_LATENCY)
+    response: web.StreamResponse = web.StreamResponse(headers={'Content-Length': str(_FILE_SIZE)})
+    await response.prepare(request)
+    payload: bytes = b'\0' * _CHUNK
+    for _ in range(_FILE_SIZE // _CHUNK):
+        await response.write(payload)
+        await asyncio.sleep(_CHUNK_DELAY)
+    return response
+
+
+async def _run(count: int, concurrency: int, target_dir: str) -> float:
+    downloader: Downloader = Downloader(concurrency)
+    semaphore: asyncio.Semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(idx: int) -> None:
+        async with semaphore:
+            await downloader.fetch(
+                f'http://127.0.0.1:{_PORT}/{idx}', os.path.join(target_dir, f'{idx}.mp3'))
+
+    started: float = perf_counter()
+    await asyncio.gather(*[fetch(idx) for idx in range(count)])
+    elapsed: float = perf_counter() - started
+    await downloader.close()
+    return elapsed
+
+
+async def main(count: int) -> None:
+    """Download the same set of files with different concurrency and print timings"""
+    app: web.Application = web.Application()
+    app.router.add_get('/{idx}', _serve_file)
+    runner: web.AppRunner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', _PORT).start()
+    print(f'{count} files of {_FILE_SIZE // 1024 // 1024} MB, {_LATENCY * 1000:.0f} ms first byte')
+    print(f'{"workers":<9}{"seconds":>9}{"MB/s":>8}')
+    try:
+        for concurrency in _CONCURRENCY:
+            with tempfile.TemporaryDirectory() as target_dir:
+                elapsed: float = await _run(count, concurrency, target_dir)
+            print(f'{concurrency:<9}{elapsed:>9.2f}{count * _FILE_SIZE / 1024 / 1024 / elapsed:>8.1f}')
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 16))
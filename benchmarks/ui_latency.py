@@ -0,0 +1,99 @@
+"""
+Measure Tk frame intervals while a large playlist response is parsed,
+either on the Tk thread, as the UI used to do, or on PlayerWorker loop.
+
+Usage: python -m benchmarks.ui_latency [tracks]
+Requires X display.
+"""
+import asyncio
+import json
+import sys
+from statistics import median, quantiles
+from time import perf_counter
+from tkinter import Tk
+from types import SimpleNamespace
+from typing import Callable, Dict, List
+
+from yamusic.worker import PlayerWorker
+
+_FRAME_MS       : int = 16
+_SETTLE_MS      : int = 500
+
+
+def _make_response(count: int) -> str:
+    """JSON shaped like fetch_tracks_async response"""
+    return json.dumps({'result': [
+        {
+            'id': str(idx),
+            'title': f'Track {idx}',
+            'durationMs': 180000,
+            'artists': [{'id': idx % 1000, 'name': f'Artist {idx % 1000}', 'genres': ['rock']}],
+            'albums': [{'id': idx % 5000, 'title': f'Album {idx % 5000}', 'year': 2000,
+                        'coverUri': 'avatars.yandex.net/get-music-content/%%'}],
+            'coverUri': 'avatars.yandex.net/get-music-content/%%',
+        } for idx in range(count)]})
+
+
+def _parse(response: str) -> int:
+    """Parse response and build objects from it, like yandex_music de_json does"""
+    return len(json.loads(response, object_hook=lambda obj: SimpleNamespace(**obj)).result)
+
+
+def _measure(root: Tk, load: Callable[[Callable[[], None]], None]) -> List[float]:
+    """Record frame intervals from load start until it reports completion"""
+    intervals: List[float] = []
+    state: Dict = {'last': perf_counter(), 'done': False}
+
+    def frame() -> None:
+        now: float = perf_counter()
+        intervals.append((now - state['last']) * 1000)
+        state['last'] = now
+        if state['done']:
+            root.after(_SETTLE_MS, root.quit)
+        else:
+            root.after(_FRAME_MS, frame)
+
+    def done() -> None:
+        state['done'] = True
+
+    root.after(_FRAME_MS, frame)
+    root.after(_FRAME_MS * 3, lambda: load(done))
+    root.mainloop()
+    return intervals
+
+
+def main(count: int) -> None:
+    """Parse the same response on both threads and print frame interval statistics"""
+    response: str = _make_response(count)
+    root: Tk = Tk()
+    worker: PlayerWorker = PlayerWorker().start()
+
+    async def parse_async() -> int:
+        return _parse(response)
+
+    def on_tk_thread(done: Callable[[], None]) -> None:
+        _parse(response)
+        done()
+
+    def on_worker(done: Callable[[], None]) -> None:
+        future = asyncio.run_coroutine_threadsafe(parse_async(), worker.loop)
+        future.add_done_callback(lambda _: root.after(0, done))
+
+    results: Dict[str, List[float]] = {
+        'tk thread': _measure(root, on_tk_thread),
+        'worker': _measure(root, on_worker),
+    }
+    worker.loop.call_soon_threadsafe(worker.loop.stop)
+    root.destroy()
+
+    print(f'{count} tracks, target frame {_FRAME_MS} ms')
+    print(f'{"parsed on":<12}{"frames":>8}{"median":>9}{"p95":>9}{"max":>9}{">33ms":>8}')
+    for name, intervals in results.items():
+        p95: float = quantiles(intervals, n=20)[-1] if len(intervals) > 1 else intervals[0]
+        slow: int = len([i for i in intervals if i > _FRAME_MS * 2])
+        print(f'{name:<12}{len(intervals):>8}{median(intervals):>9.1f}{p95:>9.1f}'
+              f'{max(intervals):>9.1f}{slow:>8}')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
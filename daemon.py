@@ -0,0 +1,32 @@
+"""
+Yandex.Music player daemon for Linux, runs without UI.
+
+Usage:
+    python daemon.py            start daemon
+    python daemon.py <command>  send command to running daemon, e.g. skip, play, status
+"""
+import asyncio
+import json
+import logging
+import sys
+
+from headless import COMMANDS, run_daemon, send_command
+from utils.log_handlers import stderr_handler
+
+logging.basicConfig(encoding='utf-8', level=logging.INFO, handlers=[stderr_handler])
+
+try:
+    import uvloop                                                                                   # pylint: disable=import-error
+except ImportError:
+    uvloop = None
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        try:
+            print(json.dumps(asyncio.run(send_command(sys.argv[1])), ensure_ascii=False, indent=2))
+        except OSError as exc:
+            sys.exit(f'Daemon is not running: {exc}. Commands: status, {", ".join(sorted(COMMANDS))}')
+    else:
+        if uvloop is not None:
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        asyncio.run(run_daemon())
@@ -0,0 +1,248 @@
+"""
+Runs Yandex.Music player without UI, controlled via MPRIS and local command socket
+"""
+import asyncio
+import json
+import logging
+import os
+import signal
+from typing import Dict, Optional
+
+import psutil
+from aioprocessing import AioQueue
+
+from utils.constants.app import APP_NAME
+import utils.config as cfg
+import utils.constants.events as ev
+import utils.constants.player as const
+import utils.constants.ui as keys
+from yamusic import (
+    YaPlayer,
+    YaPlayerError,
+    STATE_BUFFERING,
+    STATE_ERR,
+    STATE_PAUSED,
+    STATE_PLAYING,
+    )
+
+_LOGGER = logging.getLogger(__name__)
+
+CMD_STATUS          : str = 'status'
+
+# Socket commands and keypress actions of the UI they map onto
+COMMANDS            : Dict[str, int] = {
+    'again': keys.KEY_ZERO,
+    'back': keys.KEY_BACK,
+    'exit': keys.KEY_EXIT,
+    'fwd': keys.KEY_FWD,
+    'like': keys.KEY_LIKE,
+    'mute': keys.KEY_MUTE,
+    'play': keys.KEY_PLAY,
+    'playlist': keys.KEY_PLAYLIST,
+    'radio': keys.KEY_RADIO,
+    'repeat': keys.KEY_REPEAT,
+    'skip': keys.KEY_SKIP,
+    'voldown': keys.KEY_VOLDOWN,
+    'volup': keys.KEY_VOLUP,
+}
+
+_VOLUME_STEP        : float = 0.1
+
+
+def socket_path() -> str:
+    """Path of the command socket: config key control_socket or $XDG_RUNTIME_DIR/yaMusic.sock"""
+    runtime_dir: str = os.environ.get('XDG_RUNTIME_DIR', f'/tmp/{APP_NAME}-{os.getuid()}')
+    return cfg.get_key('control_socket', default=os.path.join(runtime_dir, f'{APP_NAME}.sock'))
+
+
+async def send_command(command: str) -> Dict:
+    """Send command to running daemon and return its reply"""
+    reader, writer = await asyncio.open_unix_connection(socket_path())
+    writer.write(f'{command}\n'.encode())
+    await writer.drain()
+    reply: bytes = await reader.readline()
+    writer.close()
+    await writer.wait_closed()
+    return json.loads(reply)
+
+
+class _Daemon:
+    """
+    Same event loop as UI has, but without Tk:
+    player events and socket commands are handled by a plain asyncio loop.
+    """
+    def __init__(self):
+        self._ui_events: AioQueue = AioQueue()
+        self._player: YaPlayer = None
+        self._server: asyncio.AbstractServer = None
+        self._muted: Optional[float] = None
+        self._process: psutil.Process = psutil.Process()
+
+    async def loop(self) -> None:
+        """Start player and command socket, handle events until exit command"""
+        try:
+            mode: Optional[str] = None
+            if cfg.get_key('mode', default=const.DEFAULT_MODE) == const.MODE_ARTIST:
+                # Artist has to be picked in UI, play radio without changing configured mode
+                _LOGGER.warning('Artist mode is not available without UI, starting radio.')
+                mode = const.MODE_RADIO
+            self._player = YaPlayer(self._ui_events, mode=mode)
+            await self._player.init()
+            await self._player.start()
+            await self._start_server()
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                asyncio.get_running_loop().add_signal_handler(
+                    signum, self._ui_events.put, {'type': ev.TYPE_SHUTDOWN})
+            while True:
+                message: Dict = await self._ui_events.coro_get()                                   # pylint: disable=no-member
+                if message['type'] == ev.TYPE_SHUTDOWN:
+                    break
+                await self._handle_event(message)
+        except YaPlayerError as exc:
+            _LOGGER.error('Cannot start player: %s. Shutting down.', exc)
+        finally:
+            await self._shutdown()
+
+    async def _shutdown(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            try:
+                os.unlink(socket_path())
+            except OSError:
+                pass
+        if self._player:
+            await self._player.shutdown()
+        _LOGGER.debug('Daemon loop exit')
+
+    async def _start_server(self) -> None:
+        path: str = socket_path()
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        if os.path.exists(path):
+            os.unlink(path)
+        self._server = await asyncio.start_unix_server(self._handle_client, path=path)
+        os.chmod(path, 0o600)
+        _LOGGER.info('Listening for commands on %s', path)
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while line := await reader.readline():
+                command: str = line.decode(errors='replace').strip().lower()
+                reply: Dict
+                if command == CMD_STATUS:
+                    reply = {'ok': True, **self.status()}
+                elif command in COMMANDS:
+                    await self._ui_events.coro_put(                                                 # pylint: disable=no-member
+                        {'type': ev.TYPE_KEY, 'keycode': COMMANDS[command]})
+                    reply = {'ok': True}
+                else:
+                    reply = {'ok': False, 'error': f'Unknown command: {command}',
+                             'commands': sorted([CMD_STATUS, *COMMANDS])}
+                writer.write(f'{json.dumps(reply)}\n'.encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def status(self) -> Dict:
+        """Player state and resource usage of daemon with its Gstreamer process"""
+        track = self._player.current_track if self._player else None
+        processes = [self._process, *self._process.children(recursive=True)]
+        rss: int = 0
+        cpu: float = 0.0
+        for proc in processes:
+            try:
+                rss += proc.memory_info().rss
+                times = proc.cpu_times()
+                cpu += times.user + times.system
+            except psutil.NoSuchProcess:
+                continue
+        return {
+            'mode': self._player.mode if self._player else None,
+            'state': self._player.state if self._player else None,
+            'track': str(track) if track else None,
+            'position': self._player.position if self._player else None,
+            'volume': self._player.volume if self._player else None,
+            'rss_mb': round(rss / 1024 / 1024, 1),
+            'cpu_s': round(cpu, 2),
+        }
+
+    async def _handle_event(self, event: Dict) -> None:
+        event_type: int = event['type']
+        _LOGGER.debug('Got event of type %s', ev.TYPE_TO_STR[event_type])
+        if event_type == ev.TYPE_STATE:
+            if self._player.state == STATE_ERR:
+                _LOGGER.error('Player error: %s', self._player.error)
+        elif event_type == ev.TYPE_KEY:
+            await self._handle_keypress(event['keycode'])
+        elif event_type == ev.TYPE_TAGS:
+            _LOGGER.info('Now playing: %s', self._player.current_track)
+        elif event_type == ev.TYPE_ATF:
+            await self._player.prefetch_next_track()
+        elif event_type == ev.TYPE_TRACK_START:
+            await self._player.track_started(event.get('track_id'))
+        elif event_type == ev.TYPE_SKIP_NEXT:
+            await self._player.skip()
+        elif event_type == ev.TYPE_SKIP_POS:
+            await self._player.skip_to_playlist_position(event.get('position'))
+        elif event_type == ev.TYPE_RECOVER:
+            await self._player.recover(event.get('position', 0))
+        elif event_type == ev.TYPE_STATUS:
+            _LOGGER.info(event.get('status', 'Unknown'))
+
+    async def _handle_keypress(self, keycode: int) -> None:
+        """Player actions of UI._handle_keypress, UI-only keys are ignored"""
+        if keycode == keys.KEY_LIKE:
+            await self._player.like_track()
+        elif keycode == keys.KEY_SKIP:
+            await self._player.skip()
+        elif keycode == keys.KEY_FWD:
+            await self._player.skip_forward()
+        elif keycode == keys.KEY_ZERO:
+            await self._player.play_again()
+        elif keycode == keys.KEY_REPEAT:
+            await self._player.repeat()
+        elif keycode == keys.KEY_BACK:
+            await self._player.skip_back()
+        elif keycode == keys.KEY_VOLUP:
+            await self._set_volume((self._player.volume or 0) + _VOLUME_STEP)
+        elif keycode == keys.KEY_VOLDOWN:
+            await self._set_volume((self._player.volume or 0) - _VOLUME_STEP)
+        elif keycode == keys.KEY_MUTE:
+            if self._muted is None:
+                self._muted = self._player.volume
+                await self._player.set_volume(0)
+            else:
+                await self._set_volume(self._muted)
+        elif keycode == keys.KEY_PLAY:
+            state: str = self._player.state
+            if state in [STATE_PAUSED]:
+                await self._player.play()
+            elif state in [STATE_PLAYING, STATE_BUFFERING]:
+                await self._player.pause()
+        elif keycode == keys.KEY_PLAYLIST:
+            await self._player.switch_mode(const.MODE_PLAYLIST)
+        elif keycode == keys.KEY_RADIO:
+            await self._player.switch_mode(const.MODE_RADIO)
+        elif keycode == keys.KEY_EXIT:
+            await self._ui_events.coro_put({'type': ev.TYPE_SHUTDOWN})                             # pylint: disable=no-member
+        else:
+            _LOGGER.debug('Key %s is not available without UI.', keycode)
+
+    async def _set_volume(self, volume: float) -> None:
+        self._muted = None
+        await self._player.set_volume(round(max(0.0, min(volume, 1.0)), 1))
+
+
+async def run_daemon() -> None:
+    """Run player without UI"""
+    daemon: _Daemon = _Daemon()
+    await daemon.loop()
+
+__all__ = [
+    'COMMANDS',
+    'run_daemon',
+    'send_command',
+    'socket_path',
+]
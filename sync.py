@@ -1,29 +1,38 @@
-"""Sync favorites"""
+"""
+Sync favorites.
+
+Usage:
+    python sync.py              download liked tracks missing in sync_dir
+    python sync.py reconcile    rebuild sync state from files already in sync_dir
+"""
 import sys
-from typing import List
+from typing import List, Optional, Set
 
 
 import asyncio
-import json
 import logging
-import os
 
 import aiotkinter
-import requests
-
-from mutagen.mp3 import MP3, error
-from mutagen.id3 import ID3, TIT2, TPE1, TAL
-
 
-from yandex_music import ClientAsync
+from yandex_music import ClientAsync, Track, TracksList
 import utils.config as cfg
 from utils.log_handlers import stderr_handler
+from utils.ratelimit import LIMITER, PRIORITY_BACKGROUND, set_priority
 from utils.token import get_token
 
 from yamusic.controllers import (
     ControllerError,
-    PlaylistController,
-    YaTrack
+    SourceController,
+    )
+from yamusic.sync import (
+    META_LIKES_REVISION,
+    ReconcileReport,
+    Reconciler,
+    SyncEngine,
+    SyncError,
+    SyncProgress,
+    SyncState,
+    bare_id,
     )
 
 logging.basicConfig(encoding='utf-8', level=logging.INFO, handlers=[stderr_handler])
@@ -31,76 +40,105 @@ asyncio.set_event_loop_policy(aiotkinter.TkinterEventLoopPolicy())
 
 async def sync():
     """
-    sync whole favorites collection
+    sync favorites collection changed since the last synced likes revision
     """
     logger = logging.getLogger(__name__)
+    # Sync yields to playback when both share the limiter
+    set_priority(PRIORITY_BACKGROUND)
     sync_dir: str = cfg.get_key('sync_dir')
-    ssync_file: str = os.path.join(sync_dir, 'syncdata.json')
-    synced: List[str] = []
     exit_code: int  = 0
     downloaded: int = 0
     skipped: int = 0
     errored: int = 0
 
-    if os.path.exists(ssync_file):
-        with open(ssync_file, 'r', encoding='utf-8') as f:
-            synced = json.load(f)
-
     try:
-        client: ClientAsync = ClientAsync(token=get_token())
-        controller = await PlaylistController(client, playlist_id='my_likes').init()
-        await controller.set_source()
-    except ControllerError as exc:
+        state: SyncState = SyncState(sync_dir)
+    except SyncError as exc:
         logger.error('Cannot start: %s', exc)
         sys.exit(127)
+    revision: int = int(state.get_meta(META_LIKES_REVISION, 0))
+    synced: Set[str] = state.track_ids()
 
-    logger.info('Got %d tracks in collection', len(controller._playlist) )
     try:
-        for t in controller._playlist:
-            if t.track_id in synced:
-                skipped += 1
-            else:
-                url: str = await controller._get_track_url(t, codec='mp3', high_res=True)
-                current_track: YaTrack = controller._to_internal_short(t)
-                await asyncio.sleep(1)
-                response = requests.get(url, timeout=10)
-
-                if response.status_code == 200:
-                    file_name: str = os.path.join(
-                        sync_dir,
-                        f'{current_track.artist.replace(os.path.sep,'_')} - {current_track.album.replace(os.path.sep,'_')} - {current_track.title.replace(os.path.sep,'_')} ({current_track.track_id}).mp3')
-                    with open(file_name, 'wb') as f:
-                        f.write(response.content)
-                    audio = MP3(file_name, ID3=ID3)
-                    try:
-                        audio.add_tags()
-                    except error:
-                        pass # tags already present
+        controller = SourceController(ClientAsync(token=get_token()))
+        await controller.init()
+        engine = SyncEngine(controller, sync_dir, state)
+        # Unchanged collection comes without tracks
+        likes: Optional[TracksList] = await controller._get_liked_tracks_list(revision)
+        new_ids: List[str] = []
+        liked: Set[str] = synced
+        if likes and (likes.tracks or likes.revision != revision):
+            logger.info('Got %d tracks in collection, revision %d', len(likes.tracks), likes.revision)
+            liked_bare: Set[str] = {bare_id(t.track_id) for t in likes.tracks}
+            synced_bare: Set[str] = {bare_id(i) for i in synced}
+            new_ids = [t.track_id for t in likes.tracks if bare_id(t.track_id) not in synced_bare]
+            liked = {i for i in synced if bare_id(i) in liked_bare}
+        else:
+            logger.info('Collection unchanged since revision %d', revision)
+        damaged: List[Track] = await engine.find_damaged(liked)
+        if damaged:
+            logger.info('Repairing %d damaged files', len(damaged))
+        outdated: List[str] = engine.find_outdated(liked)
+        if outdated:
+            logger.info('Re-encoding %d files with changed transcode profile', len(outdated))
+        pending: List[Track] = await engine.hydrate(new_ids + outdated) + damaged
+    except (ControllerError, SyncError) as exc:
+        logger.error('Cannot start: %s', exc)
+        state.close()
+        sys.exit(127)
+    skipped = len(liked) - len(damaged) - len(outdated)
 
-                    audio.tags.add(TIT2(encoding=3, text=current_track.title))
-                    audio.tags.add(TPE1(encoding=3, text=current_track.artist))
-                    audio.tags.add(TAL(encoding=3, text=current_track.album))
-                    audio.save()
-                    synced.append(current_track.track_id)
-                    downloaded += 1
-                    logger.info('Sync: %s', file_name)
-                else:
-                    logger.warning(
-                        'Failed (%s): %s', 
-                        response.status_code, 
-                        f'{current_track.artist} - {current_track.album} - {current_track.title} ({current_track.track_id})')
-                    errored += 1
+    try:
+        progress: SyncProgress = await engine.run(pending)
+        downloaded, errored = progress.downloaded, progress.errored
+        if likes and not errored:
+            # Failed tracks are listed again next time only while revision stays behind
+            state.set_meta(META_LIKES_REVISION, str(likes.revision))
     except Exception as exc:
         logger.error('Thrown %s, exiting', exc)
         exit_code = 128
     finally:
-        with open(ssync_file, 'w', encoding='utf-8') as f:
-            json.dump(synced, f, ensure_ascii=False, indent=2)
+        state.close()
         logger.info(
-            'Sync completed. Synced: %d. Skipped: %d. Errored: %d', 
+            'Sync completed. Synced: %d. Skipped: %d. Errored: %d',
             downloaded, skipped, errored)
+        logger.debug('Request rates: %s', LIMITER.stats())
         sys.exit(exit_code)
 
+async def reconcile():
+    """
+    rebuild sync state from tracks found in sync_dir, report files not belonging to it
+    """
+    logger = logging.getLogger(__name__)
+    sync_dir: str = cfg.get_key('sync_dir')
+    try:
+        state: SyncState = SyncState(sync_dir)
+    except SyncError as exc:
+        logger.error('Cannot start: %s', exc)
+        sys.exit(127)
+    try:
+        report: ReconcileReport = await Reconciler(
+            sync_dir, state, cfg.get_key('sync_workers')).run()
+    except OSError as exc:
+        logger.error('Cannot scan %s: %s', sync_dir, exc)
+        sys.exit(127)
+    finally:
+        state.close()
+    for path, error in sorted(report.damaged.items()):
+        logger.warning('Damaged, will be downloaded again: %s: %s', path, error)
+    for bare, paths in sorted(report.duplicates.items()):
+        logger.warning('Duplicates of %s: %s', bare, ', '.join(paths))
+    for path in sorted(report.orphans):
+        logger.warning('Not a synced track: %s', path)
+    for path in sorted(report.partials):
+        logger.info('Partial download: %s', path)
+    logger.info('Reconcile completed. %s', report)
+
 
 if __name__ == "__main__":
-    asyncio.run(sync())
+    if len(sys.argv) > 1 and sys.argv[1] == 'reconcile':
+        asyncio.run(reconcile())
+    elif len(sys.argv) > 1:
+        sys.exit(f'Unknown command {sys.argv[1]}. Commands: reconcile')
+    else:
+        asyncio.run(sync())
@@ -0,0 +1,24 @@
+"""TokenBucket priorities at low rates"""
+import asyncio
+import unittest
+
+from utils.ratelimit import PRIORITY_BACKGROUND, TokenBucket
+
+_TIMEOUT    : float = 2.0
+
+
+class TokenBucketTest(unittest.IsolatedAsyncioTestCase):
+    async def test_background_acquire_at_low_rate(self):
+        bucket: TokenBucket = TokenBucket(1.5)
+        await asyncio.wait_for(bucket.acquire(PRIORITY_BACKGROUND), _TIMEOUT)
+
+    async def test_background_acquire_after_throttling(self):
+        bucket: TokenBucket = TokenBucket(10.0)
+        bucket.throttled(retry_after=0)
+        bucket.throttled(retry_after=0)
+        self.assertEqual(bucket.rate, 2.5)
+        await asyncio.wait_for(bucket.acquire(PRIORITY_BACKGROUND), _TIMEOUT)
+
+
+if __name__ == '__main__':
+    unittest.main()
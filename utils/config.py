@@ -43,6 +43,7 @@ if not isdir(_CONFIG_DIR):
     raise ConfigError(f'{_CONFIG_DIR} is not a directory!')
 
 _CONFIG_PATH: str = join(_CONFIG_DIR, CONFIG_NAME)
+_CACHE_DIR: str = join(os.environ.get('XDG_CACHE_HOME', join(expanduser('~'), '.cache')), APP_NAME)
 
 if not exists(_CONFIG_PATH):
     _touch(_CONFIG_PATH, mode=0o600)
@@ -74,6 +75,15 @@ def set_key(key: str, val: Union[int, float, str, Dict, List]) -> None:
     """Set config value by key"""
     CONFIG[key] = val
 
+def get_cache_dir(name: str) -> str:
+    """Get (and create if needed) application cache subdirectory"""
+    path: str = join(_CACHE_DIR, name)
+    try:
+        os.makedirs(path, exist_ok=True)
+    except OSError as err:
+        raise ConfigError(f'Failed to create cache dir {path}: {err}')                              # pylint: disable=raise-missing-from
+    return path
+
 def get_station_settings(station_id: str, default=None) -> Optional[Dict]:
     """Get station settings by its id"""
     if not CONFIG.get('station_settings'):
@@ -90,6 +100,7 @@ __all__ = [
     'save',
     'get_key',
     'set_key',
+    'get_cache_dir',
     'get_station_settings',
     'set_station_settings',
 ]
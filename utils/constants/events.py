@@ -14,14 +14,20 @@ TYPE_SKIP_POS       : int = 8
 TYPE_QUERY_ARTISTS  : int = 9
 TYPE_QUERY_ALBUMS   : int = 10
 TYPE_QUERY_TRACKS   : int = 11
+TYPE_BUFFERING      : int = 12
+TYPE_RECOVER        : int = 13
+TYPE_SKIP_NEXT      : int = 14
+TYPE_TRACK_START    : int = 15
 TYPE_SHUTDOWN       : int = 255
 
 TYPE_TO_STR :Dict[int, str] = {
     TYPE_ATF:           'TYPE_ATF',
+    TYPE_BUFFERING:     'TYPE_BUFFERING',
     TYPE_KEY:           'TYPE_KEY',
     TYPE_REPEAT:        'TYPE_REPEAT',
     TYPE_RESIZE:        'TYPE_RESIZE',
     TYPE_SHUTDOWN:      'TYPE_SHUTDOWN',
+    TYPE_SKIP_NEXT:     'TYPE_SKIP_NEXT',
     TYPE_SKIP_POS:      'TYPE_SKIP_POS',
     TYPE_STATE:         'TYPE_STATE',
     TYPE_STATUS:        'TYPE_STATUS',
@@ -29,5 +35,7 @@ TYPE_TO_STR :Dict[int, str] = {
     TYPE_QUERY_ARTISTS: 'TYPE_QUERY_ARTISTS',
     TYPE_QUERY_ALBUMS:  'TYPE_QUERY_ALBUMS',
     TYPE_QUERY_TRACKS:  'TYPE_QUERY_TRACKS',
+    TYPE_RECOVER:       'TYPE_RECOVER',
     TYPE_TAGS:          'TYPE_TAGS',
+    TYPE_TRACK_START:   'TYPE_TRACK_START',
 }
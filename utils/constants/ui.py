@@ -10,6 +10,7 @@ KEY_RADIO           : int = 27  # r
 KEY_PLAYLIST        : int = 33  # p
 KEY_ARTIST          : int = 38  # a
 KEY_SETTINGS        : int = 39  # s
+KEY_FIND            : int = 41  # f
 KEY_LIKE            : int = 46  # l
 KEY_REPEAT          : int = 54  # c
 KEY_VIS             : int = 55  # v
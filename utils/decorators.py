@@ -3,15 +3,17 @@ Controller helpers
 """
 from asyncio import sleep
 from functools import wraps
+from time import monotonic
 
 
 def aiohttp_retry(
     to_catch: Exception, to_raise: Exception,
     timeout: float=2.0, num_tries:int=3, retry_delay=0.3,
-    logger=None):
+    logger=None, limiter=None):
     """
     Retries aiohttp request after to_catch exceptions with total num_tries tries
     Adds timeout to request
+    Every try waits for limiter token of the endpoint named after func and reports its outcome
     Rises to_raise when no retries left
     """
     def retry_decorator(func):
@@ -19,9 +21,14 @@ def aiohttp_retry(
         async def wrapper(*args, **kwargs):
             _tries = num_tries + 1
             while _tries > 1:
+                if limiter:
+                    await limiter.acquire(func.__name__)
+                started = monotonic()
                 try:
-                    return await func(*args, timeout=timeout, **kwargs)
+                    result = await func(*args, timeout=timeout, **kwargs)
                 except to_catch as exc:
+                    if limiter:
+                        limiter.failed(func.__name__, exc)
                     _tries -= 1
                     if _tries == 1:
                         if logger:
@@ -30,6 +37,10 @@ def aiohttp_retry(
                     if logger:
                         logger.warning(f'{func.__name__} raised: {exc}')
                     await sleep(retry_delay)
+                else:
+                    if limiter:
+                        limiter.succeeded(func.__name__, monotonic() - started)
+                    return result
 
         return wrapper
     return retry_decorator
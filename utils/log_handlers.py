@@ -1,6 +1,7 @@
 """Log handlers"""
 
 import logging
+from logging.handlers import RotatingFileHandler
 
 from utils.constants.app import APP_NAME
 
@@ -35,3 +36,8 @@ stderr_handler.setFormatter(ColorFormatter(_FMT_STRING))
 
 file_handler = logging.FileHandler(f'{APP_NAME}.log')
 file_handler.setFormatter(ColorFormatter(_FMT_STRING))
+
+# Playback QoS records, one JSON object per line
+qos_handler = RotatingFileHandler(
+    f'{APP_NAME}.qos.log', maxBytes=1024 * 1024, backupCount=3, delay=True)
+qos_handler.setFormatter(logging.Formatter('%(message)s'))
@@ -0,0 +1,174 @@
+"""
+Adaptive token bucket rate limiting of Yandex.Music requests
+"""
+import asyncio
+import logging
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import monotonic
+from typing import Dict, Iterator, Optional
+
+from utils.config import get_key
+
+_LOGGER = logging.getLogger(__name__)
+
+PRIORITY_FOREGROUND : int = 0
+PRIORITY_BACKGROUND : int = 1
+
+DEFAULT_RATE        : float = 10.0
+_MIN_RATE           : float = 0.5
+_MAX_RATE_FACTOR    : float = 4.0
+# Tokens the bucket holds, in seconds of the current rate
+_BURST_SECONDS      : float = 0.5
+# Share of the bucket background requests leave for foreground ones
+_RESERVE            : float = 0.25
+# Latency above which the rate is decreased slightly, seconds
+_SLOW_LATENCY       : float = 1.5
+# Rate increase per second of successful requests, requests per second
+_INCREASE_STEP      : float = 0.5
+_SLOW_FACTOR        : float = 0.9
+_THROTTLE_FACTOR    : float = 0.5
+# Pause after 429 without Retry-After, seconds
+_THROTTLE_PAUSE     : float = 2.0
+_MIN_WAIT           : float = 0.01
+_STATUS_429         : re.Pattern = re.compile(r'\b429\b')
+
+_priority: ContextVar[int] = ContextVar('rate_priority', default=PRIORITY_FOREGROUND)
+
+
+def set_priority(priority: int) -> None:
+    """Set priority of requests made by current task and tasks it creates later"""
+    _priority.set(priority)
+
+
+@contextmanager
+def background() -> Iterator[None]:
+    """Requests inside the block give way to foreground ones"""
+    token = _priority.set(PRIORITY_BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """
+    Token bucket with additive increase of the rate while requests succeed fast
+    and multiplicative decrease on slow responses and throttling.
+    Throttling responses to requests already in flight during a pause
+    do not decrease the rate again.
+    Foreground requests are served first, background ones
+    never take the last _RESERVE share of tokens.
+    """
+    def __init__(self, rate: float):
+        self.rate: float = rate
+        self._base_rate: float = rate
+        self._tokens: float = self._burst()
+        self._updated: float = monotonic()
+        self._blocked_until: float = 0.0
+        self._foreground_waiting: int = 0
+
+    async def acquire(self, priority: int = PRIORITY_FOREGROUND) -> None:
+        """Wait for a token"""
+        foreground: bool = priority == PRIORITY_FOREGROUND
+        if foreground:
+            self._foreground_waiting += 1
+        try:
+            while True:
+                now: float = monotonic()
+                self._refill(now)
+                wait: float = self._blocked_until - now
+                if wait <= 0:
+                    reserve: float = 0.0 if foreground else self._reserve()
+                    if self._tokens >= 1 + reserve and (foreground or not self._foreground_waiting):
+                        self._tokens -= 1
+                        return
+                    wait = (1 + reserve - self._tokens) / self.rate
+                await asyncio.sleep(max(wait, _MIN_WAIT))
+        finally:
+            if foreground:
+                self._foreground_waiting -= 1
+
+    def succeeded(self, latency: float) -> None:
+        """Adapt rate to successful request latency"""
+        if latency > _SLOW_LATENCY:
+            self.rate = max(_MIN_RATE, self.rate * _SLOW_FACTOR)
+        else:
+            # Every request adds its share, so the rate grows by a step per second
+            self.rate = min(
+                self._base_rate * _MAX_RATE_FACTOR, self.rate + _INCREASE_STEP / self.rate)
+
+    def throttled(self, retry_after: Optional[float] = None) -> None:
+        """Halve the rate and pause for Retry-After or a default delay"""
+        now: float = monotonic()
+        if now >= self._blocked_until:
+            self.rate = max(_MIN_RATE, self.rate * _THROTTLE_FACTOR)
+        self._tokens = 0.0
+        self._blocked_until = max(
+            self._blocked_until, now + (retry_after if retry_after is not None else _THROTTLE_PAUSE))
+
+    def _burst(self) -> float:
+        return max(1.0, self.rate * _BURST_SECONDS)
+
+    def _reserve(self) -> float:
+        # A small bucket at a low rate must still fit a background request
+        return min(self._burst() * _RESERVE, self._burst() - 1)
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self._burst(), self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class RateLimiter:
+    """
+    Per-endpoint token buckets, created on first use.
+    Rates, requests per second, come from config, e.g.
+    api_rate_limit: {default: 10, _get_track_direct_link: 5}
+    """
+    def __init__(self):
+        self._rates: Dict[str, float] = get_key('api_rate_limit', {}) or {}
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def bucket(self, endpoint: str) -> TokenBucket:
+        """Bucket of the endpoint"""
+        if endpoint not in self._buckets:
+            self._buckets[endpoint] = TokenBucket(
+                float(self._rates.get(endpoint, self._rates.get('default', DEFAULT_RATE))))
+        return self._buckets[endpoint]
+
+    async def acquire(self, endpoint: str) -> None:
+        """Wait for a token of the endpoint with priority of current task"""
+        await self.bucket(endpoint).acquire(_priority.get())
+
+    def succeeded(self, endpoint: str, latency: float) -> None:
+        """Report successful request and its latency"""
+        self.bucket(endpoint).succeeded(latency)
+
+    def failed(self, endpoint: str, exc: Exception) -> None:
+        """Report failed request, throttling errors slow the endpoint down"""
+        if _STATUS_429.search(str(exc)):
+            self.throttled(endpoint)
+
+    def throttled(self, endpoint: str, retry_after: Optional[float] = None) -> None:
+        """Report 429 response with optional Retry-After, seconds"""
+        bucket: TokenBucket = self.bucket(endpoint)
+        bucket.throttled(retry_after)
+        _LOGGER.warning('%s throttled, rate lowered to %.1f/s', endpoint, bucket.rate)
+
+    def stats(self) -> Dict[str, float]:
+        """Current rate of every endpoint"""
+        return {endpoint: round(b.rate, 2) for endpoint, b in self._buckets.items()}
+
+
+LIMITER: RateLimiter = RateLimiter()
+
+__all__ = [
+    'LIMITER',
+    'PRIORITY_BACKGROUND',
+    'PRIORITY_FOREGROUND',
+    'RateLimiter',
+    'TokenBucket',
+    'background',
+    'set_priority',
+]
@@ -1,13 +1,24 @@
 """YaMusic exports"""
 
 from .controllers.track import YaTrack
-from .gstreamer.gst import STATE_ERR, STATE_PLAYING, STATE_PAUSED
+from .gstreamer.gst import (
+    STATE_BUFFERING,
+    STATE_ERR,
+    STATE_PAUSED,
+    STATE_PLAYING,
+    STATE_RECOVERING,
+)
 from .player import YaPlayer, YaPlayerError
+from .worker import PlayerProxy, PlayerWorker
 
 __all__ = [
+    'PlayerProxy',
+    'PlayerWorker',
+    'STATE_BUFFERING',
     'STATE_ERR',
     'STATE_PAUSED',
     'STATE_PLAYING',
+    'STATE_RECOVERING',
     'YaPlayer',
     'YaPlayerError',
     'YaTrack',
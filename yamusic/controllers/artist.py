@@ -1,7 +1,8 @@
 """STUB"""
 import asyncio
 import logging
-from typing import Any, List, Optional
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
 
 from yandex_music import (
     Album,
@@ -29,6 +30,14 @@ from .track import YaTrack
 
 _LOGGER = logging.getLogger(__name__)
 
+_SEARCH_CACHE_SIZE  : int = 64
+
+
+def _normalize_query(query: str) -> str:
+    """Case-folded query with collapsed whitespace, used as search cache key"""
+    return ' '.join((query or '').casefold().split())
+
+
 class ArtistController(SourceController):
     """
     Controls Yandex.Music playlist
@@ -41,6 +50,9 @@ class ArtistController(SourceController):
         self._albums: List[Album] = None
         self._playlist: List[Track] = None
         self._position: int = 0
+        self._upcoming: Optional[Tuple[int, Track, YaTrack]] = None
+        self._search_task: asyncio.Task = None
+        self._search_cache: OrderedDict[str, List[Artist]] = OrderedDict()
 
     async def init(self):
         """Initialize Yandex.Music client and populate list of available playlists"""
@@ -54,6 +66,8 @@ class ArtistController(SourceController):
         if self._current_track:
             await self._inform_track_playback_ended(
                 self._current_track, self._current_play_id, played=played)
+        if self._search_task and not self._search_task.done():
+            self._search_task.cancel()
         if self._client:
             del self._client
         _LOGGER.debug('Shut down.')
@@ -75,6 +89,7 @@ class ArtistController(SourceController):
             )
             self._cleanup_current_track()
         self._position = 0
+        self._upcoming = None
         _LOGGER.debug('Playing %d album(s) of "%s".', len(self._albums), self._artist_name)
 
         await self._setup_current_track()
@@ -102,17 +117,30 @@ class ArtistController(SourceController):
             )
         self._cleanup_current_track()
 
-        self._position += 1
-        if self._position >= len(self._playlist):
-            self._position = 0
-
-        await self._setup_current_track()
+        if self._upcoming:
+            self._position, self._current_track, self._current_track_int = self._upcoming
+            self._upcoming = None
+            self._current_play_id = self._generate_play_id()
+        else:
+            self._position += 1
+            if self._position >= len(self._playlist):
+                self._position = 0
+            await self._setup_current_track()
 
         asyncio.create_task(
             self._inform_track_playback_started(self._current_track, self._current_play_id))
 
         return self._current_track_int
 
+    async def prefetch_next_track(self) -> YaTrack:
+        """
+        Resolve next track of artist's albums ahead of time,
+        it becomes current on the next get_next_track call
+        """
+        position: int = (self._position + 1) % len(self._playlist)
+        self._upcoming = (position, *await self._resolve_track(position))
+        return self._upcoming[2]
+
     def get_sources_list(self) -> List[Value]:
         """Return available albums"""
         return [Value(name=a.title, value=a.id) for a in self._albums or []]
@@ -130,9 +158,42 @@ class ArtistController(SourceController):
         """
         return self._position
 
+    def get_upcoming_covers(self, count: int) -> List[str]:
+        """
+        Return cover URIs of up to count tracks following the current one
+        """
+        upcoming: List[Track] = (self._playlist or [])[self._position + 1:self._position + 1 + count]
+        return [self._cover_uri(t) for t in upcoming]
+
     async def query_artists(self, query: str, callback: Any) -> None:
-        """Queries Yandex Music Artist search API for an Artist's names"""
-        self._candidates = await self._query_artists(query)
+        """
+        Queries Yandex Music Artist search API for an Artist's names.
+        Results are cached per normalized query. While the request is in flight,
+        cached results of the longest typed prefix are shown, filtered by the query.
+        """
+        key: str = _normalize_query(query)
+        if key in self._search_cache:
+            self._search_cache.move_to_end(key)
+            return self._show_candidates(self._search_cache[key], callback)
+        prefix: Optional[str] = next(
+            (key[:idx] for idx in range(len(key) - 1, 0, -1) if key[:idx] in self._search_cache), None)
+        if prefix:
+            provisional: List[Artist] = [
+                a for a in self._search_cache[prefix] if key in _normalize_query(a.name)]
+            if provisional:
+                self._show_candidates(provisional, callback)
+        try:
+            artists: List[Artist] = await self._query_artists(query)
+        except ControllerError as exc:
+            _LOGGER.warning('Cannot search for artist "%s": %s', query, exc)
+            return None
+        self._search_cache[key] = artists
+        if len(self._search_cache) > _SEARCH_CACHE_SIZE:
+            self._search_cache.popitem(last=False)
+        return self._show_candidates(artists, callback)
+
+    def _show_candidates(self, artists: List[Artist], callback: Any) -> None:
+        self._candidates = artists
         return callback([Value(name=f'{a.name} ({", ".join(a.genres)}) {ui.ALBUM_ICON}{a.counts.direct_albums}', value=a.id) for a in self._candidates])
 
     async def query_albums(self, artist_id: str, callback: Any):
@@ -148,6 +209,7 @@ class ArtistController(SourceController):
     async def query_tracks(self, album_ids: List[str], callback: Any):
         """Queries Yandex Music Album search API for an Album's tracks"""
         self._playlist = await self._query_tracks(album_ids)
+        self._upcoming = None
         return callback([Value(name=f'({a.albums[0].year}) {a.albums[0].title} - {a.title}', value=a.id) for a in self._playlist])
     
     def query(self, type=None, query=None, callback=None) -> None:
@@ -155,8 +217,14 @@ class ArtistController(SourceController):
         Perform API queries for different content
         """
         if type == ev.TYPE_QUERY_ARTISTS:
-            asyncio.create_task(self.query_artists(query, callback))
+            # Only the latest search may render its results
+            if self._search_task and not self._search_task.done():
+                self._search_task.cancel()
+            self._search_task = asyncio.create_task(self.query_artists(query, callback))
         elif type == ev.TYPE_QUERY_ALBUMS:
+            # Artist is chosen, late search results must not replace its albums
+            if self._search_task and not self._search_task.done():
+                self._search_task.cancel()
             asyncio.create_task(self.query_albums(query, callback))
         elif type == ev.TYPE_QUERY_TRACKS:
             asyncio.create_task(self.query_tracks(query, callback))
@@ -175,6 +243,7 @@ class ArtistController(SourceController):
         self._cleanup_current_track()
 
         self._position = position
+        self._upcoming = None
 
         await self._setup_current_track()
 
@@ -186,17 +255,21 @@ class ArtistController(SourceController):
     ### API wrappers
     # Track controls
     async def _setup_current_track(self) -> None:
-        self._current_track = await self._get_track(self._playlist[self._position].track_id)
-        self._current_track_int = YaTrack(
-            title=self._current_track.title,
-            artist=",".join(self._current_track.artists_name()),
-            album=self._current_track.albums[0].title,
-            track_id=self._current_track.track_id,
-            uri=await self._get_track_url(self._current_track, high_res=self.high_res),
-            duration=int(self._current_track.duration_ms / 1000),
-            )
+        self._current_track, self._current_track_int = await self._resolve_track(self._position)
         self._current_play_id = self._generate_play_id()
 
+    async def _resolve_track(self, position: int) -> Tuple[Track, YaTrack]:
+        track: Track = await self._get_track(self._playlist[position].track_id)
+        return track, YaTrack(
+            title=track.title,
+            artist=",".join(track.artists_name()),
+            album=track.albums[0].title,
+            track_id=track.track_id,
+            uri=await self._get_track_url(track, high_res=self.high_res),
+            duration=int(track.duration_ms / 1000),
+            cover_uri=self._cover_uri(track),
+            )
+
     # Helpers
     @property
     def source_name(self) -> str:
@@ -0,0 +1,151 @@
+"""Persisted playlist snapshots and feedback journal for offline playback"""
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from yandex_music import ClientAsync, Track, Value
+
+from utils.config import get_cache_dir
+
+_LOGGER = logging.getLogger(__name__)
+
+_PLAYLISTS_FILE     : str = 'playlists.json'
+_JOURNAL_FILE       : str = 'feedback.jsonl'
+# Oldest feedback is dropped when the journal grows beyond this
+_MAX_JOURNAL        : int = 10000
+
+
+def _write_json(path: str, data: Any) -> None:
+    """Replace file atomically, a crash never leaves a truncated snapshot"""
+    tmp_path: str = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as outfile:
+        json.dump(data, outfile, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: str) -> Optional[Any]:
+    try:
+        with open(path, 'r', encoding='utf-8') as infile:
+            return json.load(infile)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        _LOGGER.warning('Cannot read %s: %s', path, exc)
+        return None
+
+
+def _track_to_dict(track: Track) -> Dict[str, Any]:
+    """Fields of the track the playlist controller uses, in API format"""
+    return {
+        'id': track.id,
+        'title': track.title,
+        'durationMs': track.duration_ms,
+        'coverUri': track.cover_uri,
+        'artists': [{'id': a.id, 'name': a.name} for a in track.artists],
+        'albums': [{'id': a.id, 'title': a.title, 'coverUri': a.cover_uri} for a in track.albums[:1]],
+        }
+
+
+class PlaylistSnapshots:
+    """
+    Last fetched list of user playlists and their tracks, stored in cache dir.
+    Only fields needed to show and play tracks are kept.
+    """
+    def __init__(self):
+        self._dir: str = get_cache_dir('offline')
+
+    def save_list(self, playlists: List[Value]) -> None:
+        """Store list of user playlists"""
+        try:
+            _write_json(
+                os.path.join(self._dir, _PLAYLISTS_FILE),
+                [{'name': p.name, 'value': p.value} for p in playlists])
+        except OSError as exc:
+            _LOGGER.warning('Cannot store playlists: %s', exc)
+
+    def load_list(self) -> Optional[List[Value]]:
+        """Stored list of user playlists, None if there is none"""
+        data: Optional[List[Dict]] = _read_json(os.path.join(self._dir, _PLAYLISTS_FILE))
+        if data is None:
+            return None
+        return [Value(name=p['name'], value=p['value']) for p in data]
+
+    def save(self, playlist_id: str, tracks: List[Track]) -> None:
+        """Store tracks of the playlist"""
+        try:
+            _write_json(self._path(playlist_id), [_track_to_dict(t) for t in tracks])
+        except OSError as exc:
+            _LOGGER.warning('Cannot store playlist %s: %s', playlist_id, exc)
+
+    def load(self, playlist_id: str, client: ClientAsync) -> Optional[List[Track]]:
+        """Stored tracks of the playlist, None if there is no snapshot"""
+        data: Optional[List[Dict]] = _read_json(self._path(playlist_id))
+        if data is None:
+            return None
+        return Track.de_list(data, client)
+
+    def _path(self, playlist_id: str) -> str:
+        return os.path.join(self._dir, f'playlist_{playlist_id}.json')
+
+
+class FeedbackJournal:
+    """
+    Playback feedback and likes which could not be sent, kept for later delivery.
+    Entries are held in memory and appended to a JSON lines file,
+    delivered ones are removed by rewriting the file.
+    """
+    def __init__(self):
+        self._path: str = os.path.join(get_cache_dir('offline'), _JOURNAL_FILE)
+        self._entries: List[Dict[str, Any]] = self._load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        """Journal feedback entry"""
+        self._entries.append(entry)
+        if len(self._entries) > _MAX_JOURNAL:
+            del self._entries[:len(self._entries) - _MAX_JOURNAL]
+            self._save()
+            return
+        try:
+            with open(self._path, 'a', encoding='utf-8') as outfile:
+                outfile.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        except OSError as exc:
+            _LOGGER.warning('Cannot journal feedback: %s', exc)
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """Journaled entries, oldest first"""
+        return list(self._entries)
+
+    def delivered(self, count: int) -> None:
+        """Remove given number of the oldest entries"""
+        if not count:
+            return
+        del self._entries[:count]
+        self._save()
+
+    def _load(self) -> List[Dict[str, Any]]:
+        entries: List[Dict[str, Any]] = []
+        try:
+            with open(self._path, 'r', encoding='utf-8') as infile:
+                for line in infile:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        pass # line torn by a crash
+        except FileNotFoundError:
+            pass
+        except OSError as exc:
+            _LOGGER.warning('Cannot read feedback journal: %s', exc)
+        return entries[-_MAX_JOURNAL:]
+
+    def _save(self) -> None:
+        try:
+            tmp_path: str = f'{self._path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as outfile:
+                outfile.writelines(json.dumps(e, ensure_ascii=False) + '\n' for e in self._entries)
+            os.replace(tmp_path, self._path)
+        except OSError as exc:
+            _LOGGER.warning('Cannot rewrite feedback journal: %s', exc)
@@ -1,7 +1,7 @@
 """STUB"""
 import asyncio
 import logging
-from typing import List
+from typing import List, Optional, Tuple
 
 from yandex_music import (
     ClientAsync,
@@ -16,6 +16,7 @@ from utils.config import get_key
 from utils.decorators import aiohttp_retry
 
 from .error import ControllerError
+from .offline import PlaylistSnapshots
 from .source import (
     SourceController,
     RETRY_ARGS,
@@ -31,7 +32,11 @@ DEFAULT_PLAYLIST_NAME : str = 'Моя коллекция'
 
 class PlaylistController(SourceController):
     """
-    Controls Yandex.Music playlist
+    Controls Yandex.Music playlist.
+    Fetched playlists are stored as snapshots. When the API is unavailable,
+    the controller goes offline: playlists are served from snapshots,
+    tracks without a local copy are skipped, and the API is probed
+    in background to get back online.
     """
     def __init__(self, client: ClientAsync, playlist_id: str = None):
         super().__init__(client)
@@ -40,12 +45,23 @@ class PlaylistController(SourceController):
         self._playlist: List[Track] = None
         self._playlist_name: str = None
         self._position: int = 0
+        self._upcoming: Optional[Tuple[int, Track, YaTrack]] = None
+        self._snapshots: PlaylistSnapshots = PlaylistSnapshots()
 
     async def init(self):
-        """Initialize Yandex.Music client and populate list of available playlists"""
-        await super().init()
-        self._playlists = [Value(name=DEFAULT_PLAYLIST_NAME, value=DEFAULT_PLAYLIST_ID)]
-        self._playlists.extend(await self._get_user_playlists())
+        """
+        Initialize Yandex.Music client and populate list of available playlists,
+        start offline with stored playlists if the API is unavailable
+        """
+        try:
+            await super().init()
+        except ControllerError as exc:
+            self._playlists = self._snapshots.load_list()
+            if not self._playlists:
+                raise
+            self._go_offline(exc)
+            return self
+        await self._fill_playlists()
         return self
 
     async def shutdown(self, played:float=0):
@@ -74,6 +90,7 @@ class PlaylistController(SourceController):
             )
             self._cleanup_current_track()
             self._position = 0
+        self._upcoming = None
         if not await self._fill_playlist(source_id or self._playlist_id):
             raise ControllerError(f'No such Id: {self._playlist_id} in user\'s playlists.')
         _LOGGER.debug('Opened playlist "%s".', self._playlist_name)
@@ -103,17 +120,29 @@ class PlaylistController(SourceController):
             )
         self._cleanup_current_track()
 
-        self._position += 1
-        if self._position >= len(self._playlist):
-            self._position = 0
-
-        await self._setup_current_track()
+        if self._upcoming:
+            self._position, self._current_track, self._current_track_int = self._upcoming
+            self._upcoming = None
+            self._current_play_id = self._generate_play_id()
+        else:
+            self._position += 1
+            if self._position >= len(self._playlist):
+                self._position = 0
+            await self._setup_current_track()
 
         asyncio.create_task(
             self._inform_track_playback_started(self._current_track, self._current_play_id))
 
         return self._current_track_int
 
+    async def prefetch_next_track(self) -> YaTrack:
+        """
+        Resolve next track of playlist ahead of time,
+        it becomes current on the next get_next_track call
+        """
+        self._upcoming = await self._resolve_track((self._position + 1) % len(self._playlist))
+        return self._upcoming[2]
+
     def get_sources_list(self) -> List[Value]:
         """Return available playlists"""
         return self._playlists
@@ -131,6 +160,13 @@ class PlaylistController(SourceController):
         """
         return self._position
 
+    def get_upcoming_covers(self, count: int) -> List[str]:
+        """
+        Return cover URIs of up to count tracks following the current one
+        """
+        upcoming: List[Track] = (self._playlist or [])[self._position + 1:self._position + 1 + count]
+        return [self._cover_uri(t) for t in upcoming]
+
     async def set_playlist_position(self, position: int, played:float=0) -> YaTrack:
         """
         Set index of current playlist
@@ -145,6 +181,7 @@ class PlaylistController(SourceController):
         self._cleanup_current_track()
 
         self._position = position
+        self._upcoming = None
 
         await self._setup_current_track()
 
@@ -155,43 +192,96 @@ class PlaylistController(SourceController):
 
     ### API wrappers
     # Playlist controls
-    async def _get_user_playlists(self) -> List[Value]:
+    async def _get_user_playlists(self) -> Optional[List[Value]]:
         try:
             return [
                 Value(name=pl.title, value=pl.kind) for pl in await self._get_playlists()
                 ]
         except ControllerError as err:
             _LOGGER.debug('Cannot retrieve user playlists: %s.', err)
+            return None
+
+    async def _fill_playlists(self) -> None:
+        user_playlists: Optional[List[Value]] = await self._get_user_playlists()
+        if user_playlists is None:
+            self._playlists = self._snapshots.load_list() or [
+                Value(name=DEFAULT_PLAYLIST_NAME, value=DEFAULT_PLAYLIST_ID)]
+            return
+        self._playlists = [Value(name=DEFAULT_PLAYLIST_NAME, value=DEFAULT_PLAYLIST_ID)]
+        self._playlists.extend(user_playlists)
+        self._snapshots.save_list(self._playlists)
 
     async def _fill_playlist(self, playlist_id: str) -> bool:
         for pl_short in self._playlists:
             if pl_short.value == playlist_id:
-                try:
-                    if playlist_id == DEFAULT_PLAYLIST_ID:
-                        self._playlist = await self._get_liked_tracks()
-                    else:
-                        self._playlist = await self._get_playlist_tracks(pl_short.value)
-                except ControllerError as err:
-                    _LOGGER.error('Cannot retrieve playlist data: %s', err)
-                    raise ControllerError(f'Cannot retrieve playlist data: {err}')                  # pylint: disable=raise-missing-from
+                self._playlist = await self._load_playlist(playlist_id)
                 self._playlist_name = pl_short.name
                 self._playlist_id = pl_short.value
                 return True
         return False
 
+    async def _load_playlist(self, playlist_id: str) -> List[Track]:
+        """Fetch playlist tracks and store their snapshot, use the snapshot when offline"""
+        if not self.offline:
+            try:
+                if playlist_id == DEFAULT_PLAYLIST_ID:
+                    tracks: List[Track] = await self._get_liked_tracks()
+                else:
+                    tracks = await self._get_playlist_tracks(playlist_id)
+            except ControllerError as err:
+                _LOGGER.error('Cannot retrieve playlist data: %s', err)
+                self._go_offline(err)
+            else:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self._snapshots.save, playlist_id, tracks)
+                return tracks
+        snapshot: Optional[List[Track]] = self._snapshots.load(playlist_id, self._client)
+        if not snapshot:
+            raise ControllerError(f'Playlist {playlist_id} is not available offline.')
+        _LOGGER.info('Playing stored copy of playlist %s.', playlist_id)
+        return snapshot
+
+    async def _went_online(self) -> None:
+        await self._fill_playlists()
+
     # Track controls
     async def _setup_current_track(self) -> None:
-        self._current_track = await self._get_track(self._playlist[self._position].track_id)
-        self._current_track_int = YaTrack(
-            title=self._current_track.title,
-            artist=",".join(self._current_track.artists_name()),
-            album=self._current_track.albums[0].title,
-            track_id=self._current_track.track_id,
-            uri=await self._get_track_url(self._current_track, high_res=self.high_res),
-            duration=int(self._current_track.duration_ms / 1000),
-            )
+        self._position, self._current_track, self._current_track_int = await self._resolve_track(
+            self._position)
         self._current_play_id = self._generate_play_id()
 
+    async def _resolve_track(self, position: int) -> Tuple[int, Track, YaTrack]:
+        """Track at position with resolved URI, offline the first one from position with a local copy"""
+        self._probe_online()
+        if not self.offline:
+            try:
+                track: Track = await self._get_track(self._playlist[position].track_id)
+                return position, track, self._to_internal(
+                    track, await self._get_track_url(track, high_res=self.high_res))
+            except ControllerError as exc:
+                self._go_offline(exc)
+        return await self._resolve_local_track(position)
+
+    async def _resolve_local_track(self, position: int) -> Tuple[int, Track, YaTrack]:
+        for offset in range(len(self._playlist)):
+            local_position: int = (position + offset) % len(self._playlist)
+            track: Track = self._playlist[local_position]
+            uri: Optional[str] = await self._library.find(track.id)
+            if uri:
+                return local_position, track, self._to_internal(track, uri)
+        raise ControllerError(f'No tracks of playlist "{self._playlist_name}" are available offline.')
+
+    def _to_internal(self, track: Track, uri: str) -> YaTrack:
+        return YaTrack(
+            title=track.title,
+            artist=",".join(track.artists_name()),
+            album=track.albums[0].title,
+            track_id=track.track_id,
+            uri=uri,
+            duration=int(track.duration_ms / 1000),
+            cover_uri=self._cover_uri(track),
+            )
+
     # Helpers
     @property
     def source_name(self) -> str:
@@ -1,21 +1,28 @@
 """Prototype for Yandex.Music source controller"""
+import asyncio
 import logging
+from datetime import datetime, timezone
 from random import random
-from typing import List, Union
+from time import monotonic
+from typing import Any, Dict, List, Optional, Union
 
 from yandex_music import (
     ClientAsync,
     DownloadInfo,
     RotorSettings,
     Track,
+    TracksList,
     Value,
     )
 from yandex_music.exceptions import YandexMusicError
 
 from utils.config import get_key
 from utils.decorators import aiohttp_retry
+from utils.ratelimit import LIMITER, background
 
+from ..library import LocalLibrary
 from .error import ControllerError
+from .offline import FeedbackJournal
 from .track import YaTrack
 
 ClientAsync.notice_displayed = True
@@ -30,6 +37,8 @@ _CODEC : str = 'mp3'
 MY_API_RETRIES: int = 3
 MY_API_RETRY_DELAY: int = 0.3
 MY_API_TIMEOUT: float = 2.0
+# Delay between attempts to get back online, seconds
+OFFLINE_PROBE_INTERVAL: float = 30.0
 RETRY_ARGS = [
     YandexMusicError,
     ControllerError,
@@ -39,6 +48,7 @@ RETRY_KWARGS = {
     'timeout': MY_API_TIMEOUT,
     'retry_delay': MY_API_RETRY_DELAY,
     'logger': _LOGGER,
+    'limiter': LIMITER,
     }
 
 class SourceController:
@@ -51,13 +61,19 @@ class SourceController:
         self._current_play_id: str = None
         self._current_track: Track = None
         self._current_track_int: YaTrack = None
+        self._library: LocalLibrary = LocalLibrary(
+            get_key('sync_dir') if get_key('local_playback', True) else None)
+        self._journal: FeedbackJournal = FeedbackJournal()
+        self._delivering: bool = False
+        self._next_probe: float = 0.0
+        self._probe: Optional[asyncio.Task] = None
+        self.offline: bool = False
 
     async def init(self):
         """Initialize Yandex.Music client and populate list of available stations"""
         try:
             await self._client.init(timeout=MY_API_TIMEOUT)
         except YandexMusicError as exc:
-            self._client = None
             raise ControllerError(f'Cannot initialize client: {exc}')                               # pylint: disable=raise-missing-from
 
     async def shutdown(self):
@@ -87,11 +103,35 @@ class SourceController:
         """
         raise NotImplementedError
 
+    async def prefetch_next_track(self) -> YaTrack:
+        """
+        Resolve the track following the current one without switching to it,
+        it becomes current on the next get_next_track call
+        """
+        raise NotImplementedError
+
     async def like_track(self) -> bool:
         """
-        Add current track to favorites
+        Add current track to favorites, journal the like while offline
         """
-        return await self._send_track_user_likes_add(self._current_track.id)
+        if not self.offline:
+            return await self._send_track_user_likes_add(self._current_track.id)
+        self._journal.append({'event': 'like', 'track_id': self._current_track.id})
+        return True
+
+    async def refresh_current_track(self) -> YaTrack:
+        """
+        Resolve a new download URI for current track,
+        e.g. when the previous one has expired.
+        Local file which failed to play is replaced with a network one.
+        """
+        if not self._current_track:
+            raise ControllerError('No current track to refresh.')
+        self._current_track_int.uri = await self._get_track_url(
+            self._current_track, high_res=self.high_res,
+            local=not (self._current_track_int.uri or '').startswith('file://'))
+        _LOGGER.debug('Refreshed URI of track %s.', self._current_track.id)
+        return self._current_track_int
 
     def query(self, **kwargs) -> List[Value]:
         """Perform API queries"""
@@ -114,6 +154,12 @@ class SourceController:
         """
         raise NotImplementedError
 
+    def get_upcoming_covers(self, count: int) -> List[str]:                                         # pylint: disable=unused-argument
+        """
+        Return cover URIs of up to count tracks following the current one
+        """
+        return []
+
     async def set_playlist_position(self, position: int, played:float=0) -> YaTrack:
         """
         Set index of current playlist
@@ -137,8 +183,17 @@ class SourceController:
             album=track.albums[0].title,
             track_id=track.track_id,
             duration=int(track.duration_ms / 1000),
+            cover_uri=self._cover_uri(track),
             )
 
+    @staticmethod
+    def _cover_uri(track: Track) -> Optional[str]:
+        if track.cover_uri:
+            return track.cover_uri
+        if track.albums and track.albums[0].cover_uri:
+            return track.albums[0].cover_uri
+        return None
+
     ### API wrappers
     # Track controls
     async def _setup_current_track(self) -> None:
@@ -149,36 +204,135 @@ class SourceController:
         self._current_track = None
         self._current_track_int = None
 
+    # Offline mode
+    def _go_offline(self, reason: Union[str, Exception]) -> None:
+        """Serve from local data until a probe gets through to the API"""
+        if not self.offline:
+            _LOGGER.warning('Going offline: %s', reason)
+        self.offline = True
+        self._next_probe = monotonic() + OFFLINE_PROBE_INTERVAL
+
+    def _probe_online(self) -> None:
+        """Try to get back online in background, at most every OFFLINE_PROBE_INTERVAL"""
+        if not self.offline or monotonic() < self._next_probe or self._probe:
+            return
+        self._next_probe = monotonic() + OFFLINE_PROBE_INTERVAL
+        self._probe = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        try:
+            with background():
+                await self._client.init(timeout=MY_API_TIMEOUT)
+        except YandexMusicError as exc:
+            _LOGGER.debug('Still offline: %s', exc)
+            return
+        finally:
+            self._probe = None
+        self.offline = False
+        _LOGGER.info('Back online.')
+        await self._went_online()
+        await self._deliver_feedback()
+
+    async def _went_online(self) -> None:
+        """Refresh data served from local copies while offline"""
+
+    def _schedule_delivery(self) -> None:
+        if self._journal and not self._delivering and not self.offline:
+            asyncio.create_task(self._deliver_feedback())
+
+    async def _deliver_feedback(self) -> None:
+        """Send journaled feedback in order, stop at the first failure"""
+        if self._delivering:
+            return
+        self._delivering = True
+        sent: int = 0
+        try:
+            with background():
+                for entry in self._journal.pending():
+                    if entry['event'] == 'like':
+                        await self._send_track_user_likes_add(entry['track_id'])
+                    else:
+                        await self._send_journaled_playback(entry)
+                    sent += 1
+        except ControllerError as exc:
+            _LOGGER.debug('Feedback delivery interrupted: %s', exc)
+        finally:
+            self._journal.delivered(sent)
+            self._delivering = False
+        if sent:
+            _LOGGER.info('Delivered %d journaled feedback entries, %d left.', sent, len(self._journal))
+
+    @staticmethod
+    def _feedback_entry(event: str, track: Track, play_id: str, played: float) -> Dict[str, Any]:
+        return {
+            'event': event,
+            'track_id': track.id,
+            'album_id': track.albums[0].id,
+            'play_id': play_id,
+            'length': track.duration_ms / 1000,
+            'played': played,
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            }
+
     ### API wrappers
     # Informers
     async def _inform_track_playback_started(self, track: Track, play_id: str):
-        """Inform Track API about start of playback"""
+        """
+        Inform Track API about start of playback, it yields to playback requests.
+        Feedback which cannot be sent is journaled.
+        """
+        if self.offline:
+            self._journal.append(self._feedback_entry('started', track, play_id, 0))
+            return
         try:
-            await self._send_track_playback_started(track, play_id)
+            with background():
+                await self._send_track_playback_started(track, play_id)
         except ControllerError:
-            pass
+            self._journal.append(self._feedback_entry('started', track, play_id, 0))
         else:
             _LOGGER.debug('Informed Track API about start of track %s.', track.id)
+            self._schedule_delivery()
 
     async def _inform_track_playback_ended(
         self, track: Track, play_id: str, played:float=0):
-        """Inform Track API about playback completion"""
+        """
+        Inform Track API about playback completion, it yields to playback requests.
+        Feedback which cannot be sent is journaled.
+        """
+        played = played or track.duration_ms / 1000
+        if self.offline:
+            self._journal.append(self._feedback_entry('ended', track, play_id, played))
+            return
         try:
-            await self._send_track_playback_ended(track, play_id, played=played)
+            with background():
+                await self._send_track_playback_ended(track, play_id, played=played)
         except ControllerError:
-            pass
+            self._journal.append(self._feedback_entry('ended', track, play_id, played))
         else:
             _LOGGER.debug('Informed Track API about stop of track %s.', track.id)
+            self._schedule_delivery()
 
     # Track controls
     async def _get_track_url(
-            self, track: Track, codec:str=_CODEC, high_res:bool=False) -> str:
+            self, track: Track, codec:str=_CODEC, high_res:bool=False, local:bool=True) -> str:
+        """URI of synced copy from the local library if any, direct link otherwise"""
+        if local:
+            uri: Optional[str] = await self._library.find(track.id)
+            if uri:
+                _LOGGER.debug('Playing track %s from local library.', track.id)
+                return uri
+        return await self._get_track_direct_link(
+            await self._get_track_download_info(track, codec=codec, high_res=high_res))
+
+    async def _get_track_download_info(
+            self, track: Track, codec:str=_CODEC, high_res:bool=False) -> DownloadInfo:
         dl_infos: List[DownloadInfo] = sorted(
             [d for d in await self._get_track_download_infos(track) if d.codec == codec],
             key=lambda x: x.bitrate_in_kbps
         )
-        dl_info: DownloadInfo = dl_infos[-1] if high_res else dl_infos[0]
-        return await self._get_track_direct_link(dl_info)
+        if not dl_infos:
+            raise ControllerError(f'No {codec} download available for track {track.id}.')
+        return dl_infos[-1] if high_res else dl_infos[0]
 
     # Helpers
     @staticmethod
@@ -194,6 +348,17 @@ class SourceController:
         tracks: List[Track] = await self._client.tracks([track_id], timeout=timeout)
         return tracks[0]
 
+    @aiohttp_retry(*RETRY_ARGS, **RETRY_KWARGS)
+    async def _get_tracks(
+        self, track_ids: List[str], timeout: float=MY_API_TIMEOUT) -> List[Track]:
+        return await self._client.tracks(track_ids, timeout=timeout)
+
+    @aiohttp_retry(*RETRY_ARGS, **RETRY_KWARGS)
+    async def _get_liked_tracks_list(
+        self, revision: int=0, timeout: float=MY_API_TIMEOUT) -> Optional[TracksList]:
+        return await self._client.users_likes_tracks(
+            if_modified_since_revision=revision, timeout=timeout)
+
     @aiohttp_retry(*RETRY_ARGS, **RETRY_KWARGS)
     async def _get_track_download_infos(
         self, track: Track, timeout: float=MY_API_TIMEOUT) -> List[DownloadInfo]:
@@ -224,6 +389,22 @@ class SourceController:
             timeout=timeout
         )
 
+    @aiohttp_retry(*RETRY_ARGS, **RETRY_KWARGS)
+    async def _send_journaled_playback(
+        self, entry: Dict[str, Any], timeout: float=MY_API_TIMEOUT):
+        await self._client.play_audio(
+            from_=_YANDEX_APP_NAME,
+            track_id=entry['track_id'],
+            album_id=entry['album_id'],
+            play_id=entry['play_id'],
+            from_cache=True,
+            timestamp=entry['timestamp'],
+            track_length_seconds=int(entry['length']),
+            total_played_seconds=entry['played'],
+            end_position_seconds=entry['length'],
+            timeout=timeout
+        )
+
     @aiohttp_retry(*RETRY_ARGS, **RETRY_KWARGS)
     async def _send_track_playback_ended(
         self, track: Track, play_id: str, played: float = 0, timeout: float=MY_API_TIMEOUT):
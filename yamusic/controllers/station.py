@@ -1,7 +1,7 @@
 """STUB"""
 import asyncio
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from yandex_music import (
     ClientAsync,
@@ -17,6 +17,7 @@ from yandex_music import (
 
 from utils.config import get_key, get_station_settings, set_station_settings
 from utils.decorators import aiohttp_retry
+from utils.ratelimit import background
 
 from .error import ControllerError
 from .source import (
@@ -43,6 +44,7 @@ class StationController(SourceController):
         self._source: StationResult = None
         self._batch: StationTracksResult = None
         self._batch_index: int = 0
+        self._upcoming: Optional[Tuple[StationTracksResult, int, Track, YaTrack]] = None
 
     async def init(self):
         """Initialize Yandex.Music client and populate list of available stations"""
@@ -76,6 +78,7 @@ class StationController(SourceController):
                     )
             )
             self._cleanup_current_track()
+        self._upcoming = None
         if not self._set_source(source_id or self.source_id):
             raise ControllerError(f'No such station: {self.source_id} in rotor\'s stations.')
         if not await self.apply_source_settings(
@@ -117,6 +120,7 @@ class StationController(SourceController):
                 })
             if self._batch:
                 self._batch_index = len(self._batch.sequence)
+            self._upcoming = None
             return True
         return False
 
@@ -132,11 +136,18 @@ class StationController(SourceController):
             )
         self._cleanup_current_track()
 
-        self._batch_index += 1
-        if self._batch_index >= len(self._batch.sequence):
-            await self._start_new_batch()
-
-        await self._setup_current_track()
+        if self._upcoming:
+            batch, self._batch_index, self._current_track, self._current_track_int = self._upcoming
+            self._upcoming = None
+            if batch is not self._batch:
+                self._batch = batch
+                asyncio.create_task(self._inform_batch_started(batch.batch_id))
+            self._current_play_id = self._generate_play_id()
+        else:
+            self._batch_index += 1
+            if self._batch_index >= len(self._batch.sequence):
+                await self._start_new_batch()
+            await self._setup_current_track()
 
         asyncio.create_task(
             self._inform_playback_started(
@@ -145,6 +156,18 @@ class StationController(SourceController):
 
         return self._current_track_int
 
+    async def prefetch_next_track(self) -> YaTrack:
+        """
+        Resolve next track of the station ahead of time, fetching the next batch if needed,
+        it becomes current on the next get_next_track call
+        """
+        batch: StationTracksResult = self._batch
+        index: int = self._batch_index + 1
+        if index >= len(batch.sequence):
+            batch, index = await self._get_station_tracks(self._station_id), 0
+        self._upcoming = (batch, index, *await self._resolve_track(batch.sequence[index]))
+        return self._upcoming[3]
+
     def get_sources_list(self) -> List[Value]:
         """Return list of available stations"""
         return [Value(name=s.station.name, value=s.station.id.tag) for s in self._stations]
@@ -161,6 +184,16 @@ class StationController(SourceController):
         """
         return 0
 
+    def get_upcoming_covers(self, count: int) -> List[str]:
+        """
+        Return cover URIs of up to count tracks following the current one in batch
+        """
+        if not self._batch:
+            return []
+        upcoming: List[Sequence] = self._batch.sequence[
+            self._batch_index + 1:self._batch_index + 1 + count]
+        return [self._cover_uri(s.track) for s in upcoming]
+
     async def set_playlist_position(self, position: int, played:float=0) -> YaTrack:
         """
         Set index of current playlist
@@ -172,7 +205,8 @@ class StationController(SourceController):
     async def _inform_playback_started(self, track: Track, play_id: str, batch_id: str):
         await self._inform_track_playback_started(track, play_id)
         try:
-            await self._send_rotor_track_playback_started(track, batch_id)
+            with background():
+                await self._send_rotor_track_playback_started(track, batch_id)
         except ControllerError:
             pass
         else:
@@ -182,10 +216,11 @@ class StationController(SourceController):
         self, track: Track, play_id: str, batch_id: str, played:float=0):
         await self._inform_track_playback_ended(track, play_id, played=played)
         try:
-            if played:
-                await self._send_rotor_track_playback_skipped(track, batch_id, played)
-            else:
-                await self._send_rotor_track_playback_ended(track, batch_id)
+            with background():
+                if played:
+                    await self._send_rotor_track_playback_skipped(track, batch_id, played)
+                else:
+                    await self._send_rotor_track_playback_ended(track, batch_id)
         except ControllerError:
             pass
         else:
@@ -223,19 +258,23 @@ class StationController(SourceController):
 
     # Track controls
     async def _setup_current_track(self) -> None:
-        sequence_item: Sequence = self._batch.sequence[self._batch_index]
-        self._current_track = await self._get_track(sequence_item.track.track_id)
-        self._current_track_int = YaTrack(
-            title=self._current_track.title,
-            artist=",".join(self._current_track.artists_name()),
-            album=self._current_track.albums[0].title,
-            track_id=self._current_track.track_id,
-            uri=await self._get_track_url(self._current_track, high_res=self.high_res),
-            duration=int(self._current_track.duration_ms / 1000),
-            is_liked=sequence_item.liked
-            )
+        self._current_track, self._current_track_int = await self._resolve_track(
+            self._batch.sequence[self._batch_index])
         self._current_play_id = self._generate_play_id()
 
+    async def _resolve_track(self, sequence_item: Sequence) -> Tuple[Track, YaTrack]:
+        track: Track = await self._get_track(sequence_item.track.track_id)
+        return track, YaTrack(
+            title=track.title,
+            artist=",".join(track.artists_name()),
+            album=track.albums[0].title,
+            track_id=track.track_id,
+            uri=await self._get_track_url(track, high_res=self.high_res),
+            duration=int(track.duration_ms / 1000),
+            is_liked=sequence_item.liked,
+            cover_uri=self._cover_uri(track),
+            )
+
     # Helpers
     @property
     def _station_id(self) -> str:
@@ -4,7 +4,7 @@ from json import dumps
 class YaTrack:
     """Internal representation of the track"""
     def __init__(self, title:str=None, artist:str=None, album:str=None, track_id:str=None,
-                 uri:str=None, duration:int=0, is_liked:bool=None) -> None:
+                 uri:str=None, duration:int=0, is_liked:bool=None, cover_uri:str=None) -> None:
         self.title: str = title
         self.artist: str = artist
         self.album: str = album
@@ -12,6 +12,7 @@ class YaTrack:
         self.uri: str = uri
         self.duration: int = duration
         self.is_liked: bool = is_liked
+        self.cover_uri: str = cover_uri
 
     def _str_duration(self) -> str:
         ''' Convert seconds to 'HH:MM:SS' '''
@@ -30,15 +31,17 @@ class YaTrack:
     def __str__(self) -> str:
         return f'{self.artist} - {self.title} ({self._str_duration()})'
 
-    def to_json_str(self) -> str:
-        """JSON string representation"""
+    def to_json_str(self, **extra) -> str:
+        """JSON string representation, extra keyword arguments are added as is"""
         return dumps({
             'title': self.title,
             'artist': self.artist, 
             'album': self.album,
             'track_id': self.track_id, 
             'uri': self.uri,
-            'duration': self.duration
+            'duration': self.duration,
+            'cover_uri': self.cover_uri,
+            **extra
         })
 
     def fixed_width(self, width: int) -> str:
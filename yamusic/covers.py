@@ -0,0 +1,125 @@
+"""Downloads track and album covers into bounded disk cache"""
+import asyncio
+import logging
+import os
+from hashlib import sha1
+from typing import Dict, List, Optional, Set
+
+import aiofiles
+import aiohttp
+
+from utils.config import get_cache_dir, get_key
+
+_LOGGER = logging.getLogger(__name__)
+
+MPRIS_COVER_SIZE    : str = '400x400'
+UI_COVER_SIZE       : str = '100x100'
+SYNC_COVER_SIZE     : str = '400x400'
+DEFAULT_CACHE_MB    : int = 50
+_SIZE_PLACEHOLDER   : str = '%%'
+_DOWNLOAD_TIMEOUT   : float = 5.0
+_MAX_PARALLEL       : int = 4
+
+
+class CoverCache:
+    """
+    Fetches covers by Yandex.Music cover_uri at requested size,
+    stores every size variant as a separate file and evicts least recently used
+    files when the cache exceeds its size limit.
+    """
+    def __init__(self, max_mb: int = None):
+        self._dir: str = get_cache_dir('covers')
+        self._max_bytes: int = (max_mb or get_key('cover_cache_mb', DEFAULT_CACHE_MB)) * 1024 * 1024
+        self._session: aiohttp.ClientSession = None
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._prefetches: Set[asyncio.Task] = set()
+        self._semaphore: asyncio.Semaphore = asyncio.Semaphore(_MAX_PARALLEL)
+
+    def path(self, cover_uri: str, size: str) -> str:
+        """Local path of the cover variant, the file may not exist yet"""
+        digest: str = sha1(cover_uri.encode('utf-8')).hexdigest()
+        return os.path.join(self._dir, f'{digest}_{size}.jpg')
+
+    def cached(self, cover_uri: Optional[str], size: str) -> Optional[str]:
+        """Return local path when the cover variant is already cached"""
+        if not cover_uri:
+            return None
+        path: str = self.path(cover_uri, size)
+        if not os.path.exists(path):
+            return None
+        os.utime(path, None)
+        return path
+
+    async def get(self, cover_uri: Optional[str], size: str) -> Optional[str]:
+        """Return local path of the cover variant, download it if needed"""
+        if not cover_uri:
+            return None
+        path: Optional[str] = self.cached(cover_uri, size)
+        if path:
+            return path
+        path = self.path(cover_uri, size)
+        # Concurrent requests of the same variant share a single download
+        if path not in self._pending:
+            self._pending[path] = asyncio.create_task(self._download(cover_uri, size, path))
+        try:
+            return await asyncio.shield(self._pending[path])
+        finally:
+            if path in self._pending and self._pending[path].done():
+                del self._pending[path]
+
+    def prefetch(self, cover_uris: List[str], size: str) -> None:
+        """Download covers of upcoming tracks in background"""
+        for cover_uri in dict.fromkeys(u for u in cover_uris if u):
+            if not os.path.exists(self.path(cover_uri, size)):
+                task: asyncio.Task = asyncio.create_task(self.get(cover_uri, size))
+                self._prefetches.add(task)
+                task.add_done_callback(self._prefetches.discard)
+
+    async def shutdown(self) -> None:
+        """Cancel pending downloads and close HTTP session"""
+        for task in [*self._prefetches, *self._pending.values()]:
+            task.cancel()
+        self._prefetches = set()
+        self._pending = {}
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    async def _download(self, cover_uri: str, size: str, path: str) -> Optional[str]:
+        url: str = f'https://{cover_uri.replace(_SIZE_PLACEHOLDER, size)}'
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=_DOWNLOAD_TIMEOUT))
+        tmp_path: str = f'{path}.part'
+        try:
+            async with self._semaphore, self._session.get(url) as response:
+                if response.status != 200:
+                    _LOGGER.debug('Cannot fetch cover %s: HTTP %s.', url, response.status)
+                    return None
+                async with aiofiles.open(tmp_path, 'wb') as out:
+                    await out.write(await response.read())
+            os.replace(tmp_path, path)
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as exc:
+            _LOGGER.debug('Cannot fetch cover %s: %s.', url, exc)
+            return None
+        self._evict()
+        return path
+
+    def _evict(self) -> None:
+        """Remove least recently used covers until cache fits its limit"""
+        try:
+            entries: List[os.DirEntry] = [e for e in os.scandir(self._dir) if e.is_file()]
+        except OSError:
+            return
+        total: int = sum(e.stat().st_size for e in entries)
+        if total <= self._max_bytes:
+            return
+        # DirEntry caches stat results, so they stay valid after removal
+        for entry in sorted(entries, key=lambda e: e.stat().st_mtime):
+            try:
+                os.remove(entry.path)
+            except OSError:
+                continue
+            total -= entry.stat().st_size
+            if total <= self._max_bytes:
+                break
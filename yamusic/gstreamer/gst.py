@@ -2,8 +2,10 @@
 Home of GstPlayer
 """
 import logging
+import sys
 from queue import Empty
-from typing import Dict, List
+from time import monotonic
+from typing import Any, Dict, List, Optional, Tuple, Union
 from json import loads
 
 from aioprocessing import AioManager, AioQueue
@@ -12,17 +14,33 @@ gi.require_version('Gst', '1.0')
 from gi.repository import GLib, Gst                                                                 # pylint: disable=import-error,wrong-import-position
 
 from utils.constants.app import APP_NAME                                                            # pylint: disable=wrong-import-position                                 
-from utils.constants.events import TYPE_ATF, TYPE_STATE, TYPE_REPEAT                                # pylint: disable=wrong-import-position
+from utils.constants.events import (                                                                 # pylint: disable=wrong-import-position
+    TYPE_ATF,
+    TYPE_BUFFERING,
+    TYPE_RECOVER,
+    TYPE_REPEAT,
+    TYPE_SKIP_NEXT,
+    TYPE_STATE,
+    TYPE_TRACK_START,
+)
 from yamusic.mpris import MprisService, PlayState                                                   # pylint: disable=wrong-import-position
 
+from .qos import QosRecord                                                                          # pylint: disable=wrong-import-position
+from .sink import PROFILE_DEFAULT, SINK_AUTO, SinkStats, make_audio_sink                            # pylint: disable=wrong-import-position
+
 
 # GstPlayer states
 STATE_READY         : str = 'ready'
 STATE_PLAYING       : str = 'playing'
 STATE_PAUSED        : str = 'paused'
 STATE_ATF           : str = 'atf'
+STATE_BUFFERING     : str = 'buffering'
+STATE_RECOVERING    : str = 'recovering'
 STATE_ERR           : str = 'err'
 
+# Exit code of Gstreamer process shut down on a non-recoverable error
+EXIT_FATAL          : int = 3
+
 # GstPlayer commands
 CMD_SHUTDOWN        : str = 'shutdown'
 CMD_PLAY            : str = 'play'
@@ -35,21 +53,38 @@ CMD_SKIP_FW         : str = 'skip_forward'
 CMD_SKIP_BW         : str = 'skip_back'
 CMD_SET_POSITION    : str = 'set_position'
 CMD_SET_VOLUME      : str = 'set_volume'
+CMD_SET_ART         : str = 'set_art'
 
 # GstPlayer dashboard attributes
+DASH_BUFFERING      : str = 'buffering'
+DASH_BUF_STALLS     : str = 'buffering_stalls'
+DASH_BUF_STALL_TIME : str = 'buffering_stall_time'
 DASH_DURATION       : str = 'duration'
 DASH_ERROR          : str = 'error'
 DASH_POSITION       : str = 'position'
+DASH_QOS            : str = 'qos'
+DASH_QOS_LAST       : str = 'qos_last'
+DASH_RECOVERIES     : str = 'recoveries'
+DASH_RECOVERY_TIME  : str = 'recovery_time'
 DASH_REPEAT         : str = 'repeat'
+DASH_SINK           : str = 'sink'
 DASH_STATE          : str = 'state'
 DASH_URI            : str = 'uri'
 DASH_VOLUME         : str = 'volume'
 
 DASHBOARD           : Dict[str, str] = {
+    DASH_BUFFERING: 100,
+    DASH_BUF_STALLS: 0,
+    DASH_BUF_STALL_TIME: 0.0,
     DASH_DURATION: None,
     DASH_ERROR: None,
     DASH_POSITION: None,
+    DASH_QOS: None,
+    DASH_QOS_LAST: None,
+    DASH_RECOVERIES: 0,
+    DASH_RECOVERY_TIME: None,
     DASH_REPEAT: False,
+    DASH_SINK: None,
     DASH_STATE: None,
     DASH_URI: None,
     DASH_VOLUME: None,
@@ -58,15 +93,69 @@ DASHBOARD           : Dict[str, str] = {
 # Playbin properties and constants
 _FORMAT_TIME        : Gst.Format = Gst.Format(Gst.Format.TIME)
 _NANOSEC_MULT       : int = 10 ** 9
+_USEC_MULT          : int = 10 ** 6
 _ATF_THRESHOLD      : float = 0.95
+_ATF_LOOKAHEAD      : float = 10.0
 _GST_STATE_TIMEOUT  : int = 200 * Gst.MSECOND
 _PROP_VOLUME        : str = 'volume'
 _PROP_URI           : str = 'uri'
 _PROP_VIS           : str = 'vis-plugin'
 _PROP_FLAGS         : str = 'flags'
+_PROP_SOURCE        : str = 'source'
+_PROP_AUDIO_SINK    : str = 'audio-sink'
+_FORMAT_BYTES       : Gst.Format = Gst.Format(Gst.Format.BYTES)
 _PERIODIC_DELAY     : int = 500
 _VIS_CLASS          : str = 'Visualization'
 _VIS_FLAGS          : int = 0x01+0x02+0x08+0x10+0x200+0x400
+_PROP_BUF_SIZE      : str = 'buffer-size'
+_PROP_BUF_DURATION  : str = 'buffer-duration'
+_PROP_RING_BUF_SIZE : str = 'ring-buffer-max-size'
+_PROP_LOW_WATERMARK : str = 'low-watermark'
+_PROP_HIGH_WATERMARK: str = 'high-watermark'
+_QUEUE2_FACTORY     : str = 'queue2'
+_DOWNLOAD_FLAG      : int = 0x80
+_BUF_REPORT_STEP    : int = 10
+
+# Playback engines
+ENGINE_PLAYBIN      : str = 'playbin'
+ENGINE_PLAYBIN3     : str = 'playbin3'
+ENGINES             : List[str] = [ENGINE_PLAYBIN, ENGINE_PLAYBIN3]
+
+# Errors which are worth to retry with freshly resolved URI:
+# expired or revoked links, network resets and truncated streams.
+_RECOVERABLE_ERRORS : List[Tuple[Any, List[int]]] = [
+    (Gst.ResourceError, [
+        Gst.ResourceError.FAILED,
+        Gst.ResourceError.NOT_FOUND,
+        Gst.ResourceError.OPEN_READ,
+        Gst.ResourceError.READ,
+        Gst.ResourceError.SEEK,
+        Gst.ResourceError.NOT_AUTHORIZED,
+    ]),
+    (Gst.StreamError, [
+        Gst.StreamError.FAILED,
+        Gst.StreamError.DEMUX,
+        Gst.StreamError.DECODE,
+    ]),
+]
+
+# Buffering profile keys, see BUFFERING_DEFAULTS
+BUF_SIZE            : str = 'buffer_size'
+BUF_DURATION_MS     : str = 'buffer_duration_ms'
+BUF_DOWNLOAD        : str = 'download'
+BUF_RING_SIZE       : str = 'ring_buffer_max_size'
+BUF_LOW_WATERMARK   : str = 'low_watermark'
+BUF_HIGH_WATERMARK  : str = 'high_watermark'
+
+# -1 and None leave the playbin defaults untouched
+BUFFERING_DEFAULTS  : Dict[str, Union[int, float, bool]] = {
+    BUF_SIZE: -1,
+    BUF_DURATION_MS: -1,
+    BUF_DOWNLOAD: False,
+    BUF_RING_SIZE: 0,
+    BUF_LOW_WATERMARK: None,
+    BUF_HIGH_WATERMARK: None,
+}
 
 
 _LOGGER: logging.Logger = logging.getLogger(__name__)
@@ -87,6 +176,9 @@ class GstPlayer(object):
         command_queue: AioQueue,
         media_queue: AioQueue,
         ui_event_queue: AioQueue,
+        buffering: Optional[Dict] = None,
+        engine: str = ENGINE_PLAYBIN,
+        sink: Optional[Dict] = None,
     ):
         self._ui_event_queue: AioQueue = ui_event_queue
         self._command_queue: AioQueue = command_queue
@@ -95,20 +187,52 @@ class GstPlayer(object):
 
         self._atf_sent: bool = False
         self._repeat: bool = False
+        self._buffering: Dict = dict(BUFFERING_DEFAULTS, **(buffering or {}))
+        self._extra_flags: int = _DOWNLOAD_FLAG if self._buffering[BUF_DOWNLOAD] else 0
+        self._buffering_since: float = None
+        self._resume_after_buffering: bool = False
+        self._reported_percent: int = 100
+        self._qos: QosRecord = None
+        self._recovering_since: float = None
+        self._pending_seek: float = None
+        self._next_track: Dict = None
+        self._switch_requested: float = None
+        self.failed: bool = False
 
         # Create gst playbin and set event callbacks
         Gst.init(None)
-        self._playbin: Gst.Element = Gst.ElementFactory.make('playbin', 'player')
+        if engine not in ENGINES or not Gst.ElementFactory.find(engine):
+            _LOGGER.warning('Engine %s is not available, falling back to %s.', engine, ENGINE_PLAYBIN)
+            engine = ENGINE_PLAYBIN
+        # playbin3 accepts next URI while playing and switches to it without a gap
+        self._gapless: bool = engine == ENGINE_PLAYBIN3
+        self._playbin: Gst.Element = Gst.ElementFactory.make(engine, 'player')
+        sink = sink or {}
+        self._sink_stats: SinkStats = SinkStats(
+            sink.get('sink', SINK_AUTO), sink.get('profile', PROFILE_DEFAULT))
+        audio_sink: Optional[Gst.Element] = make_audio_sink(
+            self._sink_stats.sink, self._sink_stats.profile)
+        if audio_sink:
+            self._playbin.set_property(_PROP_AUDIO_SINK, audio_sink)
         self._dashboard[DASH_VOLUME] = self._playbin.get_property(_PROP_VOLUME)
         self._playbin.connect("about-to-finish", self._on_atf)
+        self._playbin.connect("element-setup", self._on_element_setup)
+        self._setup_buffering()
         bus: Gst.Bus = self._playbin.get_bus()
         bus.add_signal_watch()
         bus.connect('message::error', self._on_error)
         bus.connect('message::eos', self._on_eos)
         bus.connect('message::state-changed', self._on_state_changed)
+        bus.connect('message::buffering', self._on_buffering)
+        bus.connect('message::stream-start', self._on_stream_start)
+        bus.connect('message::async-done', self._on_async_done)
+        bus.connect('message::qos', self._on_qos)
+        bus.connect('message::latency', self._on_latency)
+        if self._gapless:
+            bus.connect('message::stream-collection', self._on_stream_collection)
         self._loop: GLib.MainLoop = GLib.MainLoop()
-        _LOGGER.debug('Created Gstreamer playbin.')
-        self._mpris: MprisService = MprisService(APP_NAME)
+        _LOGGER.debug('Created Gstreamer %s.', engine)
+        self._mpris: MprisService = MprisService(APP_NAME, self)
 
 
     def run(self) -> None:
@@ -121,6 +245,8 @@ class GstPlayer(object):
         GLib.timeout_add(_PERIODIC_DELAY, self._periodic_task)
         self._loop.run()
 
+        self._finish_qos_record()
+        _LOGGER.info('Audio sink stats: %s.', self._sink_stats.to_dict())
         self._set_playbin_state(Gst.State.NULL)
         self._playbin = None
         _LOGGER.debug('Gstreamer playbin is shut down.')
@@ -146,11 +272,16 @@ class GstPlayer(object):
             if self._state == Gst.State.PLAYING:
                 position: float = self._get_media_position()
                 self._dashboard[DASH_POSITION] = position
+                self._update_qos_bytes()
                 if self._dashboard[DASH_DURATION] == 0:
                     duration: float = self._get_media_duration()
                     self._dashboard[DASH_DURATION] = duration
+                if self._gapless:
+                    self._prepare_gapless(position)
             elif self._state == Gst.State.READY:
                 self._dequeue_next_media()
+            if self._sink_stats.update_wakeups():
+                self._dashboard[DASH_SINK] = self._sink_stats.to_dict()
         except _GstPlayerError as exc:
             self._error_handler(exc)
             return False
@@ -160,28 +291,43 @@ class GstPlayer(object):
     # Pipeline commands that can be called via _command_queue
     def shutdown(self) -> None:
         """Shutdown process."""
-        self._mpris.shutdown()
         if self._state != Gst.State.NULL:
             self.stop()
+        self._mpris.shutdown()
         if self._loop.is_running():
-            self._loop.quit()
+            # Let pending MPRIS messages go out before the loop stops
+            GLib.idle_add(self._loop.quit)
 
     def play(self) -> None:
         """Change state to playing."""
+        if self._is_buffering:
+            # Pipeline will be resumed as soon as buffer is filled
+            self._resume_after_buffering = True
+            self._set_own_state(STATE_BUFFERING)
+            self._mpris.set_player_state(PlayState.PLAYING)
+            return
         if self._state == Gst.State.PAUSED:
+            self._sink_stats.on_command(CMD_PLAY)
             self._set_playbin_state(Gst.State.PLAYING)
             self._mpris.set_player_state(PlayState.PLAYING)
 
 
     def pause(self) -> None:
         """Change state to paused."""
+        if self._is_buffering:
+            self._resume_after_buffering = False
+            self._set_own_state(STATE_PAUSED)
+            self._mpris.set_player_state(PlayState.PAUSED)
+            return
         if self._state == Gst.State.PLAYING:
+            self._sink_stats.on_command(CMD_PAUSE)
             self._set_playbin_state(Gst.State.PAUSED)
             self._mpris.set_player_state(PlayState.PAUSED)
 
 
     def stop(self) -> None:
         """Stop pipeline."""
+        self._end_buffering(resume=False)
         self._set_playbin_state(Gst.State.READY)
         self._mpris.set_player_state(PlayState.STOPPED)
         # self._mpris.set_player_metadata(None)
@@ -199,8 +345,14 @@ class GstPlayer(object):
         if self._repeat:
             self._set_repeat(False)
             self._on_atf(None)
+        self._switch_requested = monotonic()
+        self._end_buffering(resume=False)
         self._set_playbin_state(Gst.State.READY)
 
+    def request_next(self) -> None:
+        """Ask controller for the next track, e.g. from MPRIS client."""
+        self._ui_event_queue.put({'type': TYPE_SKIP_NEXT})
+
     def skip_forward(self) -> None:
         """Skip 5% of media."""
         inc = self._get_media_duration() / 20
@@ -216,24 +368,57 @@ class GstPlayer(object):
     def set_position(self, position: float) -> None:
         """Set media position."""
         duration: float = self._get_media_duration()
-        if position > duration - (duration * 0.01):
+        if not self._gapless and position > duration - (duration * 0.01):
             # Emission of ATF during seek is unreliable,
             # leave some time for track to complete and fire ATF
             return
         position = max(position, 0)
+        if self._qos:
+            self._qos.on_seek()
+        self._sink_stats.on_command(CMD_SET_POSITION)
         self._playbin.seek_simple(
             _FORMAT_TIME, Gst.SeekFlags.FLUSH,
             position * _NANOSEC_MULT
         )
         self._dashboard[DASH_POSITION] = position
+        self._mpris.seeked(int(position * _USEC_MULT))
         _LOGGER.debug('Set position to %d s.', position)
 
     def set_volume(self, volume: float) -> None:
         """Set volume."""
+        self._sink_stats.on_command(CMD_SET_VOLUME)
         self._playbin.set_property(_PROP_VOLUME, volume)
+        self._on_command_applied(CMD_SET_VOLUME)
         self._dashboard[DASH_VOLUME] = volume
+        self._mpris.set_player_volume(volume)
         _LOGGER.debug('volume set to %.2f', volume)
 
+    def set_art(self, track_id: str, art_url: str) -> None:
+        """Attach cover, which was downloaded after the track had been queued."""
+        if self._next_track and self._next_track.get('track_id') == track_id:
+            self._next_track['art_url'] = art_url
+        self._mpris.set_player_art(track_id, art_url)
+
+    # Pipeline properties used by MPRIS
+    @property
+    def position_us(self) -> int:
+        """Precise media position in microseconds."""
+        _, current, _ = self._playbin.get_state(0)
+        if current not in [Gst.State.PAUSED, Gst.State.PLAYING]:
+            return 0
+        ok, pos = self._playbin.query_position(_FORMAT_TIME)
+        return pos // Gst.USECOND if ok else 0
+
+    @property
+    def volume(self) -> float:
+        """Current volume."""
+        return self._dashboard[DASH_VOLUME]
+
+    @property
+    def repeat(self) -> bool:
+        """Is current track repeated."""
+        return self._repeat
+
     # Private pipeline properties and methods
     @property
     def _state(self) -> Gst.State:
@@ -247,9 +432,52 @@ class GstPlayer(object):
 
         return current
 
+    @property
+    def _is_buffering(self) -> bool:
+        return self._buffering_since is not None
+
+    def _setup_buffering(self) -> None:
+        """Apply buffering profile to the playbin"""
+        if self._buffering[BUF_SIZE] >= 0:
+            self._playbin.set_property(_PROP_BUF_SIZE, int(self._buffering[BUF_SIZE]))
+        if self._buffering[BUF_DURATION_MS] >= 0:
+            self._playbin.set_property(
+                _PROP_BUF_DURATION, int(self._buffering[BUF_DURATION_MS] * Gst.MSECOND))
+        if self._extra_flags:
+            flags: int = int(self._playbin.get_property(_PROP_FLAGS))
+            self._playbin.set_property(_PROP_FLAGS, flags | self._extra_flags)
+            self._playbin.set_property(_PROP_RING_BUF_SIZE, int(self._buffering[BUF_RING_SIZE]))
+        _LOGGER.debug('Buffering profile: %s.', self._buffering)
+
+    def _start_buffering(self) -> None:
+        """Pause pipeline until buffer is refilled"""
+        self._buffering_since = monotonic()
+        self._resume_after_buffering = True
+        self._dashboard[DASH_BUF_STALLS] += 1
+        self._set_playbin_state(Gst.State.PAUSED)
+        self._set_own_state(STATE_BUFFERING)
+        _LOGGER.debug('Buffering started.')
+
+    def _end_buffering(self, resume: bool = True) -> None:
+        """Account stall time and resume pipeline if it was paused by buffering"""
+        if not self._is_buffering:
+            return
+        stalled: float = monotonic() - self._buffering_since
+        self._buffering_since = None
+        self._dashboard[DASH_BUF_STALL_TIME] += stalled
+        if self._qos:
+            self._qos.on_stall(stalled)
+            self._publish_qos()
+        self._dashboard[DASH_BUFFERING] = 100
+        self._emit_buffering_event(100)
+        _LOGGER.debug('Buffering finished in %.2f s.', stalled)
+        if resume and self._resume_after_buffering:
+            self._set_playbin_state(Gst.State.PLAYING)
+
     def _set_repeat(self, val: bool) -> None:
         self._repeat = val
         self._dashboard[DASH_REPEAT] = self._repeat
+        self._mpris.set_player_loop_status(self._repeat)
         self._emit_repeat_event()
         _LOGGER.debug('Repeat: %s.', 'enabled' if self._repeat else 'disabled')
 
@@ -274,17 +502,13 @@ class GstPlayer(object):
 
     def _dequeue_next_media(self) -> None:
         """Get next uri from media queue and set it as next uri in the playbin"""
-        if not self._repeat:
-            try:
-                track: Dict = loads(self._media_queue.get(False))
-                uri: str = track.get('uri')
-            except Empty:
+        if not self._repeat or self._is_recovering:
+            track: Optional[Dict] = self._pop_next_media()
+            if not track:
                 return
-            self._mpris.set_player_metadata(track)
-            self._dashboard[DASH_URI] = uri
-            self._dashboard[DASH_POSITION] = 0
-            self._dashboard[DASH_DURATION] = 0
-            self._playbin.set_property(_PROP_URI, uri)
+            self._load_media(track)
+            self._pending_seek = track.get('position')
+            self._playbin.set_property(_PROP_URI, track.get('uri'))
             _LOGGER.debug('Dequeued %s.', self._playbin.get_property(_PROP_URI))
         else:
             self.play_again()
@@ -293,6 +517,87 @@ class GstPlayer(object):
             self._set_playbin_state(Gst.State.PLAYING)
             self._mpris.set_player_state(PlayState.PLAYING)
 
+    def _pop_next_media(self) -> Optional[Dict]:
+        """Take track, which was prepared for gapless switch, or the next one from media queue"""
+        if self._next_track:
+            track: Dict = self._next_track
+            self._next_track = None
+            return track
+        try:
+            return loads(self._media_queue.get(False))
+        except Empty:
+            return None
+
+    def _load_media(self, track: Dict) -> None:
+        """Make given track current one and let the player know it has started"""
+        self._ui_event_queue.put({'type': TYPE_TRACK_START, 'track_id': track.get('track_id')})
+        self._mpris.set_player_metadata(track)
+        self._start_qos_record(track.get('uri'), track.get('track_id'))
+        self._dashboard[DASH_URI] = track.get('uri')
+        self._dashboard[DASH_POSITION] = track.get('position', 0)
+        self._dashboard[DASH_DURATION] = 0
+
+    def _prepare_gapless(self, position: float) -> None:
+        """
+        Request next track ahead of time and hand its URI to playbin3
+        before current stream is drained, so that the switch has no gap.
+        """
+        if self._repeat or self._next_track:
+            return
+        duration: float = self._dashboard[DASH_DURATION]
+        if duration and position >= min(duration * _ATF_THRESHOLD, duration - _ATF_LOOKAHEAD):
+            self._emit_atf_event()
+        if not self._atf_sent:
+            return
+        try:
+            self._next_track = loads(self._media_queue.get(False))
+        except Empty:
+            return
+        self._playbin.set_property(_PROP_URI, self._next_track.get('uri'))
+        _LOGGER.debug('Prepared gapless switch to %s.', self._next_track.get('uri'))
+
+    def _start_qos_record(self, uri: str, track_id: str) -> None:
+        """Close QoS record of previous track and open a new one"""
+        self._finish_qos_record()
+        self._qos = QosRecord(uri=uri, track_id=track_id, requested=self._switch_requested)
+        self._switch_requested = None
+        self._publish_qos()
+
+    def _finish_qos_record(self) -> None:
+        if not self._qos:
+            return
+        self._qos.write()
+        self._dashboard[DASH_QOS_LAST] = self._qos.to_dict()
+        self._qos = None
+
+    def _publish_qos(self) -> None:
+        if self._qos:
+            self._dashboard[DASH_QOS] = self._qos.to_dict()
+
+    def _update_qos_bytes(self) -> None:
+        """Query source element for the number of bytes received"""
+        if not self._qos:
+            return
+        source: Gst.Element = self._playbin.get_property(_PROP_SOURCE)
+        if source is None:
+            return
+        ok, transferred = source.query_position(_FORMAT_BYTES)
+        if ok and transferred > self._qos.bytes:
+            self._qos.bytes = transferred
+            self._publish_qos()
+
+    def _get_latency_ms(self) -> float:
+        """Pipeline latency, i.e. amount of audio queued in the sink"""
+        query: Gst.Query = Gst.Query.new_latency()
+        if not self._playbin.query(query):
+            return 0.0
+        _, min_latency, _ = query.parse_latency()
+        return round(min_latency / Gst.MSECOND, 1)
+
+    def _on_command_applied(self, command: str) -> None:
+        self._sink_stats.on_applied(command, self._get_latency_ms())
+        self._dashboard[DASH_SINK] = self._sink_stats.to_dict()
+
     def _set_own_state(self, state: str, emit: bool = True) -> None:
         self._dashboard[DASH_STATE] = state
         if emit:
@@ -308,12 +613,65 @@ class GstPlayer(object):
     def _emit_repeat_event(self) -> None:
         self._ui_event_queue.put({'type': TYPE_REPEAT})
 
+    def _emit_buffering_event(self, percent: int) -> None:
+        """Report buffering progress with _BUF_REPORT_STEP granularity"""
+        if percent < 100 and abs(percent - self._reported_percent) < _BUF_REPORT_STEP:
+            return
+        self._reported_percent = percent
+        self._ui_event_queue.put({'type': TYPE_BUFFERING, 'percent': percent})
+
     def _emit_atf_event(self) -> None:
         if not self._atf_sent:
             self._ui_event_queue.put({'type': TYPE_ATF})
             self._atf_sent = True
 
+    @property
+    def _is_recovering(self) -> bool:
+        return self._recovering_since is not None
+
+    @staticmethod
+    def _is_recoverable(error: GLib.Error) -> bool:
+        return any(
+            error.matches(domain.quark(), code)
+            for domain, codes in _RECOVERABLE_ERRORS for code in codes
+        )
+
+    def _recover(self, error: GLib.Error) -> None:
+        """
+        Tear down playbin and ask controller for a fresh URI of the current track.
+        Refreshed media is dequeued in the run loop and seeked to the last known position.
+        """
+        self._end_buffering(resume=False)
+        self._pending_seek = None
+        self._set_playbin_state(Gst.State.NULL)
+        self._set_playbin_state(Gst.State.READY)
+        if self._atf_sent:
+            # Next track is already queued, simply proceed to it
+            _LOGGER.warning('Gstreamer fired error: %s near the end of track, skipping.', error)
+            return
+        _LOGGER.warning('Gstreamer fired error: %s. Recovering.', error)
+        if not self._is_recovering:
+            self._recovering_since = monotonic()
+        self._dashboard[DASH_ERROR] = error.message
+        self._set_own_state(STATE_RECOVERING)
+        self._ui_event_queue.put({
+            'type': TYPE_RECOVER,
+            'position': self._dashboard[DASH_POSITION] or 0,
+        })
+
+    def _end_recovery(self) -> None:
+        if not self._is_recovering:
+            return
+        recovery_time: float = round((monotonic() - self._recovering_since) * 1000, 1)
+        self._recovering_since = None
+        self._dashboard[DASH_RECOVERIES] += 1
+        self._dashboard[DASH_RECOVERY_TIME] = recovery_time
+        _LOGGER.info('Recovered playback in %.1f ms.', recovery_time)
+
     def _eos_handler(self):
+        if not self._atf_sent:
+            # Seek close to the end may swallow ATF, next track is still required
+            self._on_atf(None)
         self._set_playbin_state(Gst.State.READY)
         _LOGGER.debug('Finished %s.', self._dashboard[DASH_URI])
 
@@ -322,6 +680,7 @@ class GstPlayer(object):
         _LOGGER.error('Gstreamer fired error: %s. Shutting down.', error)
         self._dashboard[DASH_ERROR] = error
         self._set_own_state(STATE_ERR)
+        self.failed = True
         self.shutdown()
 
     def _set_visualizer(self, name: str):
@@ -333,7 +692,7 @@ class GstPlayer(object):
         for item in vis_list:
             if item.name == name:
                 self._playbin.set_property(_PROP_VIS, Gst.ElementFactory.create(item))
-                self._playbin.set_property(_PROP_FLAGS, _VIS_FLAGS)
+                self._playbin.set_property(_PROP_FLAGS, _VIS_FLAGS | self._extra_flags)
                 return
         raise _GstPlayerError(f'No such visualizer: {name}!')
 
@@ -341,13 +700,88 @@ class GstPlayer(object):
     def _on_atf(self, stream: Gst.Stream) -> None:                                                  # pylint: disable=unused-argument
         _LOGGER.debug('Track %s about to finish.', self._playbin.get_property(_PROP_URI))
         if not self._repeat:
+            if self._switch_requested is None:
+                self._switch_requested = monotonic()
             self._emit_atf_event()
             return
         _LOGGER.debug('Repeating.')
 
+    def _on_element_setup(self, playbin: Gst.Element, element: Gst.Element) -> None:              # pylint: disable=unused-argument
+        factory: Gst.ElementFactory = element.get_factory()
+        if not factory or factory.get_name() != _QUEUE2_FACTORY:
+            return
+        if self._buffering[BUF_LOW_WATERMARK] is not None:
+            element.set_property(_PROP_LOW_WATERMARK, float(self._buffering[BUF_LOW_WATERMARK]))
+        if self._buffering[BUF_HIGH_WATERMARK] is not None:
+            element.set_property(_PROP_HIGH_WATERMARK, float(self._buffering[BUF_HIGH_WATERMARK]))
+
+    def _on_buffering(self, bus: Gst.Bus, message: Gst.Message) -> None:                            # pylint: disable=unused-argument
+        percent: int = message.parse_buffering()
+        self._dashboard[DASH_BUFFERING] = percent
+        if self._extra_flags & _DOWNLOAD_FLAG:
+            # In download mode messages report download progress, playback is never stalled
+            return
+        if percent < 100:
+            self._emit_buffering_event(percent)
+            # Do not wait for transient states here, target state is enough
+            _, current, pending = self._playbin.get_state(0)
+            if not self._is_buffering and Gst.State.PLAYING in (current, pending):
+                self._start_buffering()
+        else:
+            self._end_buffering()
+
+    def _on_stream_start(self, bus: Gst.Bus, message: Gst.Message) -> None:                        # pylint: disable=unused-argument
+        if self._gapless and self._next_track:
+            # playbin3 has switched to the prepared track without EOS
+            track: Dict = self._pop_next_media()
+            self._load_media(track)
+            self._atf_sent = False
+            _LOGGER.debug('Switched gaplessly to %s.', track.get('uri'))
+        if self._qos:
+            self._qos.on_stream_start()
+            self._publish_qos()
+
+    def _on_stream_collection(self, bus: Gst.Bus, message: Gst.Message) -> None:                   # pylint: disable=unused-argument
+        """Select only the first audio stream, so that cover art or video is never decoded"""
+        collection: Gst.StreamCollection = message.parse_stream_collection()
+        for idx in range(collection.get_size()):
+            stream: Gst.Stream = collection.get_stream(idx)
+            if stream.get_stream_type() & Gst.StreamType.AUDIO:
+                self._playbin.send_event(Gst.Event.new_select_streams([stream.get_stream_id()]))
+                return
+
+    def _on_async_done(self, bus: Gst.Bus, message: Gst.Message) -> None:                          # pylint: disable=unused-argument
+        if self._qos:
+            self._qos.on_async_done()
+            self._publish_qos()
+        self._on_command_applied(CMD_SET_POSITION)
+        if self._pending_seek:
+            # Media has prerolled, restore position after recovery
+            position: float = self._pending_seek
+            self._pending_seek = None
+            self.set_position(position)
+
+    def _on_qos(self, bus: Gst.Bus, message: Gst.Message) -> None:                                 # pylint: disable=unused-argument
+        _, _, dropped = message.parse_qos_stats()
+        if self._qos:
+            self._qos.on_qos(dropped)
+            self._publish_qos()
+
+    def _on_latency(self, bus: Gst.Bus, message: Gst.Message) -> None:                             # pylint: disable=unused-argument
+        self._playbin.recalculate_latency()
+        if self._qos:
+            self._qos.latency = self._get_latency_ms()
+            self._publish_qos()
+
     def _on_error(self, bus: Gst.Bus, message: Gst.Message) -> None:                                # pylint: disable=unused-argument
         error, debug = message.parse_error()
         _LOGGER.warning('Gstreamer error details: %s.', debug)
+        if self._is_recoverable(error):
+            try:
+                self._recover(error)
+                return
+            except _GstPlayerError as exc:
+                error = exc
         self._error_handler(error)
 
     def _on_eos(self, bus: Gst.Bus, message: Gst.Message) -> None:                                  # pylint: disable=unused-argument
@@ -364,8 +798,26 @@ class GstPlayer(object):
             Gst.Element.state_get_name(new),
             Gst.Element.state_get_name(pending))
         if new == Gst.State.PLAYING:
+            if self._qos:
+                self._qos.on_playing()
+                self._publish_qos()
+            self._end_recovery()
+            self._on_command_applied(CMD_PLAY)
             self._set_own_state(STATE_PLAYING)
-        elif new == Gst.State.READY:
+        elif new == Gst.State.READY and not self._is_recovering:
             self._set_own_state(STATE_READY)
-        elif new == Gst.State.PAUSED:
+        elif new == Gst.State.PAUSED and not self._is_buffering:
+            self._on_command_applied(CMD_PAUSE)
             self._set_own_state(STATE_PAUSED)
+
+
+def run_player(*args, **kwargs) -> None:
+    """
+    Entry point of Gstreamer process.
+    GstPlayer is constructed inside the process, so that it can be restarted from scratch.
+    Exits with EXIT_FATAL after a non-recoverable error, so that it is not restarted.
+    """
+    player: GstPlayer = GstPlayer(*args, **kwargs)
+    player.run()
+    if player.failed:
+        sys.exit(EXIT_FATAL)
@@ -0,0 +1,104 @@
+"""
+Per-track playback quality-of-service records
+"""
+import logging
+from json import dumps
+from time import monotonic, time
+from typing import Dict, List, Optional
+
+from utils.log_handlers import qos_handler
+
+_QOS_LOGGER: logging.Logger = logging.getLogger('yamusic.qos')
+_QOS_LOGGER.setLevel(logging.INFO)
+_QOS_LOGGER.propagate = False
+if qos_handler not in _QOS_LOGGER.handlers:
+    _QOS_LOGGER.addHandler(qos_handler)
+
+
+def _elapsed_ms(since: Optional[float]) -> Optional[float]:
+    if since is None:
+        return None
+    return round((monotonic() - since) * 1000, 1)
+
+
+class QosRecord:
+    """
+    Playback statistics of a single track.
+    Timestamps are taken from monotonic clock, durations are in milliseconds.
+    """
+    def __init__(self, uri: str = None, track_id: str = None,
+                 requested: Optional[float] = None) -> None:
+        self.uri: str = uri
+        self.track_id: str = track_id
+        self.started_at: float = time()
+        self.stream_started_at: Optional[float] = None
+        self.time_to_first_audio: Optional[float] = None
+        self.preroll: Optional[float] = None
+        self.transition: Optional[float] = None
+        self.buffering_stalls: int = 0
+        self.buffering_time: float = 0.0
+        self.underruns: int = 0
+        self.dropped: int = 0
+        self.latency: Optional[float] = None
+        self.seeks: List[float] = []
+        self.bytes: int = 0
+        # When track switch was requested (skip or ATF), or when track was dequeued
+        self._requested: float = requested or monotonic()
+        self._dequeued: float = monotonic()
+        self._seek_started: Optional[float] = None
+
+    def on_stream_start(self) -> None:
+        """First buffer of the new stream has reached the sinks"""
+        if self.transition is None:
+            self.transition = _elapsed_ms(self._requested)
+            self.stream_started_at = time()
+
+    def on_async_done(self) -> None:
+        """Pipeline has prerolled or completed flushing seek"""
+        if self.preroll is None:
+            self.preroll = _elapsed_ms(self._dequeued)
+        elif self._seek_started is not None:
+            self.seeks.append(_elapsed_ms(self._seek_started))
+            self._seek_started = None
+
+    def on_playing(self) -> None:
+        """Pipeline reached PLAYING state"""
+        if self.time_to_first_audio is None:
+            self.time_to_first_audio = _elapsed_ms(self._dequeued)
+
+    def on_seek(self) -> None:
+        """Flushing seek was issued"""
+        self._seek_started = monotonic()
+
+    def on_stall(self, stalled: float) -> None:
+        """Playback was stalled by buffering for given number of seconds"""
+        self.buffering_stalls += 1
+        self.buffering_time += round(stalled * 1000, 1)
+
+    def on_qos(self, dropped: int) -> None:
+        """Sink reported late or dropped buffers"""
+        self.underruns += 1
+        self.dropped = max(self.dropped, dropped)
+
+    def to_dict(self) -> Dict:
+        """Dictionary representation, suitable for dashboard"""
+        return {
+            'uri': self.uri,
+            'track_id': self.track_id,
+            'started_at': self.started_at,
+            'stream_started_at': self.stream_started_at,
+            'time_to_first_audio': self.time_to_first_audio,
+            'preroll': self.preroll,
+            'transition': self.transition,
+            'buffering_stalls': self.buffering_stalls,
+            'buffering_time': self.buffering_time,
+            'underruns': self.underruns,
+            'dropped': self.dropped,
+            'latency': self.latency,
+            'seeks': self.seeks,
+            'bytes': self.bytes,
+        }
+
+    def write(self) -> None:
+        """Append record to the rolling QoS log"""
+        _QOS_LOGGER.info(dumps(self.to_dict()))
@@ -0,0 +1,126 @@
+"""
+Audio sink selection and latency profiles
+"""
+import logging
+from time import monotonic
+from typing import Dict, Optional
+
+import psutil
+import gi                                                                                           # pylint: disable=import-error
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst                                                                       # pylint: disable=import-error,wrong-import-position
+
+_LOGGER: logging.Logger = logging.getLogger(__name__)
+
+# Sinks
+SINK_AUTO           : str = 'auto'
+SINK_PULSE          : str = 'pulse'
+SINK_PIPEWIRE       : str = 'pipewire'
+SINK_ALSA           : str = 'alsa'
+SINK_FAKE           : str = 'fakesink'
+
+_SINK_FACTORIES     : Dict[str, str] = {
+    SINK_AUTO: 'autoaudiosink',
+    SINK_PULSE: 'pulsesink',
+    SINK_PIPEWIRE: 'pipewiresink',
+    SINK_ALSA: 'alsasink',
+    SINK_FAKE: 'fakesink',
+}
+
+# Profiles: buffer-time and latency-time of audio sink in microseconds
+PROFILE_DEFAULT     : str = 'default'
+PROFILE_LOW_LATENCY : str = 'low-latency'
+PROFILE_POWER_SAVE  : str = 'power-save'
+
+_PROP_BUFFER_TIME   : str = 'buffer-time'
+_PROP_LATENCY_TIME  : str = 'latency-time'
+_PROP_SYNC          : str = 'sync'
+
+PROFILES            : Dict[str, Dict[str, int]] = {
+    PROFILE_DEFAULT: {},
+    PROFILE_LOW_LATENCY: {
+        _PROP_BUFFER_TIME: 40000,
+        _PROP_LATENCY_TIME: 10000,
+    },
+    PROFILE_POWER_SAVE: {
+        _PROP_BUFFER_TIME: 2000000,
+        _PROP_LATENCY_TIME: 500000,
+    },
+}
+
+_WAKEUP_PERIOD      : float = 5.0
+
+
+def make_audio_sink(sink: str = SINK_AUTO, profile: str = PROFILE_DEFAULT) -> Optional[Gst.Element]:
+    """
+    Create audio sink of given kind tuned for given profile.
+    Returns None when the sink is not available, so that playbin picks its default one.
+    """
+    factory: Optional[str] = _SINK_FACTORIES.get(sink)
+    element: Optional[Gst.Element] = Gst.ElementFactory.make(factory, 'audio-sink') if factory else None
+    if element is None:
+        _LOGGER.warning('Audio sink %s is not available.', sink)
+        return None
+    if sink == SINK_FAKE:
+        # Consume buffers in real time, like a real device would
+        element.set_property(_PROP_SYNC, True)
+    for prop, value in PROFILES.get(profile, {}).items():
+        _set_sink_property(element, prop, value)
+    _LOGGER.debug('Audio sink: %s, profile: %s.', factory, profile)
+    return element
+
+
+def _set_sink_property(element: Gst.Element, prop: str, value: int) -> None:
+    """Set property on sink or, for autoaudiosink, on the actual device sink when it appears"""
+    if element.find_property(prop):
+        element.set_property(prop, value)
+    elif isinstance(element, Gst.Bin):
+        element.connect(
+            'deep-element-added',
+            lambda _bin, _sub, child: child.find_property(prop) and child.set_property(prop, value))
+
+
+class SinkStats:
+    """Measured control latency and wakeup rate of Gstreamer process for active profile"""
+    def __init__(self, sink: str, profile: str) -> None:
+        self.sink: str = sink
+        self.profile: str = profile
+        self.control_latency: Dict[str, float] = {}
+        self.wakeups: Optional[float] = None
+        self._commands: Dict[str, float] = {}
+        self._process: psutil.Process = psutil.Process()
+        self._switches: int = self._process.num_ctx_switches().voluntary
+        self._switches_at: float = monotonic()
+
+    def on_command(self, command: str) -> None:
+        """Control command was issued"""
+        self._commands[command] = monotonic()
+
+    def on_applied(self, command: str, sink_latency: float = 0.0) -> None:
+        """
+        Command took effect in pipeline.
+        Audible latency also includes the amount of audio queued in the sink.
+        """
+        started: Optional[float] = self._commands.pop(command, None)
+        if started is not None:
+            self.control_latency[command] = round((monotonic() - started) * 1000 + sink_latency, 1)
+
+    def update_wakeups(self) -> bool:
+        """Recalculate voluntary wakeups per second, returns True when updated"""
+        elapsed: float = monotonic() - self._switches_at
+        if elapsed < _WAKEUP_PERIOD:
+            return False
+        switches: int = self._process.num_ctx_switches().voluntary
+        self.wakeups = round((switches - self._switches) / elapsed, 1)
+        self._switches = switches
+        self._switches_at = monotonic()
+        return True
+
+    def to_dict(self) -> Dict:
+        """Dictionary representation, suitable for dashboard"""
+        return {
+            'sink': self.sink,
+            'profile': self.profile,
+            'control_latency': dict(self.control_latency),
+            'wakeups': self.wakeups,
+        }
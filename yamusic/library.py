@@ -0,0 +1,77 @@
+"""Index of tracks synced to sync_dir, lets the player skip network for local copies"""
+import asyncio
+import logging
+import os
+import re
+from pathlib import Path
+from time import monotonic
+from typing import Dict, Optional, Union
+
+_LOGGER = logging.getLogger(__name__)
+
+# 'Artist - Album - Title (track_id[:album_id]).ext' as written by sync.py
+_TRACK_FILE         : re.Pattern = re.compile(r'\((\d+)(?::\d+)?\)\.(?:mp3|opus|m4a)$')
+# Directory mtime is checked at most this often, seconds
+_RESCAN_INTERVAL    : float = 30.0
+
+
+class LocalLibrary:
+    """
+    Maps track ids to files synced by sync.py.
+    Synced files appear in sync_dir by rename and disappear by unlink,
+    both change the directory mtime, so the directory is rescanned
+    in a thread when its mtime has changed, checked on lookup
+    at most every _RESCAN_INTERVAL seconds.
+    """
+    def __init__(self, sync_dir: Optional[str]):
+        self._sync_dir: Optional[str] = sync_dir
+        self._files: Dict[str, str] = {}
+        self._dir_mtime: Optional[float] = None
+        self._checked: float = float('-inf')
+        self._lock: asyncio.Lock = asyncio.Lock()
+
+    async def find(self, track_id: Union[str, int]) -> Optional[str]:
+        """file:// URI of synced track, None if it is not in the library"""
+        if not self._sync_dir:
+            return None
+        if monotonic() - self._checked >= _RESCAN_INTERVAL:
+            async with self._lock:
+                if monotonic() - self._checked >= _RESCAN_INTERVAL:
+                    await asyncio.get_running_loop().run_in_executor(None, self._refresh)
+        bare_id: str = str(track_id).split(':', 1)[0]
+        path: Optional[str] = self._files.get(bare_id)
+        if not path:
+            return None
+        if not os.path.isfile(path):
+            # Removed since the last scan, rescan on next lookup
+            self._files.pop(bare_id, None)
+            self._checked = float('-inf')
+            return None
+        return Path(path).as_uri()
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def _refresh(self) -> None:
+        self._checked = monotonic()
+        try:
+            mtime: float = os.stat(self._sync_dir).st_mtime
+        except OSError as exc:
+            if self._dir_mtime is not None:
+                _LOGGER.warning('Sync dir %s is not available: %s', self._sync_dir, exc)
+            self._files, self._dir_mtime = {}, None
+            return
+        if mtime == self._dir_mtime:
+            return
+        files: Dict[str, str] = {}
+        try:
+            with os.scandir(self._sync_dir) as entries:
+                for entry in entries:
+                    match: Optional[re.Match] = _TRACK_FILE.search(entry.name)
+                    if match:
+                        files[match.group(1)] = entry.path
+        except OSError as exc:
+            _LOGGER.warning('Cannot scan sync dir %s: %s', self._sync_dir, exc)
+            return
+        self._files, self._dir_mtime = files, mtime
+        _LOGGER.debug('Indexed %d synced tracks in %s.', len(files), self._sync_dir)
@@ -1,8 +1,9 @@
 """MPRIS Service exports"""
 
-from .mpris_service import MprisService, PlayState
+from .mpris_service import LoopStatus, MprisService, PlayState
 
 __all__ = [
+    'LoopStatus',
     'MprisService',
     'PlayState',
 ]
\ No newline at end of file
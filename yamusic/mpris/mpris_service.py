@@ -1,20 +1,33 @@
 """ MPRIS service implementation """
 import logging
-from typing import Dict
+import re
+from typing import Any, Dict
 
 from dbus_next.glib import MessageBus
-from dbus_next.service import ServiceInterface, dbus_property
+from dbus_next.service import ServiceInterface, dbus_property, method, signal
 from dbus_next.constants import PropertyAccess
 from dbus_next import Variant
+from gi.repository import GLib                                                                      # pylint: disable=import-error
 from strenum import StrEnum
 
 _LOGGER = logging.getLogger(__name__)
 
+_USEC = 1000000
+_NO_TRACK = '/org/mpris/MediaPlayer2/TrackList/NoTrack'
+
+def _track_path(track_id: Any) -> str:
+    """MPRIS track id must be a valid D-Bus object path"""
+    return f'/track/{re.sub("[^A-Za-z0-9_]", "_", str(track_id))}'
+
 class PlayState(StrEnum):
     PAUSED:  str = 'Paused'
     PLAYING: str = 'Playing'
     STOPPED: str = 'Stopped'
 
+class LoopStatus(StrEnum):
+    NONE:    str = 'None'
+    TRACK:   str = 'Track'
+
 class MprisRoot(ServiceInterface):
     def __init__(self, name):
         super().__init__('org.mpris.MediaPlayer2')
@@ -24,13 +37,56 @@ class MprisRoot(ServiceInterface):
     def desktop_entry(self) -> 's':
         return self._name
 
+    @dbus_property(name='Identity', access=PropertyAccess.READ)
+    def identity(self) -> 's':
+        return self._name
+
+    @dbus_property(name='CanQuit', access=PropertyAccess.READ)
+    def can_quit(self) -> 'b':
+        return False
+
+    @dbus_property(name='CanRaise', access=PropertyAccess.READ)
+    def can_raise(self) -> 'b':
+        return False
+
+    @dbus_property(name='HasTrackList', access=PropertyAccess.READ)
+    def has_track_list(self) -> 'b':
+        return False
+
+    @dbus_property(name='SupportedUriSchemes', access=PropertyAccess.READ)
+    def supported_uri_schemes(self) -> 'as':
+        return []
+
+    @dbus_property(name='SupportedMimeTypes', access=PropertyAccess.READ)
+    def supported_mime_types(self) -> 'as':
+        return []
+
+    @method(name='Raise')
+    def raise_(self):
+        pass
+
+    @method(name='Quit')
+    def quit(self):
+        pass
+
 class MprisPlayer(ServiceInterface):
-    def __init__(self, name):
+    """
+    org.mpris.MediaPlayer2.Player interface.
+    Transport commands are executed directly on the given player,
+    which is expected to provide GstPlayer's command methods,
+    position_us, volume and repeat properties and request_next().
+    """
+    def __init__(self, name, player):
         super().__init__('org.mpris.MediaPlayer2.Player')
         self._name: str = name
+        self._player = player
         self._playback_status: str = 'Stopped'
+        self._track_path: str = _NO_TRACK
+        self._pending: Dict[str, Any] = {}
+        self._emitted: Dict[str, Any] = {}
+        self._flush_id: int = None
         self._metadata = {
-            'mpris:trackid': Variant('o', '/track/1'),
+            'mpris:trackid': Variant('o', _NO_TRACK),
             'mpris:length': Variant('x', 0),
             'xesam:title': Variant('s', 'Not set'),
             'xesam:album': Variant('s', 'Not set'),
@@ -49,63 +105,226 @@ class MprisPlayer(ServiceInterface):
     def metadata(self) -> 'a{sv}':
         return self._metadata
 
+    @dbus_property(name='Position', access=PropertyAccess.READ)
+    def position(self) -> 'x':
+        return self._player.position_us
+
+    @dbus_property(name='Volume')
+    def volume(self) -> 'd':
+        return self._player.volume or 0.0
+
+    @volume.setter
+    def volume(self, val: 'd'):
+        self._player.set_volume(max(0.0, min(val, 1.0)))
+
+    @dbus_property(name='LoopStatus')
+    def loop_status(self) -> 's':
+        return LoopStatus.TRACK if self._player.repeat else LoopStatus.NONE
+
+    @loop_status.setter
+    def loop_status(self, val: 's'):
+        if (val == LoopStatus.TRACK) != self._player.repeat:
+            self._player.toggle_repeat()
+
+    @dbus_property(name='Rate')
+    def rate(self) -> 'd':
+        return 1.0
+
+    @rate.setter
+    def rate(self, val: 'd'):
+        pass
+
+    @dbus_property(name='MinimumRate', access=PropertyAccess.READ)
+    def minimum_rate(self) -> 'd':
+        return 1.0
+
+    @dbus_property(name='MaximumRate', access=PropertyAccess.READ)
+    def maximum_rate(self) -> 'd':
+        return 1.0
+
+    @dbus_property(name='CanGoNext', access=PropertyAccess.READ)
+    def can_go_next(self) -> 'b':
+        return True
+
+    @dbus_property(name='CanGoPrevious', access=PropertyAccess.READ)
+    def can_go_previous(self) -> 'b':
+        return False
+
+    @dbus_property(name='CanPlay', access=PropertyAccess.READ)
+    def can_play(self) -> 'b':
+        return True
+
+    @dbus_property(name='CanPause', access=PropertyAccess.READ)
+    def can_pause(self) -> 'b':
+        return True
+
+    @dbus_property(name='CanSeek', access=PropertyAccess.READ)
+    def can_seek(self) -> 'b':
+        return True
+
+    @dbus_property(name='CanControl', access=PropertyAccess.READ)
+    def can_control(self) -> 'b':
+        return True
+
+    @method(name='Next')
+    def next(self):
+        self._player.request_next()
+
+    @method(name='Previous')
+    def previous(self):
+        pass
+
+    @method(name='Pause')
+    def pause(self):
+        self._player.pause()
+
+    @method(name='PlayPause')
+    def play_pause(self):
+        if self._playback_status == PlayState.PLAYING:
+            self._player.pause()
+        else:
+            self._player.play()
+
+    @method(name='Stop')
+    def stop(self):
+        self._player.stop()
+
+    @method(name='Play')
+    def play(self):
+        self._player.play()
+
+    @method(name='Seek')
+    def seek(self, offset: 'x'):
+        self._player.set_position((self._player.position_us + offset) / _USEC)
+
+    @method(name='SetPosition')
+    def set_position(self, track_id: 'o', position: 'x'):
+        if track_id != self._track_path or position < 0:
+            return
+        self._player.set_position(position / _USEC)
+
+    @method(name='OpenUri')
+    def open_uri(self, uri: 's'):
+        pass
+
+    @signal(name='Seeked')
+    def seeked(self, position: int) -> 'x':
+        return position
+
+    def update_volume(self, volume: float) -> None:
+        self._changed('Volume', volume)
+
+    def update_loop_status(self, repeat: bool) -> None:
+        self._changed('LoopStatus', LoopStatus.TRACK if repeat else LoopStatus.NONE)
+
     def update_state(self, state: str) -> None:
         self._playback_status = state
-        self.emit_properties_changed(
-            changed_properties={
-                'PlaybackStatus': self._playback_status,
-            },
-            invalidated_properties=[]
-        )
+        self._changed('PlaybackStatus', self._playback_status)
 
     def update_metadata(self, track: Dict) -> None:
         if track is None:
+            self._track_path = _NO_TRACK
             self._metadata = {
-                    'mpris:trackid': Variant('o', '/track/none'),
+                    'mpris:trackid': Variant('o', self._track_path),
                     'mpris:length': Variant('x', 0),
                     'xesam:title': Variant('s', ''),
                     'xesam:album': Variant('s', ''),
                     'xesam:artist': Variant('as', [''])
                 }
         else:
+            self._track_path = _track_path(track.get('track_id'))
             self._metadata = {
-                    'mpris:trackid': Variant('o', '/track/none'),
+                    'mpris:trackid': Variant('o', self._track_path),
                     'mpris:length': Variant('x', track.get('duration') * 1000000),
                     'xesam:title': Variant('s', track.get('title')),
                     'xesam:album': Variant('s', track.get('album')),
                     'xesam:artist': Variant('as', [track.get('artist')])
                 }
+            if track.get('art_url'):
+                self._metadata['mpris:artUrl'] = Variant('s', track.get('art_url'))
+        self._changed('Metadata', self._metadata)
 
-        self.emit_properties_changed(
-            changed_properties={
-                'Metadata': self._metadata
-            },
-            invalidated_properties=[]
-        )
+    def update_art(self, track_id: str, art_url: str) -> None:
+        if self._track_path != _track_path(track_id):
+            # Cover arrived after the track was switched
+            return
+        self._metadata = dict(self._metadata, **{'mpris:artUrl': Variant('s', art_url)})
+        self._changed('Metadata', self._metadata)
+
+    def flush(self) -> bool:
+        """
+        Emit all pending changes as a single PropertiesChanged signal.
+        Sending is non-blocking, messages are written when the bus socket is ready.
+        """
+        self._flush_id = None
+        if self._pending:
+            self.emit_properties_changed(
+                changed_properties=self._pending,
+                invalidated_properties=[]
+            )
+            self._emitted.update(self._pending)
+            self._pending = {}
+        return GLib.SOURCE_REMOVE
+
+    def _changed(self, name: str, value: Any) -> None:
+        """Schedule emission of changed property, once per main loop iteration"""
+        if self._emitted.get(name) == value:
+            self._pending.pop(name, None)
+            return
+        self._pending[name] = value
+        if self._flush_id is None:
+            self._flush_id = GLib.idle_add(self.flush)
 
 class MprisService(object):
-    def __init__(self, name):
+    def __init__(self, name, player):
         self._name = name
         self._dbus: MessageBus = None
         self._dbus = MessageBus().connect_sync()
         self._root = MprisRoot(self._name)
-        self._player = MprisPlayer(self._name)
+        self._player = MprisPlayer(self._name, player)
         self._dbus.export('/org/mpris/MediaPlayer2', self._root)
         self._dbus.export('/org/mpris/MediaPlayer2', self._player)
-        self._dbus.request_name_sync(f'org.mpris.MediaPlayer2.{self._name}')
+        self._dbus.request_name(
+            f'org.mpris.MediaPlayer2.{self._name}', callback=self._on_name_requested)
         _LOGGER.debug("MPRIS service is running.")
 
     def shutdown(self) -> None:
+        """
+        Send final state and disconnect on the next loop iteration.
+        Name is released by the bus daemon together with the connection,
+        so audio loop never waits for a reply.
+        """
         self._player.update_state(PlayState.STOPPED)
         self._player.update_metadata(None)
+        self._player.flush()
         self._dbus.unexport('/org/mpris/MediaPlayer2', self._player)
         self._dbus.unexport('/org/mpris/MediaPlayer2', self._root)
-        self._dbus.release_name_sync(f'org.mpris.MediaPlayer2.{self._name}')
+        GLib.idle_add(self._disconnect)
+
+    def _disconnect(self) -> bool:
         self._dbus.disconnect()
         _LOGGER.debug("MPRIS service is shut down.")
+        return GLib.SOURCE_REMOVE
+
+    @staticmethod
+    def _on_name_requested(_, err) -> None:
+        if err:
+            _LOGGER.warning("Cannot acquire MPRIS name: %s", err)
 
     def set_player_metadata(self, track: Dict) -> None:
         self._player.update_metadata(track)
 
+    def set_player_art(self, track_id: str, art_url: str) -> None:
+        self._player.update_art(track_id, art_url)
+
     def set_player_state(self, state: str) -> None:
         self._player.update_state(state)
+
+    def set_player_volume(self, volume: float) -> None:
+        self._player.update_volume(volume)
+
+    def set_player_loop_status(self, repeat: bool) -> None:
+        self._player.update_loop_status(repeat)
+
+    def seeked(self, position_us: int) -> None:
+        self._player.seeked(position_us)
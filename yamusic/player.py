@@ -1,6 +1,7 @@
 """Plays media from Yandex.Music using embedded Gstreamer pipeline"""
+import asyncio
 import logging
-from typing import Optional, List, Tuple
+from typing import Dict, NamedTuple, Optional, List, Tuple
 
 from aioprocessing import AioManager, AioQueue, AioProcess
 from yandex_music import ClientAsync, Restrictions, RotorSettings, Value
@@ -18,13 +19,27 @@ from .controllers import (
     StationController,
     YaTrack
     )
+from .covers import CoverCache, MPRIS_COVER_SIZE, UI_COVER_SIZE
 from .gstreamer import gst
+from .supervisor import GstSupervisor, SupervisorError
 
 _LOGGER = logging.getLogger(__name__)
 
+_COVER_LOOKAHEAD    : int = 3
+
 class YaPlayerError(Exception):
     """General Yandex.Music player error"""
 
+class PlayerSnapshot(NamedTuple):
+    """Controller state taken on the player loop, safe to read from other threads"""
+    seq: int
+    source_id: Optional[str]
+    sources: Tuple[Value, ...]
+    source_restrictions: Optional[Restrictions]
+    source_settings: Optional[RotorSettings]
+    playlist: Tuple[YaTrack, ...]
+    playlist_position: int
+
 class YaPlayer:
     """
         Wraps gstreamer process, which executes playback playbin, and yaMusic 
@@ -33,19 +48,32 @@ class YaPlayer:
         Media URIs and player commands are sent to gstreamer via media and command queues
         Messages from player are passed to consumer via ui_event_queue.
     """
-    def __init__(self, ui_event_queue: AioQueue):
+    def __init__(self, ui_event_queue: AioQueue, mode: str = None):
         token: str = get_token()
         if not token:
             raise YaPlayerError('Check token in config or gnome login keyring')
-        self.mode: str = cfg.get_key('mode', default=const.DEFAULT_MODE)
+        # Mode given explicitly is used for this session only, config keeps its own
+        self._config_mode: str = cfg.get_key('mode', default=const.DEFAULT_MODE)
+        self.mode: str = mode or self._config_mode
         self.current_track: YaTrack = None
+        # Track queued ahead of the end of current one, it is not current until it starts
+        self._prefetched: Optional[YaTrack] = None
         self._client: ClientAsync = ClientAsync(token=token)
         self._dashboard: AioManager = AioManager().dict(gst.DASHBOARD)
         self._command_queue: AioQueue = AioQueue()
         self._media_queue: AioQueue = AioQueue()
         self._ui_event_queue: AioQueue = ui_event_queue
         self._controller: SourceController = None
-        self._gstreamer: AioProcess = None
+        self._covers: CoverCache = CoverCache()
+        self._snapshot_seq: int = 0
+        self._supervisor: GstSupervisor = GstSupervisor(
+            spawn=self._spawn_gstreamer,
+            resolve=self._refresh_current_track,
+            restore=self._restore,
+            position=lambda: self.position,
+            error=lambda: self._dashboard[gst.DASH_ERROR],
+            fail=self._emit_error,
+            )
 
     async def init(self):
         """
@@ -71,14 +99,7 @@ class YaPlayer:
             track: YaTrack = await self._controller.set_source()
         except ControllerError as exc:
             raise YaPlayerError(f'Cannot start: {exc}')                                             # pylint: disable=raise-missing-from
-        self._gstreamer = AioProcess(
-            target=gst.GstPlayer(
-                self._dashboard, self._command_queue,
-                self._media_queue, self._ui_event_queue
-                ).run
-            )
-        self._gstreamer.start()                                                                     # pylint: disable=no-member
-        _LOGGER.debug('Started GstPlayer as PID %s', self._gstreamer.pid)                           # pylint: disable=no-member
+        await self._supervisor.start()
         await self._enqueue(track)
         await self._set_current(track)
         await self.set_volume(cfg.get_key('volume', default=0.5))
@@ -86,6 +107,8 @@ class YaPlayer:
     async def shutdown(self):
         """Shut down Gstreamer and controller."""
         await self._emit_status_event("Shutting down")
+        await self._supervisor.stop()
+        await self._covers.shutdown()
         self._save_state()
         if self._controller:
             await self._controller.shutdown(played=self.position)
@@ -95,7 +118,6 @@ class YaPlayer:
         if self._gstreamer and self._gstreamer.pid:                                                 # pylint: disable=no-member
             await self._gs_command(gst.CMD_SHUTDOWN)
             await self._gstreamer.coro_join()                                                       # pylint: disable=no-member
-            del self._gstreamer
 
     async def switch_mode(self, mode: str):
         """Switch mode of player"""
@@ -103,6 +125,7 @@ class YaPlayer:
             return
         self._save_state()
         self.mode = mode
+        self._config_mode = mode
         await self._controller.shutdown(played=self.position)
         try:
             if self.mode == const.MODE_RADIO:
@@ -116,6 +139,7 @@ class YaPlayer:
                 return
         except ControllerError as exc:
             raise YaPlayerError(f'Cannot switch mode: {exc}')                                       # pylint: disable=raise-missing-from
+        self._prefetched = None
         await self._enqueue(track)
         await self._set_current(track)
         await self._gs_command(gst.CMD_SKIP_NEXT)
@@ -140,6 +164,22 @@ class YaPlayer:
         """Get current playlist position"""
         return self._controller.get_playlist_position()
 
+    def snapshot(self) -> PlayerSnapshot:
+        """Take controller state for readers outside of the player loop"""
+        self._snapshot_seq += 1
+        if not self._controller:
+            return PlayerSnapshot(self._snapshot_seq, None, (), None, None, (), 0)
+        is_radio: bool = self.mode == const.MODE_RADIO
+        return PlayerSnapshot(
+            seq=self._snapshot_seq,
+            source_id=self._controller.source_id,
+            sources=tuple(self._controller.get_sources_list() or ()),
+            source_restrictions=self._controller.get_source_restrictions() if is_radio else None,
+            source_settings=self._controller.get_source_settings() if is_radio else None,
+            playlist=tuple(self._controller.get_short_playlist()),
+            playlist_position=self._controller.get_playlist_position(),
+            )
+
     def query_artist(self, **kwargs) -> None:
         """Query artist controller for content"""
         if self.mode == const.MODE_ARTIST:
@@ -173,6 +213,7 @@ class YaPlayer:
                 source_id=s_id, source_settings=r_s, played=self.position)
         except ControllerError as exc:
             raise YaPlayerError(f'Cannot tune: {exc}')                                              # pylint: disable=raise-missing-from
+        self._prefetched = None
         await self._enqueue(track)
         await self._set_current(track)
         await self._gs_command(gst.CMD_SKIP_NEXT)
@@ -187,10 +228,36 @@ class YaPlayer:
         except ControllerError as exc:
             await self._emit_error(f'Cannot retrieve track: {exc}.')
             return
-        await self._enqueue(track)
+        if not self._take_prefetched(track):
+            await self._enqueue(track)
         await self._set_current(track)
         await self.play()
 
+    async def prefetch_next_track(self):
+        """
+        Queue next track before current one finishes, so that Gstreamer switches without a gap.
+        Current track stays current until the queued one starts playing.
+        """
+        try:
+            track: YaTrack = await self._controller.prefetch_next_track()
+        except ControllerError as exc:
+            await self._emit_error(f'Cannot retrieve track: {exc}.')
+            return
+        self._prefetched = track
+        await self._enqueue(track)
+
+    async def track_started(self, track_id: str):
+        """Make prefetched track current once Gstreamer has started to play it"""
+        if not self._prefetched or self._prefetched.track_id != track_id:
+            return
+        self._prefetched = None
+        try:
+            track: YaTrack = await self._controller.get_next_track()
+        except ControllerError as exc:
+            await self._emit_error(f'Cannot retrieve track: {exc}.')
+            return
+        await self._set_current(track)
+
     async def skip(self):
         """Skip to track and play next."""
         if not self.repeat_state:
@@ -200,7 +267,8 @@ class YaPlayer:
             except ControllerError as exc:
                 await self._emit_error(f'Cannot retrieve track: {exc}.')
                 return
-            await self._enqueue(track)
+            if not self._take_prefetched(track):
+                await self._enqueue(track)
             await self._set_current(track)
         await self._gs_command(gst.CMD_SKIP_NEXT)
 
@@ -215,10 +283,27 @@ class YaPlayer:
         except ControllerError as exc:
             await self._emit_error(f'Cannot skip to given position: {exc}.')
             return
+        self._prefetched = None
         await self._enqueue(track)
         await self._set_current(track)
         await self._gs_command(gst.CMD_SKIP_NEXT)
 
+    async def recover(self, position: float):
+        """Restore playback of current track after stream error."""
+        await self._emit_status_event("Recovering playback...")
+        try:
+            await self._supervisor.recover(position)
+        except SupervisorError as exc:
+            _LOGGER.warning('%s Skipping to the next track.', exc)
+            await self.get_next_track()
+
+    async def get_cover(self, track: YaTrack = None) -> Optional[str]:
+        """Get local path of UI-sized cover of given or current track"""
+        track = track or self.current_track
+        if not track:
+            return None
+        return await self._covers.get(track.cover_uri, UI_COVER_SIZE)
+
     async def like_track(self) -> bool:
         """Add track to favorites"""
         await self._emit_status_event("Setting liked track...")
@@ -261,6 +346,20 @@ class YaPlayer:
         """Set volume."""
         await self._gs_command(gst.CMD_SET_VOLUME, volume=volume)
 
+    @property
+    def recovery_stats(self) -> Dict:
+        """Get recovery statistics of Gstreamer supervisor and process"""
+        return dict(
+            self._supervisor.stats,
+            gst_recoveries=self._dashboard[gst.DASH_RECOVERIES],
+            gst_recovery_time=self._dashboard[gst.DASH_RECOVERY_TIME],
+            )
+
+    @property
+    def sink_stats(self) -> Optional[Dict]:
+        """Get audio sink profile with measured control latency and wakeup rate"""
+        return self._dashboard[gst.DASH_SINK]
+
     @property
     def high_res(self) -> str:
         """Get quality of underlying controller's current source"""
@@ -286,6 +385,11 @@ class YaPlayer:
         """Get state."""
         return self._dashboard[gst.DASH_STATE]
 
+    @property
+    def buffering(self) -> int:
+        """Get buffer fill level in percent."""
+        return self._dashboard[gst.DASH_BUFFERING]
+
     @property
     def duration(self):
         """Get duration."""
@@ -296,6 +400,16 @@ class YaPlayer:
         """Get position."""
         return self._dashboard[gst.DASH_POSITION]
 
+    @property
+    def qos(self) -> Optional[Dict]:
+        """Get QoS statistics of current track."""
+        return self._dashboard[gst.DASH_QOS]
+
+    @property
+    def qos_last(self) -> Optional[Dict]:
+        """Get QoS statistics of previously played track."""
+        return self._dashboard[gst.DASH_QOS_LAST]
+
     @property
     def uri(self) -> str:
         """Get URI."""
@@ -318,7 +432,7 @@ class YaPlayer:
 
     def _save_state(self):
         cfg.set_key('volume', self.volume)
-        cfg.set_key('mode', self.mode)
+        cfg.set_key('mode', self._config_mode)
         cfg.set_key('high_res', self._controller.high_res)
         if self.mode == const.MODE_RADIO:
             cfg.set_key('radio_id', self._controller.source_id)
@@ -328,14 +442,62 @@ class YaPlayer:
             cfg.set_key('artist_id', self._controller.source_id)
         cfg.save()
 
+    def _take_prefetched(self, track: YaTrack) -> bool:
+        """Whether track is the one already queued ahead, it is forgotten either way"""
+        queued: bool = self._prefetched is not None and self._prefetched.track_id == track.track_id
+        self._prefetched = None
+        return queued
+
     async def _set_current(self, track: YaTrack):
         self.current_track = track
         await self._emit_tags_event()
 
-    async def _enqueue(self, track: YaTrack):
+    async def _enqueue(self, track: YaTrack, position: float = 0):
         if track.uri.startswith("/"):
             track.uri = f'file://{track.uri}'
-        await self._media_queue.coro_put(track.to_json_str())                                                       # pylint: disable=no-member
+        art_path: Optional[str] = self._covers.cached(track.cover_uri, MPRIS_COVER_SIZE)
+        await self._media_queue.coro_put(track.to_json_str(                                         # pylint: disable=no-member
+            position=position, art_url=f'file://{art_path}' if art_path else None))
+        if not art_path and track.cover_uri:
+            asyncio.create_task(self._fetch_art(track))
+        upcoming: List[str] = self._controller.get_upcoming_covers(_COVER_LOOKAHEAD)
+        self._covers.prefetch(upcoming, MPRIS_COVER_SIZE)
+        self._covers.prefetch(upcoming, UI_COVER_SIZE)
+
+    async def _fetch_art(self, track: YaTrack):
+        """Download MPRIS cover of already queued track and pass it to GstPlayer"""
+        art_path: Optional[str] = await self._covers.get(track.cover_uri, MPRIS_COVER_SIZE)
+        if art_path:
+            await self._gs_command(gst.CMD_SET_ART, track_id=track.track_id, art_url=f'file://{art_path}')
+
+    @property
+    def _gstreamer(self) -> Optional[AioProcess]:
+        return self._supervisor.process
+
+    async def _spawn_gstreamer(self) -> AioProcess:
+        volume: Optional[float] = self.volume
+        process: AioProcess = AioProcess(
+            target=gst.run_player,
+            args=(self._dashboard, self._command_queue, self._media_queue, self._ui_event_queue),
+            kwargs={
+                'buffering': cfg.get_key('buffering', default={}),
+                'engine': cfg.get_key('engine', default=gst.ENGINE_PLAYBIN),
+                'sink': cfg.get_key('audio_sink', default={}),
+                },
+            )
+        process.start()                                                                             # pylint: disable=no-member
+        _LOGGER.debug('Started GstPlayer as PID %s', process.pid)                                   # pylint: disable=no-member
+        if volume is not None:
+            # Restarted process, keep volume of the previous one
+            await self.set_volume(volume)
+        return process
+
+    async def _refresh_current_track(self) -> YaTrack:
+        return await self._controller.refresh_current_track()
+
+    async def _restore(self, track: YaTrack, position: float):
+        await self._enqueue(track, position=position)
+        await self._set_current(track)
 
     async def _gs_command(self, name, **kwargs):
         """Queue a command to gstreamer process."""
@@ -0,0 +1,166 @@
+"""Local full-text index over playlist snapshots"""
+import logging
+import unicodedata
+from functools import lru_cache
+from threading import Lock
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .controllers.track import YaTrack
+
+_LOGGER = logging.getLogger(__name__)
+
+_GRAM               : int = 3
+_WORD_START         : str = '^'
+_MAX_RESULTS        : int = 1000
+
+
+def fold(text: str) -> str:
+    """Case- and diacritic-folded text: 'Ёлка Beyoncé' -> 'елка beyonce'"""
+    text = text or ''
+    if text.isascii():
+        return text.lower()
+    decomposed: str = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+@lru_cache(maxsize=65536)
+def _keys(word: str) -> FrozenSet[str]:
+    """Trigrams of the word, plus its 1- and 2-character prefixes for short queries"""
+    keys: Set[str] = {f'{_WORD_START}{word[:size]}' for size in range(1, min(len(word), _GRAM - 1) + 1)}
+    keys.update(word[idx:idx + _GRAM] for idx in range(len(word) - _GRAM + 1))
+    return frozenset(keys)
+
+
+def _text_keys(text: str) -> Set[str]:
+    return set().union(*(_keys(w) for w in set(text.split())))
+
+
+def _query_keys(word: str) -> Set[str]:
+    if len(word) < _GRAM:
+        return {f'{_WORD_START}{word}'}
+    return {word[idx:idx + _GRAM] for idx in range(len(word) - _GRAM + 1)}
+
+
+def _iter_slots(bitmap: int) -> Iterator[int]:
+    """Set bits of the bitmap in ascending order"""
+    data: bytes = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    for idx, byte in enumerate(data):
+        if byte:
+            base: int = idx << 3
+            for bit in range(8):
+                if byte >> bit & 1:
+                    yield base + bit
+
+
+def _bitmap(slots: List[int]) -> int:
+    """Integer with given bits set, built in one pass for any number of slots"""
+    data: bytearray = bytearray(max(slots) // 8 + 1)
+    for slot in slots:
+        data[slot >> 3] |= 1 << (slot & 7)
+    return int.from_bytes(data, 'little')
+
+
+class TrackIndex:
+    """
+    Trigram index over title, artist and album of playlist tracks.
+    Every indexed track owns a slot, posting lists are bitmaps of slots,
+    so a query is a few big integer ANDs regardless of collection size.
+    update() takes the whole playlist snapshot, but indexes only tracks
+    which were not in the previous one and drops the ones which are gone.
+    update() may run in a worker thread, it folds texts outside of the lock,
+    so search() waits only while prepared tracks are swapped in.
+    """
+    def __init__(self) -> None:
+        self._lock: Lock = Lock()
+        self._update_lock: Lock = Lock()
+        self._postings: Dict[str, int] = {}
+        self._slots: Dict[str, int] = {}
+        self._texts: List[Optional[str]] = []
+        self._ids: List[Optional[str]] = []
+        self._positions: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def update(self, tracks: Iterable[YaTrack]) -> Tuple[int, int]:
+        """Sync index with playlist snapshot, returns numbers of added and removed tracks"""
+        positions: Dict[str, List[int]] = {}
+        tracks_by_id: Dict[str, YaTrack] = {}
+        for position, track in enumerate(tracks):
+            positions.setdefault(track.track_id, []).append(position)
+            tracks_by_id.setdefault(track.track_id, track)
+        # Slots change only here, so they are read without blocking search
+        with self._update_lock:
+            gone: List[str] = [t for t in self._slots if t not in positions]
+            # Most slots would be holes, renumber slots in playlist order
+            renumber: bool = len(self._texts) - len(self._slots) + len(gone) > len(tracks_by_id)
+            fresh: List[Tuple[str, str]] = [
+                (i, fold(' '.join(filter(None, [t.title, t.artist, t.album]))))
+                for i, t in tracks_by_id.items() if renumber or i not in self._slots]
+            with self._lock:
+                if renumber:
+                    self._clear()
+                    gone = []
+                self._remove(gone)
+                self._add(fresh)
+                self._positions = positions
+        if fresh or gone:
+            _LOGGER.debug('Index updated: %d added, %d removed, %d total.',
+                          len(fresh), len(gone), len(self._slots))
+        return len(fresh), len(gone)
+
+    def search(self, query: str, limit: int = _MAX_RESULTS) -> List[int]:
+        """Positions of matching tracks in the last snapshot, in playlist order"""
+        words: List[str] = fold(query).split()
+        if not words:
+            return []
+        with self._lock:
+            matched: int = -1
+            for key in {k for w in words for k in _query_keys(w)}:
+                matched &= self._postings.get(key, 0)
+                if not matched:
+                    return []
+            # Trigrams of a long word may be found apart, check real substrings then
+            verify: bool = any(len(w) > _GRAM for w in words)
+            result: List[int] = []
+            for slot in _iter_slots(matched):
+                if verify and not all(w in self._texts[slot] for w in words):
+                    continue
+                result.extend(self._positions.get(self._ids[slot], []))
+                if len(result) >= limit:
+                    break
+        result.sort()
+        return result[:limit]
+
+    def _clear(self) -> None:
+        self._postings = {}
+        self._slots = {}
+        self._texts = []
+        self._ids = []
+
+    def _add(self, tracks: List[Tuple[str, str]]) -> None:
+        groups: Dict[str, List[int]] = {}
+        for track_id, text in tracks:
+            slot: int = len(self._texts)
+            self._slots[track_id] = slot
+            self._texts.append(text)
+            self._ids.append(track_id)
+            for key in _text_keys(text):
+                groups.setdefault(key, []).append(slot)
+        for key, slots in groups.items():
+            self._postings[key] = self._postings.get(key, 0) | _bitmap(slots)
+
+    def _remove(self, track_ids: List[str]) -> None:
+        groups: Dict[str, List[int]] = {}
+        for track_id in track_ids:
+            slot: int = self._slots.pop(track_id)
+            for key in _text_keys(self._texts[slot]):
+                groups.setdefault(key, []).append(slot)
+            self._texts[slot] = None
+            self._ids[slot] = None
+        for key, slots in groups.items():
+            posting: int = self._postings.get(key, 0) & ~_bitmap(slots)
+            if posting:
+                self._postings[key] = posting
+            else:
+                self._postings.pop(key, None)
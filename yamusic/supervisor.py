@@ -0,0 +1,125 @@
+"""Keeps Gstreamer process alive and recovers playback after stream errors"""
+import asyncio
+import logging
+from time import monotonic
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from aioprocessing import AioProcess
+
+from .controllers import ControllerError, YaTrack
+from .gstreamer.gst import EXIT_FATAL
+
+_LOGGER = logging.getLogger(__name__)
+
+RECOVERY_BUDGET     : float = 15.0
+RESTART_LIMIT       : int = 3
+RESTART_WINDOW      : float = 60.0
+_WATCH_DELAY        : float = 1.0
+
+class SupervisorError(Exception):
+    """Playback cannot be recovered"""
+
+class GstSupervisor:
+    """
+    Owns Gstreamer process: starts it, restarts it when it dies unexpectedly,
+    and re-resolves current track when GstPlayer reports a recoverable error.
+    Process which exited with EXIT_FATAL after a non-recoverable error is not restarted.
+    Player-specific actions are passed as callbacks:
+        spawn    - create and start new Gstreamer process
+        resolve  - get current track with refreshed URI from controller
+        restore  - enqueue track and seek it to the given position
+        position - current playback position
+        error    - last error reported by GstPlayer
+        fail     - report that playback cannot be recovered
+    """
+    def __init__(
+            self,
+            spawn: Callable[[], Awaitable[AioProcess]],
+            resolve: Callable[[], Awaitable[YaTrack]],
+            restore: Callable[[YaTrack, float], Awaitable[None]],
+            position: Callable[[], float],
+            error: Callable[[], Optional[str]],
+            fail: Callable[[str], Awaitable[None]],
+            budget: float = RECOVERY_BUDGET):
+        self._spawn = spawn
+        self._resolve = resolve
+        self._restore = restore
+        self._position = position
+        self._error = error
+        self._fail = fail
+        self._budget: float = budget
+        self._process: AioProcess = None
+        self._watch_task: asyncio.Task = None
+        self._restarts: List[float] = []
+        self.stats: Dict[str, float] = {
+            'recoveries': 0,
+            'failures': 0,
+            'restarts': 0,
+            'last_recovery_time': None,
+        }
+
+    @property
+    def process(self) -> AioProcess:
+        """Currently supervised Gstreamer process"""
+        return self._process
+
+    async def start(self) -> AioProcess:
+        """Start Gstreamer process and watch it"""
+        self._process = await self._spawn()
+        self._watch_task = asyncio.create_task(self._watch())
+        return self._process
+
+    async def stop(self) -> None:
+        """Stop watching, process is about to be shut down intentionally"""
+        if self._watch_task:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+    async def recover(self, position: float) -> None:
+        """
+        Re-resolve current track and restore playback at given position.
+        Raises SupervisorError when recovery does not fit into the time budget.
+        """
+        started: float = monotonic()
+        try:
+            track: YaTrack = await asyncio.wait_for(self._resolve(), timeout=self._budget)
+            await self._restore(track, position)
+        except (ControllerError, asyncio.TimeoutError) as exc:
+            self.stats['failures'] += 1
+            raise SupervisorError(f'Cannot recover playback: {exc or "timeout"}')              # pylint: disable=raise-missing-from
+        recovery_time: float = round((monotonic() - started) * 1000, 1)
+        self.stats['recoveries'] += 1
+        self.stats['last_recovery_time'] = recovery_time
+        _LOGGER.info('Track re-resolved in %.1f ms, resuming at %d s.', recovery_time, position)
+
+    async def _restart(self) -> None:
+        now: float = monotonic()
+        self._restarts = [t for t in self._restarts if now - t < RESTART_WINDOW] + [now]
+        if len(self._restarts) > RESTART_LIMIT:
+            raise SupervisorError(
+                f'Gstreamer died {len(self._restarts)} times in {RESTART_WINDOW:.0f} s.')
+        position: float = self._position() or 0
+        _LOGGER.warning('Gstreamer process died, restarting.')
+        self.stats['restarts'] += 1
+        self._process = await self._spawn()
+        await self.recover(position)
+
+    async def _watch(self) -> None:
+        try:
+            while True:
+                await asyncio.sleep(_WATCH_DELAY)
+                if self._process.is_alive():                                                    # pylint: disable=no-member
+                    continue
+                if self._process.exitcode == EXIT_FATAL:                                        # pylint: disable=no-member
+                    await self._fail(f'Gstreamer stopped on error: {self._error()}')
+                    return
+                await self._restart()
+        except SupervisorError as exc:
+            await self._fail(f'{exc} Giving up.')
+        except asyncio.CancelledError:
+            _LOGGER.debug('Supervisor watch cancelled.')
+            raise
@@ -0,0 +1,18 @@
+"""Favorites sync exports"""
+from .engine import SyncEngine, SyncProgress, track_file_name
+from .error import SyncError
+from .reconcile import Reconciler, ReconcileReport
+from .state import META_LIKES_REVISION, SyncedFile, SyncState, bare_id
+
+__all__ = [
+    'META_LIKES_REVISION',
+    'ReconcileReport',
+    'Reconciler',
+    'SyncEngine',
+    'SyncError',
+    'SyncProgress',
+    'SyncState',
+    'SyncedFile',
+    'bare_id',
+    'track_file_name',
+]
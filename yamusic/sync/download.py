@@ -0,0 +1,194 @@
+"""Streams track files to disk, resumes interrupted transfers"""
+import asyncio
+import json
+import logging
+import os
+import re
+from email.utils import parsedate_to_datetime
+from time import monotonic, time
+from typing import Callable, Dict, Optional
+
+import aiofiles
+import aiohttp
+
+from utils.ratelimit import LIMITER
+
+from .error import SyncError
+
+_LOGGER = logging.getLogger(__name__)
+
+_CHUNK_SIZE         : int = 256 * 1024
+_CONNECT_TIMEOUT    : float = 10.0
+_READ_TIMEOUT       : float = 30.0
+_CONTENT_RANGE      : re.Pattern = re.compile(r'bytes (\d+)-(\d+)/(\d+)')
+_ENDPOINT           : str = 'download'
+_THROTTLE_RETRIES   : int = 3
+_THROTTLE_STATUSES  : tuple = (429, 503)
+
+
+class _RestartFromZero(Exception):
+    """Partial file cannot be resumed"""
+
+
+class _Throttled(Exception):
+    """Server asked to slow down"""
+
+
+class Downloader:
+    """
+    Downloads files over a shared HTTP session.
+    Every transfer is streamed by chunks into <path>.part and renamed to path when
+    its size matches the announced one, so memory use per transfer stays constant
+    and an interrupted run never leaves a truncated file under the final name.
+    <path>.part.json journals what is being downloaded and its full size:
+    the next attempt with the same track, codec and bitrate continues
+    from the end of the partial file with a Range request.
+    Requests take tokens of the 'download' rate limiter bucket,
+    429 and 503 responses slow it down for their Retry-After and are retried.
+    """
+    def __init__(self, max_connections: int, on_chunk: Callable[[int], None] = None):
+        self._max_connections: int = max_connections
+        self._on_chunk: Callable[[int], None] = on_chunk
+        self._session: aiohttp.ClientSession = None
+
+    async def fetch(self, url: str, path: str, meta: Dict = None) -> int:
+        """
+        Download url into path, return size of the file.
+        meta identifies the content (track id, codec, bitrate), partial
+        downloads are resumed only when it matches the journaled one.
+        """
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self._max_connections),
+                timeout=aiohttp.ClientTimeout(
+                    total=None, sock_connect=_CONNECT_TIMEOUT, sock_read=_READ_TIMEOUT))
+        meta = meta or {}
+        try:
+            for attempt in range(_THROTTLE_RETRIES):
+                try:
+                    size: int = await self._resume(url, path, meta)
+                    break
+                except _Throttled:
+                    if attempt == _THROTTLE_RETRIES - 1:
+                        raise SyncError('Throttled by server')                                      # pylint: disable=raise-missing-from
+        except _RestartFromZero as exc:
+            self.discard(path)
+            raise SyncError(f'Download failed: {exc}')                                              # pylint: disable=raise-missing-from
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as exc:
+            # Partial file and journal stay for the next attempt
+            raise SyncError(f'Download failed: {exc}')                                              # pylint: disable=raise-missing-from
+        os.replace(self._part_path(path), path)
+        self._remove(self._journal_path(path))
+        _LOGGER.debug('Downloaded %d bytes to %s', size, path)
+        return size
+
+    def discard(self, path: str) -> None:
+        """Remove partial file of path and its journal"""
+        self._remove(self._part_path(path))
+        self._remove(self._journal_path(path))
+
+    async def close(self) -> None:
+        """Close HTTP session"""
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    async def _resume(self, url: str, path: str, meta: Dict) -> int:
+        try:
+            return await self._transfer(url, path, meta, self._resumable_offset(path, meta))
+        except _RestartFromZero as exc:
+            _LOGGER.debug('Cannot resume %s: %s, starting over', path, exc)
+            return await self._transfer(url, path, meta, 0)
+
+    async def _transfer(self, url: str, path: str, meta: Dict, offset: int) -> int:
+        part_path: str = self._part_path(path)
+        headers: Dict[str, str] = {'Range': f'bytes={offset}-'} if offset else {}
+        await LIMITER.acquire(_ENDPOINT)
+        started: float = monotonic()
+        async with self._session.get(url, headers=headers) as response:
+            if response.status in _THROTTLE_STATUSES:
+                LIMITER.throttled(_ENDPOINT, self._retry_after(response))
+                raise _Throttled()
+            total: Optional[int]
+            if offset and response.status == 206:
+                total = self._range_total(response, offset)
+                if total != self._read_journal(path).get('size'):
+                    raise _RestartFromZero(f'remote size changed to {total}')
+                _LOGGER.debug('Resuming %s from %d of %d bytes', path, offset, total)
+            elif response.status == 416:
+                raise _RestartFromZero('range not satisfiable')
+            elif response.status == 200:
+                offset = 0
+                total = response.content_length
+                self._write_journal(path, {**meta, 'size': total})
+            else:
+                raise SyncError(f'HTTP {response.status}')
+            LIMITER.succeeded(_ENDPOINT, monotonic() - started)
+            async with aiofiles.open(part_path, 'ab' if offset else 'wb') as out:
+                async for chunk in response.content.iter_chunked(_CHUNK_SIZE):
+                    await out.write(chunk)
+                    if self._on_chunk:
+                        self._on_chunk(len(chunk))
+        size: int = os.path.getsize(part_path)
+        if total is not None and size != total:
+            raise SyncError(f'Truncated transfer: {size} of {total} bytes')
+        return size
+
+    def _resumable_offset(self, path: str, meta: Dict) -> int:
+        part_path: str = self._part_path(path)
+        if not os.path.exists(part_path):
+            return 0
+        journal: Dict = self._read_journal(path)
+        size: int = os.path.getsize(part_path)
+        expected: Optional[int] = journal.pop('size', None)
+        if journal != meta or not expected or size >= expected:
+            self.discard(path)
+            return 0
+        return size
+
+    @staticmethod
+    def _retry_after(response: aiohttp.ClientResponse) -> Optional[float]:
+        """Retry-After header in seconds, it is either a number or HTTP date"""
+        value: Optional[str] = response.headers.get('Retry-After')
+        if not value:
+            return None
+        if value.isdigit():
+            return float(value)
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time())
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _range_total(response: aiohttp.ClientResponse, offset: int) -> Optional[int]:
+        match: Optional[re.Match] = _CONTENT_RANGE.fullmatch(
+            response.headers.get('Content-Range', ''))
+        if not match or int(match.group(1)) != offset:
+            raise _RestartFromZero('unexpected Content-Range')
+        return int(match.group(3))
+
+    def _read_journal(self, path: str) -> Dict:
+        try:
+            with open(self._journal_path(path), 'r', encoding='utf-8') as journal:
+                return json.load(journal)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_journal(self, path: str, journal: Dict) -> None:
+        with open(self._journal_path(path), 'w', encoding='utf-8') as out:
+            json.dump(journal, out)
+
+    @staticmethod
+    def _part_path(path: str) -> str:
+        return f'{path}.part'
+
+    @staticmethod
+    def _journal_path(path: str) -> str:
+        return f'{path}.part.json'
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,285 @@
+"""Concurrent favorites sync: resolves track URLs and downloads them in a pipeline"""
+import asyncio
+import logging
+import os
+from time import monotonic
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from yandex_music import DownloadInfo, Track
+
+from utils.config import get_key
+
+from ..controllers import ControllerError, SourceController, YaTrack
+from ..covers import SYNC_COVER_SIZE, CoverCache
+from .download import Downloader
+from .error import SyncError
+from .postprocess import PostJob, PostProcessor
+from .state import SyncedFile, SyncState, bare_id
+from .transcode import TranscodeProfile, get_profile
+from .verify import verify_file
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY : int = 4
+_RESOLVERS          : int = 2
+_REPORT_INTERVAL    : float = 10.0
+_HYDRATE_BATCH      : int = 200
+_CODEC              : str = 'mp3'
+
+
+def track_file_name(track: YaTrack, extension: str = _CODEC) -> str:
+    """Name of synced file: 'Artist - Album - Title (track_id).mp3'"""
+    def safe(text: str) -> str:
+        return text.replace(os.path.sep, '_')
+    return (
+        f'{safe(track.artist)} - {safe(track.album)} - {safe(track.title)} '
+        f'({track.track_id}).{extension}')
+
+
+class SyncProgress:
+    """Counts synced tracks and bytes, estimates throughput and remaining time"""
+    def __init__(self, total: int):
+        self.total: int = total
+        self.downloaded: int = 0
+        self.errored: int = 0
+        self.bytes: int = 0
+        self._started: float = monotonic()
+
+    @property
+    def done(self) -> int:
+        """Tracks processed so far, either synced or failed"""
+        return self.downloaded + self.errored
+
+    def add_bytes(self, size: int) -> None:
+        """Account chunk written by downloader"""
+        self.bytes += size
+
+    def throughput(self) -> float:
+        """Average download speed, bytes per second"""
+        elapsed: float = monotonic() - self._started
+        return self.bytes / elapsed if elapsed > 0 else 0.0
+
+    def eta(self) -> Optional[float]:
+        """Seconds left at current track rate, None until the first track is done"""
+        if not self.done:
+            return None
+        return (monotonic() - self._started) / self.done * (self.total - self.done)
+
+    def __str__(self) -> str:
+        eta: Optional[float] = self.eta()
+        eta_str: str = '--:--:--'
+        if eta is not None:
+            minutes, seconds = divmod(int(eta), 60)
+            hours, minutes = divmod(minutes, 60)
+            eta_str = f'{hours:02}:{minutes:02}:{seconds:02}'
+        return (
+            f'{self.done}/{self.total} tracks, {self.bytes / 1024 / 1024:.1f} MB, '
+            f'{self.throughput() / 1024 / 1024:.2f} MB/s, ETA {eta_str}')
+
+
+class SyncEngine:
+    """
+    Syncs tracks into sync_dir.
+    A couple of resolvers ask the API for direct links and hand them to
+    download workers through a bounded queue, so links do not expire while waiting
+    and resolution of next tracks overlaps with transfers of current ones.
+    Downloaded files go through another bounded queue to PostProcessor, which
+    verifies them against track duration and bitrate, tags, embeds covers and
+    moves them to final names in worker processes.
+    With sync_transcode configured files are also transcoded there,
+    the profile is recorded in state and files of other profiles are outdated.
+    Every synced track is committed to state as soon as it is done.
+    """
+    def __init__(self, controller: SourceController, sync_dir: str, state: SyncState,
+                 concurrency: int = None):
+        self._controller: SourceController = controller
+        self._sync_dir: str = sync_dir
+        self._state: SyncState = state
+        self._concurrency: int = concurrency or get_key('sync_concurrency', DEFAULT_CONCURRENCY)
+        self._profile: Optional[TranscodeProfile] = get_profile()
+        self._post: PostProcessor = PostProcessor(get_key('sync_workers'))
+        self._covers: Optional[CoverCache] = (
+            CoverCache() if get_key('sync_embed_covers', True) else None)
+        self._progress: SyncProgress = None
+        self._downloader: Downloader = None
+        self._links: asyncio.Queue = None
+        self._jobs: asyncio.Queue = None
+
+    async def run(self, tracks: List[Track]) -> SyncProgress:
+        """Sync given tracks, return final progress counters"""
+        self._progress = SyncProgress(len(tracks))
+        self._downloader = Downloader(self._concurrency, on_chunk=self._progress.add_bytes)
+        self._links = asyncio.Queue(maxsize=self._concurrency)
+        self._jobs = asyncio.Queue(maxsize=self._post.workers)
+        source: Iterator[Track] = iter(tracks)
+        reporter: asyncio.Task = asyncio.create_task(self._report())
+        resolvers: List[asyncio.Task] = [
+            asyncio.create_task(self._resolver(source)) for _ in range(_RESOLVERS)]
+        workers: List[asyncio.Task] = [
+            asyncio.create_task(self._download_worker()) for _ in range(self._concurrency)]
+        post_workers: List[asyncio.Task] = [
+            asyncio.create_task(self._post_worker()) for _ in range(self._post.workers)]
+        pipeline: List[asyncio.Task] = [*resolvers, *workers, *post_workers]
+        try:
+            await self._join(resolvers, pipeline)
+            for _ in workers:
+                await self._put(self._links, None, pipeline)
+            await self._join(workers, pipeline)
+            for _ in post_workers:
+                await self._put(self._jobs, None, pipeline)
+            await self._join(post_workers, pipeline)
+        finally:
+            for task in [*pipeline, reporter]:
+                task.cancel()
+            await self._downloader.close()
+            if self._covers:
+                await self._covers.shutdown()
+            self._post.shutdown()
+        _LOGGER.info('Sync: %s', self._progress)
+        return self._progress
+
+    def path(self, track: Union[Track, YaTrack]) -> str:
+        """Path of synced file of the track with current profile"""
+        if isinstance(track, Track):
+            track = self._controller._to_internal_short(track)                                     # pylint: disable=protected-access
+        extension: str = self._profile.extension if self._profile else _CODEC
+        return os.path.join(self._sync_dir, track_file_name(track, extension))
+
+    def find_outdated(self, track_ids: Iterable[str]) -> List[str]:
+        """Return synced tracks encoded with other transcode profile than the current one"""
+        profile: Optional[str] = self._profile.name if self._profile else None
+        return [
+            r.track_id for i in track_ids
+            if (r := self._state.get(i)) is not None and r.profile != profile]
+
+    async def hydrate(self, track_ids: List[str]) -> List[Track]:
+        """Fetch full track objects in batches, order is preserved"""
+        tracks: List[Track] = []
+        for start in range(0, len(track_ids), _HYDRATE_BATCH):
+            tracks.extend(await self._controller._get_tracks(                                      # pylint: disable=protected-access
+                track_ids[start:start + _HYDRATE_BATCH]))
+        return tracks
+
+    async def find_damaged(self, track_ids: Iterable[str]) -> List[Track]:
+        """
+        Return synced tracks whose files are missing, truncated or corrupt
+        and forget them in state. Files with unchanged size and modification time
+        are trusted, only the rest are fetched from API, verified and their records refreshed.
+        """
+        records: Dict[str, SyncedFile] = {
+            bare_id(i): r for i in track_ids if (r := self._state.get(i)) is not None}
+        suspicious: List[str] = [r.track_id for r in records.values() if not r.unchanged()]
+        if not suspicious:
+            return []
+
+        async def check(track: Track) -> bool:
+            record: Optional[SyncedFile] = records.get(bare_id(track.track_id))
+            path: str = record.path if record and record.path else self.path(track)
+            try:
+                await self._post.run(verify_file, path, int(track.duration_ms / 1000))
+            except SyncError as exc:
+                _LOGGER.warning('Damaged (%s): %s', exc, path)
+                return False
+            if record:
+                self._state.mark_synced(
+                    record.track_id, path,
+                    bitrate=record.bitrate, codec=record.codec, profile=record.profile)
+            return True
+
+        tracks: List[Track] = await self.hydrate(suspicious)
+        healthy: List[bool] = await asyncio.gather(*[check(t) for t in tracks])
+        damaged: List[Track] = [t for t, ok in zip(tracks, healthy) if not ok]
+        self._state.forget(records[bare_id(t.track_id)].track_id for t in damaged)
+        return damaged
+
+    async def _resolver(self, source: Iterator[Track]) -> None:
+        for track in source:
+            track_int: YaTrack = self._controller._to_internal_short(track)                       # pylint: disable=protected-access
+            try:
+                dl_info: DownloadInfo = await self._controller._get_track_download_info(          # pylint: disable=protected-access
+                    track, codec=_CODEC, high_res=True)
+                url: str = await self._controller._get_track_direct_link(dl_info)                # pylint: disable=protected-access
+            except ControllerError as exc:
+                _LOGGER.warning('Cannot resolve %s: %s', self._describe(track_int), exc)
+                self._progress.errored += 1
+                continue
+            await self._links.put((track_int, url, dl_info.bitrate_in_kbps))
+
+    async def _download_worker(self) -> None:
+        while True:
+            item: Optional[Tuple[YaTrack, str, int]] = await self._links.get()
+            if item is None:
+                return
+            track, url, bitrate = item
+            staging: str = os.path.join(self._sync_dir, f'.{bare_id(track.track_id)}.{_CODEC}')
+            meta: Dict = {'track_id': track.track_id, 'codec': _CODEC, 'bitrate': bitrate}
+            try:
+                await self._downloader.fetch(url, staging, meta=meta)
+            except SyncError as exc:
+                _LOGGER.warning('Failed (%s): %s', exc, self._describe(track))
+                self._progress.errored += 1
+                continue
+            # Waits here when post-processing falls behind
+            await self._jobs.put(PostJob(
+                staging, self.path(track), track, bitrate, profile=self._profile))
+
+    async def _post_worker(self) -> None:
+        while True:
+            job: Optional[PostJob] = await self._jobs.get()
+            if job is None:
+                return
+            if self._covers:
+                job = job._replace(cover_path=await self._covers.get(
+                    job.track.cover_uri, SYNC_COVER_SIZE))
+            try:
+                path: str = await self._post.process(job)
+            except SyncError as exc:
+                _LOGGER.warning('Failed (%s): %s', exc, self._describe(job.track))
+                self._progress.errored += 1
+                continue
+            for previous in self._state.find(job.track.track_id):
+                if previous.path and previous.path != path and os.path.exists(previous.path):
+                    # Re-encoded with other profile, so the name differs
+                    os.remove(previous.path)
+                if previous.track_id != job.track.track_id:
+                    self._state.forget([previous.track_id])
+            if self._profile:
+                self._state.mark_synced(
+                    job.track.track_id, path, bitrate=self._profile.bitrate,
+                    codec=self._profile.codec, profile=self._profile.name)
+            else:
+                self._state.mark_synced(job.track.track_id, path, bitrate=job.bitrate, codec=_CODEC)
+            self._progress.downloaded += 1
+            _LOGGER.info('Sync: %s', path)
+
+    @staticmethod
+    async def _join(stage: List[asyncio.Task], pipeline: List[asyncio.Task]) -> None:
+        """
+        Wait for tasks of the stage, raise as soon as any pipeline task fails:
+        stages feed each other through bounded queues, so the rest would block forever
+        """
+        while True:
+            for task in pipeline:
+                if task.done() and not task.cancelled() and task.exception():
+                    raise task.exception()
+            if all(t.done() for t in stage):
+                return
+            await asyncio.wait(
+                [t for t in pipeline if not t.done()], return_when=asyncio.FIRST_COMPLETED)
+
+    async def _put(self, queue: asyncio.Queue, item, pipeline: List[asyncio.Task]) -> None:
+        """Put item to the queue, fail if consumers die while it is full"""
+        put: asyncio.Task = asyncio.create_task(queue.put(item))
+        try:
+            await self._join([put], [*pipeline, put])
+        finally:
+            put.cancel()
+
+    async def _report(self) -> None:
+        while True:
+            await asyncio.sleep(_REPORT_INTERVAL)
+            _LOGGER.info('Progress: %s', self._progress)
+
+    @staticmethod
+    def _describe(track: YaTrack) -> str:
+        return f'{track.artist} - {track.album} - {track.title} ({track.track_id})'
@@ -0,0 +1,4 @@
+"""General sync error"""
+
+class SyncError(Exception):
+    """Favorites sync error"""
@@ -0,0 +1,72 @@
+"""Post-processing of downloaded files in worker processes"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import NamedTuple, Optional
+
+from ..controllers import YaTrack
+from .error import SyncError
+from .tags import tag_file
+from .transcode import TranscodeProfile, transcode
+from .verify import verify_file
+
+
+class PostJob(NamedTuple):
+    """Downloaded file and what to do with it"""
+    staging: str
+    path: str
+    track: YaTrack
+    bitrate: int
+    cover_path: Optional[str] = None
+    profile: Optional[TranscodeProfile] = None
+
+
+def process(job: PostJob) -> str:
+    """Verify, transcode, tag and move staging file to its final name, runs in worker process"""
+    encoded: str = f'{job.staging}.{job.profile.extension}' if job.profile else job.staging
+    try:
+        verify_file(job.staging, job.track.duration, job.bitrate)
+        if job.profile:
+            transcode(job.staging, encoded, job.profile)
+            verify_file(encoded, job.track.duration)
+        # Tags are written last, so they are the same with or without transcoding
+        tag_file(encoded, job.track, job.cover_path)
+        os.replace(encoded, job.path)
+    except OSError as exc:
+        raise SyncError(f'Cannot move to {job.path}: {exc}')                                        # pylint: disable=raise-missing-from
+    finally:
+        for path in {job.staging, encoded}:
+            if os.path.exists(path):
+                os.remove(path)
+    return job.path
+
+
+class PostProcessor:
+    """
+    Pool of worker processes for CPU and disk bound work of sync:
+    mutagen parses and rewrites files and Gstreamer transcodes there,
+    so the event loop keeps downloading meanwhile and every core takes a share.
+    Workers are spawned rather than forked, since the parent has Gstreamer
+    and its threads already initialized.
+    """
+    def __init__(self, workers: int = None):
+        self.workers: int = workers or os.cpu_count() or 1
+        self._pool: Executor = None
+
+    async def run(self, func, *args):
+        """Run picklable func in the pool"""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+        return await asyncio.get_running_loop().run_in_executor(self._pool, func, *args)
+
+    async def process(self, job: PostJob) -> str:
+        """Post-process downloaded file, return its final path"""
+        return await self.run(process, job)
+
+    def shutdown(self) -> None:
+        """Stop worker processes"""
+        if self._pool:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
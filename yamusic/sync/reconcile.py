@@ -0,0 +1,160 @@
+"""Rebuild sync state from files in sync_dir"""
+import asyncio
+import logging
+import os
+import re
+from itertools import chain
+from time import time
+from typing import Dict, List, NamedTuple, Optional, Set
+
+import mutagen
+from mutagen import MutagenError
+from mutagen.mp3 import MP3
+
+from .error import SyncError
+from .postprocess import PostProcessor
+from .state import META_LIKES_REVISION, STATE_FILE, SyncedFile, SyncState, bare_id
+from .tags import read_track_id
+from .transcode import TranscodeProfile, get_profile
+from .verify import verify_file, verify_mp3
+
+_LOGGER = logging.getLogger(__name__)
+
+_AUDIO_EXTENSIONS   : Dict[str, str] = {'.mp3': 'mp3', '.opus': 'opus', '.m4a': 'aac'}
+_TRACK_ID_IN_NAME   : re.Pattern = re.compile(r'\((\d+(?::\d+)?)\)\.\w+$')
+_PARTIAL_SUFFIXES   : tuple = ('.part', '.part.json')
+# Files per worker task, amortizes inter-process overhead
+_BATCH              : int = 64
+
+
+class ScannedFile(NamedTuple):
+    """Outcome of scanning one audio file"""
+    path: str
+    track_id: Optional[str]
+    size: int
+    mtime: float
+    codec: str
+    bitrate: Optional[int]
+    error: Optional[str]
+
+
+class ReconcileReport:
+    """What reconcile found in sync_dir"""
+    def __init__(self):
+        self.synced: int = 0
+        self.forgotten: int = 0
+        self.damaged: Dict[str, str] = {}
+        self.orphans: List[str] = []
+        self.partials: List[str] = []
+        self.duplicates: Dict[str, List[str]] = {}
+
+    def __str__(self) -> str:
+        return (
+            f'Synced: {self.synced}. Forgotten: {self.forgotten}. Damaged: {len(self.damaged)}. '
+            f'Orphans: {len(self.orphans)}. Duplicates: {sum(len(d) for d in self.duplicates.values())}. '
+            f'Partial downloads: {len(self.partials)}')
+
+
+def scan_files(paths: List[str]) -> List[ScannedFile]:
+    """Identify and validate audio files, runs in worker process"""
+    return [_scan_file(path) for path in paths]
+
+
+def _scan_file(path: str) -> ScannedFile:
+    codec: str = _AUDIO_EXTENSIONS[os.path.splitext(path)[1]]
+    match: Optional[re.Match] = _TRACK_ID_IN_NAME.search(os.path.basename(path))
+    track_id: Optional[str] = match.group(1) if match else None
+    size: int = 0
+    mtime: float = 0.0
+    bitrate: Optional[int] = None
+    error: Optional[str] = None
+    try:
+        stat: os.stat_result = os.stat(path)
+        size, mtime = stat.st_size, stat.st_mtime
+        audio: Optional[mutagen.FileType] = mutagen.File(path)
+        if audio is None:
+            raise SyncError('Unknown audio format')
+        track_id = track_id or read_track_id(audio)
+        bitrate = getattr(audio.info, 'bitrate', 0) // 1000 or None
+        if isinstance(audio, MP3):
+            verify_mp3(path, audio, round(audio.info.length))
+        else:
+            verify_file(path)
+    except (MutagenError, OSError, SyncError) as exc:
+        error = str(exc)
+    return ScannedFile(path, track_id, size, mtime, codec, bitrate, error)
+
+
+class Reconciler:
+    """
+    Scans sync_dir in worker processes, identifies files by '(track_id)' in names
+    or track id tags, validates them and replaces sync state with what was found.
+    Likes revision is reset, so the next sync lists the whole collection again
+    and downloads only what is missing.
+    """
+    def __init__(self, sync_dir: str, state: SyncState, workers: int = None):
+        self._sync_dir: str = sync_dir
+        self._state: SyncState = state
+        self._post: PostProcessor = PostProcessor(workers)
+        self._profile: Optional[TranscodeProfile] = get_profile()
+
+    async def run(self) -> ReconcileReport:
+        """Rebuild state and report findings"""
+        report: ReconcileReport = ReconcileReport()
+        audio_paths: List[str] = []
+        for entry in os.scandir(self._sync_dir):
+            if not entry.is_file() or entry.name.startswith(STATE_FILE):
+                continue
+            if entry.name.endswith(_PARTIAL_SUFFIXES) or (
+                    entry.name.startswith('.') and entry.name.endswith(tuple(_AUDIO_EXTENSIONS))):
+                report.partials.append(entry.path)
+            elif os.path.splitext(entry.name)[1] in _AUDIO_EXTENSIONS:
+                audio_paths.append(entry.path)
+            elif not entry.name.startswith('syncdata.'):
+                report.orphans.append(entry.path)
+        _LOGGER.info('Scanning %d files with %d workers', len(audio_paths), self._post.workers)
+        try:
+            batches: List[List[ScannedFile]] = await asyncio.gather(*[
+                self._post.run(scan_files, audio_paths[start:start + _BATCH])
+                for start in range(0, len(audio_paths), _BATCH)])
+        finally:
+            self._post.shutdown()
+
+        by_track: Dict[str, List[ScannedFile]] = {}
+        for scanned in chain.from_iterable(batches):
+            if scanned.error:
+                report.damaged[scanned.path] = scanned.error
+            elif not scanned.track_id:
+                report.orphans.append(scanned.path)
+            else:
+                by_track.setdefault(bare_id(scanned.track_id), []).append(scanned)
+
+        records: List[SyncedFile] = []
+        for bare, files in by_track.items():
+            files.sort(key=self._preference, reverse=True)
+            if len(files) > 1:
+                report.duplicates[bare] = [f.path for f in files[1:]]
+            best: ScannedFile = files[0]
+            records.append(SyncedFile(
+                best.track_id, best.path, best.size, best.mtime,
+                best.bitrate, best.codec, time(), self._profile_of(best)))
+
+        previous: Set[str] = {bare_id(i) for i in self._state.track_ids()}
+        self._state.rebuild(records)
+        self._state.del_meta(META_LIKES_REVISION)
+        report.synced = len(records)
+        report.forgotten = len(previous - set(by_track))
+        return report
+
+    def _profile_of(self, scanned: ScannedFile) -> Optional[str]:
+        """Files of current profile codec are taken as encoded with it, others become outdated"""
+        if scanned.codec == 'mp3':
+            return None
+        if self._profile and self._profile.codec == scanned.codec:
+            return self._profile.name
+        return scanned.codec
+
+    def _preference(self, scanned: ScannedFile) -> tuple:
+        """Files of current profile first, then the newest"""
+        wanted: Optional[str] = self._profile.codec if self._profile else 'mp3'
+        return (scanned.codec == wanted, scanned.mtime)
@@ -0,0 +1,174 @@
+"""Persistent record of synced tracks"""
+import json
+import logging
+import os
+import sqlite3
+from time import time
+from typing import Iterable, List, NamedTuple, Optional, Set
+
+from .error import SyncError
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE_FILE          : str = 'syncdata.sqlite'
+_LEGACY_FILE        : str = 'syncdata.json'
+
+# Meta keys
+META_LIKES_REVISION : str = 'likes_revision'
+
+_SCHEMA             : str = '''
+CREATE TABLE IF NOT EXISTS tracks (
+    track_id    TEXT PRIMARY KEY,
+    path        TEXT,
+    size        INTEGER,
+    mtime       REAL,
+    bitrate     INTEGER,
+    codec       TEXT,
+    synced_at   REAL,
+    profile     TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key         TEXT PRIMARY KEY,
+    value       TEXT
+);
+'''
+
+
+def bare_id(track_id: str) -> str:
+    """Track id without album id, the album of a track may differ between API responses"""
+    return str(track_id).split(':', maxsplit=1)[0]
+
+
+class SyncedFile(NamedTuple):
+    """Synced track as recorded in state"""
+    track_id: str
+    path: Optional[str]
+    size: Optional[int]
+    mtime: Optional[float]
+    bitrate: Optional[int]
+    codec: Optional[str]
+    synced_at: Optional[float]
+    profile: Optional[str]
+
+    def unchanged(self) -> bool:
+        """File is still there with recorded size and modification time"""
+        if not self.path or self.size is None:
+            return False
+        try:
+            stat: os.stat_result = os.stat(self.path)
+        except OSError:
+            return False
+        return stat.st_size == self.size and stat.st_mtime == self.mtime
+
+
+class SyncState:
+    """
+    SQLite store of synced tracks in sync_dir, keyed by track id.
+    Every change is committed right away, so progress survives crashes.
+    Track ids of the legacy syncdata.json list are imported on first use.
+    """
+    def __init__(self, sync_dir: str):
+        self._dir: str = sync_dir
+        path: str = os.path.join(sync_dir, STATE_FILE)
+        created: bool = not os.path.exists(path)
+        try:
+            self._db: sqlite3.Connection = sqlite3.connect(path)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.executescript(_SCHEMA)
+            self._migrate()
+        except sqlite3.Error as exc:
+            raise SyncError(f'Cannot open sync state {path}: {exc}')                                # pylint: disable=raise-missing-from
+        if created:
+            self._import_legacy()
+
+    def __contains__(self, track_id: str) -> bool:
+        return self._db.execute(
+            'SELECT 1 FROM tracks WHERE track_id = ?', (track_id,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self._db.execute('SELECT COUNT(*) FROM tracks').fetchone()[0]
+
+    def track_ids(self) -> Set[str]:
+        """Ids of all synced tracks"""
+        return {row[0] for row in self._db.execute('SELECT track_id FROM tracks')}
+
+    def get(self, track_id: str) -> Optional[SyncedFile]:
+        """Record of synced track"""
+        row = self._db.execute(
+            f'SELECT {", ".join(SyncedFile._fields)} FROM tracks WHERE track_id = ?',
+            (track_id,)).fetchone()
+        return SyncedFile(*row) if row else None
+
+    def find(self, track_id: str) -> List[SyncedFile]:
+        """Records of the track under any album id"""
+        bare: str = bare_id(track_id)
+        return [SyncedFile(*row) for row in self._db.execute(
+            f'SELECT {", ".join(SyncedFile._fields)} FROM tracks '
+            'WHERE track_id = ? OR track_id LIKE ?', (bare, f'{bare}:%'))]
+
+    def mark_synced(self, track_id: str, path: str, bitrate: int = None, codec: str = None,
+                    profile: str = None) -> None:
+        """
+        Record synced file of the track with its current size and modification time.
+        profile names transcode profile the file was encoded with, None for original files.
+        """
+        stat: os.stat_result = os.stat(path)
+        with self._db:
+            self._db.execute(
+                f'INSERT OR REPLACE INTO tracks ({", ".join(SyncedFile._fields)}) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (track_id, path, stat.st_size, stat.st_mtime, bitrate, codec, time(), profile))
+
+    def forget(self, track_ids: Iterable[str]) -> None:
+        """Remove tracks from state, e.g. when their files are damaged"""
+        with self._db:
+            self._db.executemany(
+                'DELETE FROM tracks WHERE track_id = ?', [(i,) for i in track_ids])
+
+    def rebuild(self, records: Iterable[SyncedFile]) -> None:
+        """Replace all track records in a single transaction"""
+        with self._db:
+            self._db.execute('DELETE FROM tracks')
+            self._db.executemany(
+                f'INSERT OR REPLACE INTO tracks ({", ".join(SyncedFile._fields)}) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', records)
+
+    def get_meta(self, key: str, default: str = None) -> Optional[str]:
+        """Get stored value of sync parameter"""
+        row = self._db.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value: str) -> None:
+        """Store value of sync parameter"""
+        with self._db:
+            self._db.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (key, value))
+
+    def del_meta(self, key: str) -> None:
+        """Remove stored sync parameter"""
+        with self._db:
+            self._db.execute('DELETE FROM meta WHERE key = ?', (key,))
+
+    def close(self) -> None:
+        """Close the store"""
+        self._db.close()
+
+    def _migrate(self) -> None:
+        columns: Set[str] = {row[1] for row in self._db.execute('PRAGMA table_info(tracks)')}
+        if 'profile' not in columns:
+            with self._db:
+                self._db.execute('ALTER TABLE tracks ADD COLUMN profile TEXT')
+
+    def _import_legacy(self) -> None:
+        legacy: str = os.path.join(self._dir, _LEGACY_FILE)
+        if not os.path.exists(legacy):
+            return
+        try:
+            with open(legacy, 'r', encoding='utf-8') as infile:
+                track_ids = json.load(infile)
+        except (OSError, ValueError) as exc:
+            _LOGGER.warning('Cannot import %s: %s', legacy, exc)
+            return
+        with self._db:
+            self._db.executemany(
+                'INSERT OR IGNORE INTO tracks (track_id) VALUES (?)', [(i,) for i in track_ids])
+        _LOGGER.info('Imported %d synced tracks from %s', len(track_ids), legacy)
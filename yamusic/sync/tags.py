@@ -0,0 +1,94 @@
+"""Tagging of synced files"""
+import base64
+from typing import Optional
+
+import mutagen
+from mutagen import MutagenError
+from mutagen.flac import Picture
+from mutagen.id3 import APIC, ID3, TAL, TIT2, TPE1, TXXX
+from mutagen.mp3 import MP3, error
+from mutagen.mp4 import MP4, MP4Cover
+from mutagen.oggopus import OggOpus
+
+from ..controllers import YaTrack
+from .error import SyncError
+
+_COVER_MIME         : str = 'image/jpeg'
+_FRONT_COVER        : int = 3
+# Track id tag keys, lets reconcile identify renamed files
+_ID3_TRACK_ID       : str = 'YANDEX_TRACK_ID'
+_VORBIS_TRACK_ID    : str = 'yandex_track_id'
+_MP4_TRACK_ID       : str = '----:com.yandex.music:track_id'
+
+
+def tag_file(path: str, track: YaTrack, cover_path: Optional[str] = None) -> None:
+    """Write title, artist and album tags by file extension, embed front cover if given"""
+    try:
+        cover: Optional[bytes] = None
+        if cover_path:
+            with open(cover_path, 'rb') as infile:
+                cover = infile.read()
+        if path.endswith('.opus'):
+            _tag_opus(path, track, cover)
+        elif path.endswith('.m4a'):
+            _tag_mp4(path, track, cover)
+        else:
+            _tag_mp3(path, track, cover)
+    except (MutagenError, OSError) as exc:
+        raise SyncError(f'Cannot tag {path}: {exc}')                                                # pylint: disable=raise-missing-from
+
+
+def read_track_id(audio: mutagen.FileType) -> Optional[str]:
+    """Track id written by tag_file into already opened file, if any"""
+    tags = audio.tags
+    if not tags:
+        return None
+    if isinstance(tags, ID3):
+        frame = tags.get(f'TXXX:{_ID3_TRACK_ID}')
+        return str(frame.text[0]) if frame else None
+    if _MP4_TRACK_ID in tags:
+        return bytes(tags[_MP4_TRACK_ID][0]).decode('utf-8')
+    values = tags.get(_VORBIS_TRACK_ID)
+    return values[0] if values else None
+
+
+def _tag_mp3(path: str, track: YaTrack, cover: Optional[bytes]) -> None:
+    audio = MP3(path, ID3=ID3)
+    try:
+        audio.add_tags()
+    except error:
+        pass # tags already present
+    audio.tags.add(TIT2(encoding=3, text=track.title))
+    audio.tags.add(TPE1(encoding=3, text=track.artist))
+    audio.tags.add(TAL(encoding=3, text=track.album))
+    audio.tags.add(TXXX(encoding=3, desc=_ID3_TRACK_ID, text=str(track.track_id)))
+    if cover:
+        audio.tags.add(APIC(
+            encoding=3, mime=_COVER_MIME, type=_FRONT_COVER, desc='Cover', data=cover))
+    audio.save()
+
+
+def _tag_opus(path: str, track: YaTrack, cover: Optional[bytes]) -> None:
+    audio = OggOpus(path)
+    audio['title'] = track.title
+    audio['artist'] = track.artist
+    audio['album'] = track.album
+    audio[_VORBIS_TRACK_ID] = str(track.track_id)
+    if cover:
+        picture: Picture = Picture()
+        picture.type = _FRONT_COVER
+        picture.mime = _COVER_MIME
+        picture.data = cover
+        audio['metadata_block_picture'] = base64.b64encode(picture.write()).decode('ascii')
+    audio.save()
+
+
+def _tag_mp4(path: str, track: YaTrack, cover: Optional[bytes]) -> None:
+    audio = MP4(path)
+    audio['\xa9nam'] = track.title
+    audio['\xa9ART'] = track.artist
+    audio['\xa9alb'] = track.album
+    audio[_MP4_TRACK_ID] = [str(track.track_id).encode('utf-8')]
+    if cover:
+        audio['covr'] = [MP4Cover(cover, imageformat=MP4Cover.FORMAT_JPEG)]
+    audio.save()
@@ -0,0 +1,85 @@
+"""Transcoding of synced files with Gstreamer"""
+import os
+from typing import Dict, NamedTuple, Optional
+
+import gi                                                                                           # pylint: disable=import-error
+gi.require_version('Gst', '1.0')
+from gi.repository import GLib, Gst                                                                 # pylint: disable=import-error,wrong-import-position
+
+from utils.config import get_key                                                                   # pylint: disable=wrong-import-position
+
+from .error import SyncError                                                                        # pylint: disable=wrong-import-position
+
+CODEC_AAC           : str = 'aac'
+CODEC_OPUS          : str = 'opus'
+
+# codec: (encoder, muxer, file extension)
+_ENCODERS           : Dict[str, tuple] = {
+    CODEC_AAC: ('avenc_aac', 'mp4mux', 'm4a'),
+    CODEC_OPUS: ('opusenc', 'oggmux', 'opus'),
+}
+_DEFAULT_BITRATE    : int = 128
+_TIMEOUT            : int = 600
+
+
+class TranscodeProfile(NamedTuple):
+    """Target codec and bitrate, kbps, of synced files"""
+    codec: str
+    bitrate: int
+
+    @property
+    def name(self) -> str:
+        """Profile name as recorded in sync state"""
+        return f'{self.codec}-{self.bitrate}'
+
+    @property
+    def extension(self) -> str:
+        """Extension of transcoded files"""
+        return _ENCODERS[self.codec][2]
+
+    def pipeline(self) -> str:
+        """Gstreamer pipeline description, file locations are set by element names"""
+        encoder, muxer, _ = _ENCODERS[self.codec]
+        return (
+            f'filesrc name=src ! decodebin ! audioconvert ! audioresample ! '
+            f'{encoder} bitrate={self.bitrate * 1000} ! {muxer} ! filesink name=sink')
+
+
+def get_profile() -> Optional[TranscodeProfile]:
+    """
+    Transcode profile from config, e.g.
+    sync_transcode: {codec: opus, bitrate: 96}
+    None keeps original MP3 files.
+    """
+    config: Optional[Dict] = get_key('sync_transcode')
+    if not config:
+        return None
+    codec: str = config.get('codec')
+    if codec not in _ENCODERS:
+        raise SyncError(f'Unsupported transcode codec {codec}, use one of {", ".join(_ENCODERS)}')
+    return TranscodeProfile(codec, int(config.get('bitrate', _DEFAULT_BITRATE)))
+
+
+def transcode(src: str, dst: str, profile: TranscodeProfile) -> None:
+    """Encode src into dst with the profile, blocks until done"""
+    Gst.init(None)
+    try:
+        pipeline: Gst.Pipeline = Gst.parse_launch(profile.pipeline())
+    except GLib.Error as exc:
+        raise SyncError(f'Cannot build {profile.name} pipeline: {exc}')                             # pylint: disable=raise-missing-from
+    pipeline.get_by_name('src').set_property('location', src)
+    pipeline.get_by_name('sink').set_property('location', dst)
+    pipeline.set_state(Gst.State.PLAYING)
+    message: Optional[Gst.Message] = pipeline.get_bus().timed_pop_filtered(
+        _TIMEOUT * Gst.SECOND, Gst.MessageType.EOS | Gst.MessageType.ERROR)
+    pipeline.set_state(Gst.State.NULL)
+    error: Optional[str] = None
+    if message is None:
+        error = f'timed out after {_TIMEOUT} s'
+    elif message.type == Gst.MessageType.ERROR:
+        error = message.parse_error()[0].message
+    if error:
+        if os.path.exists(dst):
+            os.remove(dst)
+        raise SyncError(f'Cannot transcode to {profile.name}: {error}')
+
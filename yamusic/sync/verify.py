@@ -0,0 +1,75 @@
+"""Integrity checks of synced files"""
+import os
+from typing import Optional
+
+import mutagen
+from mutagen import MutagenError
+from mutagen.mp3 import MP3
+
+from .error import SyncError
+
+# Allowed difference between file and track duration, seconds
+_DURATION_SLACK     : float = 3.0
+# Minimal share of audio bytes expected from bitrate and track duration
+_MIN_AUDIO_SHARE    : float = 0.97
+
+
+def verify_file(path: str, duration: int = 0, bitrate: Optional[int] = None) -> None:
+    """
+    Check that path is a whole audio file of given duration, seconds, and bitrate, kbps.
+    Raises SyncError describing the problem.
+    """
+    if not path.endswith('.mp3'):
+        _verify_transcoded(path, duration)
+        return
+    try:
+        audio: MP3 = MP3(path)
+    except (MutagenError, OSError) as exc:
+        raise SyncError(f'Not a valid MP3: {exc}')                                                  # pylint: disable=raise-missing-from
+    verify_mp3(path, audio, duration, bitrate)
+
+
+def verify_mp3(path: str, audio: MP3, duration: int = 0, bitrate: Optional[int] = None) -> None:
+    """
+    Same checks for already parsed MP3.
+    Duration declared by Xing header survives truncation, so the amount of
+    audio data is also compared with the one the bitrate implies.
+    """
+    info = audio.info
+    try:
+        audio_bytes: int = os.path.getsize(path) - _tags_size(path)
+    except OSError as exc:
+        raise SyncError(f'Cannot read {path}: {exc}')                                               # pylint: disable=raise-missing-from
+    if bitrate and abs(info.bitrate / 1000 - bitrate) > bitrate * 0.1:
+        raise SyncError(f'Bitrate {info.bitrate // 1000} kbps, expected {bitrate} kbps')
+    if not duration:
+        return
+    _check_duration(info.length, duration)
+    if info.bitrate and audio_bytes < (duration - _DURATION_SLACK) * info.bitrate / 8 * _MIN_AUDIO_SHARE:
+        raise SyncError(f'Truncated: {audio_bytes} bytes of audio for {duration} s')
+
+
+def _verify_transcoded(path: str, duration: int) -> None:
+    try:
+        audio: Optional[mutagen.FileType] = mutagen.File(path)
+    except (MutagenError, OSError) as exc:
+        raise SyncError(f'Not a valid audio file: {exc}')                                           # pylint: disable=raise-missing-from
+    if audio is None:
+        raise SyncError('Unknown audio format')
+    if duration:
+        _check_duration(audio.info.length, duration)
+
+
+def _check_duration(length: float, duration: int) -> None:
+    if abs(length - duration) > _DURATION_SLACK:
+        raise SyncError(f'Duration {length:.0f} s, expected {duration} s')
+
+
+def _tags_size(path: str) -> int:
+    """Size of leading ID3v2 tag, it carries no audio"""
+    with open(path, 'rb') as audio:
+        header: bytes = audio.read(10)
+    if len(header) < 10 or header[:3] != b'ID3':
+        return 0
+    # Synchsafe integer: 7 significant bits per byte
+    return 10 + ((header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9])
@@ -0,0 +1,152 @@
+"""Runs player, its controllers and API client on a dedicated asyncio loop"""
+import asyncio
+import inspect
+import logging
+import threading
+from functools import wraps
+from typing import Any, Awaitable, Callable, List, Optional, Tuple, TypeVar
+
+from yandex_music import Restrictions, RotorSettings, Value
+
+from .controllers import YaTrack
+from .player import PlayerSnapshot, YaPlayer
+from .search_index import TrackIndex
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar('_T')
+
+
+class PlayerWorker:
+    """
+    Owns a worker thread with its own asyncio loop.
+    API requests, JSON parsing and yandex_music object construction run there,
+    so the caller's loop (Tk one in UI) only waits for results.
+    """
+    def __init__(self, name: str = 'yaMusic-player'):
+        self._name: str = name
+        self._loop: asyncio.AbstractEventLoop = None
+        self._thread: threading.Thread = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Loop of the worker thread"""
+        return self._loop
+
+    def start(self) -> 'PlayerWorker':
+        """Start worker thread and its loop"""
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+        self._thread.start()
+        return self
+
+    async def call(self, func: Callable[..., Awaitable[_T]], *args, **kwargs) -> _T:
+        """Run coroutine function on the worker loop and await its result from the calling loop"""
+        future = asyncio.run_coroutine_threadsafe(func(*args, **kwargs), self._loop)
+        return await asyncio.wrap_future(future)
+
+    def call_soon(self, func: Callable[..., Any], *args, **kwargs) -> None:
+        """Run plain function on the worker loop, e.g. one which starts tasks there"""
+        self._loop.call_soon_threadsafe(lambda: func(*args, **kwargs))
+
+    async def stop(self) -> None:
+        """Stop the loop once its pending callbacks are done and wait for thread exit"""
+        if self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        await asyncio.get_running_loop().run_in_executor(None, self._thread.join)
+        self._loop = None
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        _LOGGER.debug('Player loop started in %s.', self._name)
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            self._loop.close()
+            _LOGGER.debug('Player loop stopped.')
+
+
+class PlayerProxy:
+    """
+    Thread-safe bridge to YaPlayer living on PlayerWorker loop.
+    Coroutine methods are executed on the worker loop, results are awaited by caller.
+    Each call also takes a snapshot of controller state on the worker loop,
+    sync getters of playlist, sources and settings are served from the latest one.
+    Properties read shared dashboard or plain attributes, so they are read directly.
+    Callbacks passed to the player are invoked on the caller's loop.
+    """
+    def __init__(self, worker: PlayerWorker, player: YaPlayer, snapshot: PlayerSnapshot):
+        self._worker: PlayerWorker = worker
+        self._player: YaPlayer = player
+        self._caller_loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        self._snapshot: PlayerSnapshot = None
+        self._index: TrackIndex = TrackIndex()
+        self._apply_snapshot(snapshot)
+
+    @classmethod
+    async def create(cls, worker: PlayerWorker, *args, **kwargs) -> 'PlayerProxy':
+        """Construct and initialize YaPlayer on the worker loop"""
+        async def _create() -> Tuple[YaPlayer, PlayerSnapshot]:
+            player: YaPlayer = await YaPlayer(*args, **kwargs).init()
+            return player, player.snapshot()
+        return cls(worker, *await worker.call(_create))
+
+    def __getattr__(self, name: str) -> Any:
+        attr: Any = getattr(self._player, name)
+        if inspect.iscoroutinefunction(attr):
+            @wraps(attr)
+            async def _forward(*args, **kwargs):
+                async def _call() -> Tuple[Any, PlayerSnapshot]:
+                    return await attr(*args, **kwargs), self._player.snapshot()
+                result, snapshot = await self._worker.call(_call)
+                self._apply_snapshot(snapshot)
+                return result
+            return _forward
+        return attr
+
+    @property
+    def source_id(self) -> Optional[str]:
+        """ID of controller's current source"""
+        return self._snapshot.source_id
+
+    def get_sources_list(self) -> List[Value]:
+        """Sources of active controller"""
+        return list(self._snapshot.sources)
+
+    def get_source_restrictions(self) -> Optional[Restrictions]:
+        """Settings restrictions for active source"""
+        return self._snapshot.source_restrictions
+
+    def get_source_settings(self) -> Optional[RotorSettings]:
+        """Settings for active source"""
+        return self._snapshot.source_settings
+
+    def get_short_playlist(self) -> List[YaTrack]:
+        """Current playlist without download info"""
+        return list(self._snapshot.playlist)
+
+    def get_playlist_position(self) -> int:
+        """Current playlist position"""
+        return self._snapshot.playlist_position
+
+    def search_playlist(self, query: str) -> List[int]:
+        """Positions of current playlist tracks matching query"""
+        return self._index.search(query)
+
+    def query_artist(self, callback: Callable = None, **kwargs) -> None:
+        """Start artist query on the worker loop, deliver results to the caller's loop"""
+        def _deliver(result: Any) -> None:
+            self._caller_loop.call_soon_threadsafe(callback, result)
+        self._worker.call_soon(
+            self._player.query_artist, callback=_deliver if callback else None, **kwargs)
+
+    def _apply_snapshot(self, snapshot: PlayerSnapshot) -> None:
+        # Concurrent calls may finish out of order, an older snapshot must not win
+        if self._snapshot and snapshot.seq <= self._snapshot.seq:
+            return
+        previous: Tuple[YaTrack, ...] = self._snapshot.playlist if self._snapshot else ()
+        self._snapshot = snapshot
+        if [t.track_id for t in snapshot.playlist] != [t.track_id for t in previous]:
+            self._caller_loop.run_in_executor(None, self._index.update, snapshot.playlist)